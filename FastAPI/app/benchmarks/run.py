@@ -0,0 +1,585 @@
+"""
+This module runs the HTTP benchmark of every order, order-product and job
+route against a local SQLite copy of a seeded dataset, and compares the
+results with a stored baseline.
+
+Run it from the application directory with ``python -m benchmarks.run``.
+It exits with status 1 when a route regressed beyond the threshold.
+
+Three routes are not benchmarked: ``GET /order/changes`` streams Server-Sent
+Events until the client disconnects, so it has no response time to measure;
+``POST /jobs/{job_id}/cancel`` and ``GET /jobs/{job_id}/file`` answer
+according to how far the background runner got with the job (409 once it
+finished, or before the export file exists), so their timings would measure
+the runner rather than the route.
+"""
+
+# pylint: disable=E0401,too-few-public-methods,too-many-locals
+
+import argparse
+import http.client
+import json
+import math
+import os
+import queue
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import timedelta
+
+from config.settings import env_int
+from helpers.pagination import encode_cursor
+from benchmarks.seed import SEED_END_DATE, add_dataset_arguments, seed_database
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(APP_DIR, "benchmarks", "baseline.json")
+
+
+class Workload:
+    """
+    Builds the requests of every benchmarked route from the seeded ranges.
+
+    Attributes:
+        orders (int): The number of seeded orders.
+        lines (int): The number of seeded order-product relationships.
+        users (int): The number of seeded users.
+        products (int): The number of seeded products.
+        days (int): The number of seeded order dates.
+    """
+
+    def __init__(self, meta: dict):
+        self.orders = meta["orders"]
+        self.lines = meta["order_products"]
+        self.users = meta["users"]
+        self.products = meta["products"]
+        self.days = meta["days"]
+        # Deletes consume IDs from the ends of the ranges the other routes
+        # do not touch, so every delete hits an existing row.
+        self._next_order_delete = self.orders
+        self._next_line_delete = 1
+
+    def _order_id(self, rng):
+        return rng.randint(1, self.orders // 2)
+
+    def _line_id(self, rng):
+        return rng.randint(self.lines // 2, self.lines)
+
+    def _day(self, rng, offset: int = 0):
+        return (
+            SEED_END_DATE - timedelta(days=rng.randrange(self.days) + offset)
+        ).isoformat()
+
+    @staticmethod
+    def _ids(rng, top: int):
+        return ",".join(str(rng.randint(1, top)) for _ in range(20))
+
+    def _order_body(self, rng):
+        return {
+            "user_id": rng.randint(1, self.users),
+            "total": round(rng.uniform(1, 500), 2),
+        }
+
+    def _line_body(self, rng):
+        return {
+            "order_id": self._order_id(rng),
+            "product_id": rng.randint(1, self.products),
+            "quantity": rng.randint(1, 10),
+        }
+
+    def _delete_order(self, _rng):
+        self._next_order_delete -= 1
+        return "DELETE", f"/order/orders/{self._next_order_delete + 1}", None
+
+    def _delete_line(self, _rng):
+        self._next_line_delete += 1
+        return (
+            "DELETE",
+            f"/product_order_route/order_products/{self._next_line_delete - 1}",
+            None,
+        )
+
+    def _purge_ids(self, count: int) -> list:
+        self._next_order_delete -= count
+        return list(
+            range(self._next_order_delete + 1, self._next_order_delete + count + 1)
+        )
+
+    @staticmethod
+    def _ndjson(rows: list) -> bytes:
+        return "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+    def routes(self, get_json):
+        """
+        Return the ``(name, factory)`` pairs of the benchmarked routes, in
+        run order; each factory builds a ``(method, path, body)`` request.
+        ``get_json`` sends a GET to the application and decodes the body; it
+        looks up the jobs submitted by ``POST /jobs``, which runs first.
+        """
+        orders, lines = "/order/orders", "/product_order_route/order_products"
+        ids = self._ids
+        job_ids = []
+
+        def job_id(rng):
+            if not job_ids:
+                job_ids.extend(job["id"] for job in get_json("/jobs")["jobs"])
+            return rng.choice(job_ids)
+
+        return [
+            (
+                "GET /order/orders",
+                lambda rng: (
+                    "GET",
+                    f"{orders}?cursor={encode_cursor(self._order_id(rng))}",
+                    None,
+                ),
+            ),
+            (
+                "GET /order/orders?fields",
+                lambda rng: (
+                    "GET",
+                    f"{orders}?fields=id,total&cursor={encode_cursor(self._order_id(rng))}",
+                    None,
+                ),
+            ),
+            (
+                "GET /order/orders?user_id",
+                lambda rng: (
+                    "GET",
+                    f"{orders}?user_id={rng.randint(1, self.users)}",
+                    None,
+                ),
+            ),
+            (
+                "GET /order/orders?include=products",
+                lambda rng: (
+                    "GET",
+                    f"{orders}?include=products&cursor={encode_cursor(self._order_id(rng))}",
+                    None,
+                ),
+            ),
+            (
+                "GET /order/orders?ids",
+                lambda rng: ("GET", f"{orders}?ids={ids(rng, self.orders // 2)}", None),
+            ),
+            (
+                "GET /order/orders/export",
+                lambda rng: (
+                    "GET",
+                    f"{orders}/export?user_id={rng.randint(1, self.users)}",
+                    None,
+                ),
+            ),
+            (
+                "GET /order/orders/summary",
+                lambda rng: (
+                    "GET",
+                    f"{orders}/summary?group_by=day&date_from={self._day(rng, 30)}",
+                    None,
+                ),
+            ),
+            (
+                "GET /order/orders/{order_id}",
+                lambda rng: ("GET", f"{orders}/{self._order_id(rng)}", None),
+            ),
+            (
+                "GET /order/orders/{order_id}?include=products",
+                lambda rng: (
+                    "GET",
+                    f"{orders}/{self._order_id(rng)}?include=products",
+                    None,
+                ),
+            ),
+            ("POST /order/orders", lambda rng: ("POST", orders, self._order_body(rng))),
+            (
+                "POST /order/orders/with_products",
+                lambda rng: (
+                    "POST",
+                    f"{orders}/with_products",
+                    {
+                        **self._order_body(rng),
+                        "products": [
+                            {"product_id": rng.randint(1, self.products), "quantity": 1}
+                            for _ in range(3)
+                        ],
+                    },
+                ),
+            ),
+            (
+                "POST /order/orders/bulk",
+                lambda rng: (
+                    "POST",
+                    f"{orders}/bulk",
+                    [self._order_body(rng) for _ in range(100)],
+                ),
+            ),
+            (
+                "POST /order/orders/import",
+                lambda rng: (
+                    "POST",
+                    f"{orders}/import?format=ndjson",
+                    self._ndjson([self._order_body(rng) for _ in range(100)]),
+                ),
+            ),
+            (
+                "PUT /order/orders/{order_id}",
+                lambda rng: (
+                    "PUT",
+                    f"{orders}/{self._order_id(rng)}",
+                    self._order_body(rng),
+                ),
+            ),
+            (
+                "GET /product_order_route/order_products",
+                lambda rng: (
+                    "GET",
+                    f"{lines}?cursor={encode_cursor(self._line_id(rng))}",
+                    None,
+                ),
+            ),
+            (
+                "GET /product_order_route/order_products?product_id",
+                lambda rng: (
+                    "GET",
+                    f"{lines}?product_id={rng.randint(1, self.products)}",
+                    None,
+                ),
+            ),
+            (
+                "GET /product_order_route/order_products?ids",
+                lambda rng: ("GET", f"{lines}?ids={ids(rng, self.lines)}", None),
+            ),
+            (
+                "GET /product_order_route/order_products/export",
+                lambda rng: (
+                    "GET",
+                    f"{lines}/export?user_id={rng.randint(1, self.users)}",
+                    None,
+                ),
+            ),
+            (
+                "GET /product_order_route/order_products/{order_product_id}",
+                lambda rng: ("GET", f"{lines}/{self._line_id(rng)}", None),
+            ),
+            (
+                "POST /product_order_route/order_products",
+                lambda rng: ("POST", lines, self._line_body(rng)),
+            ),
+            (
+                "POST /product_order_route/order_products/import",
+                lambda rng: (
+                    "POST",
+                    f"{lines}/import?format=ndjson",
+                    self._ndjson([self._line_body(rng) for _ in range(100)]),
+                ),
+            ),
+            (
+                "PUT /product_order_route/order_products/{order_product_id}",
+                lambda rng: (
+                    "PUT",
+                    f"{lines}/{self._line_id(rng)}",
+                    self._line_body(rng),
+                ),
+            ),
+            ("DELETE /order/orders/{order_id}", self._delete_order),
+            (
+                "DELETE /product_order_route/order_products/{order_product_id}",
+                self._delete_line,
+            ),
+            (
+                "POST /order/orders/purge",
+                lambda rng: ("POST", f"{orders}/purge", {"ids": self._purge_ids(10)}),
+            ),
+            (
+                "POST /jobs",
+                lambda rng: (
+                    "POST",
+                    "/jobs",
+                    {"type": "purge_orders", "params": {"ids": self._purge_ids(1)}},
+                ),
+            ),
+            ("GET /jobs", lambda rng: ("GET", "/jobs?limit=20", None)),
+            ("GET /jobs/{job_id}", lambda rng: ("GET", f"/jobs/{job_id(rng)}", None)),
+        ]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(database_path: str, port: int, workers: int):
+    """
+    Start ``main:app`` under uvicorn in a subprocess bound to the SQLite
+    file, with ``workers`` worker processes.
+    """
+    env = {**os.environ, "SQLITE_DATABASE": database_path}
+    server = subprocess.Popen(  # pylint: disable=consider-using-with
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        cwd=APP_DIR,
+        env=env,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/metrics")
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("The application did not start")
+
+
+def _percentile(sorted_values: list, percent: float) -> float:
+    """
+    Nearest-rank percentile of an ascending list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _run_route(port: int, headers: dict, requests: list, concurrency: int, warmup: int):
+    """
+    Send the prepared requests with ``concurrency`` keep-alive connections.
+
+    :return: A dict with the throughput, latency percentiles and errors
+    """
+    pending = queue.Queue()
+    for request in requests:
+        pending.put(request)
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def worker():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        while True:
+            try:
+                index, (method, path, body) = pending.get_nowait()
+            except queue.Empty:
+                return
+            if body is None or isinstance(body, bytes):
+                payload = body
+            else:
+                payload = json.dumps(body)
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=payload, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                status = 0
+            elapsed = time.perf_counter() - started
+            if index < warmup:
+                continue
+            with lock:
+                latencies.append(elapsed)
+                if not 200 <= status < 400:
+                    errors.append(status)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    latencies.sort()
+    measured = len(latencies)
+    return {
+        "requests": measured,
+        "errors": len(errors),
+        "throughput_rps": round(measured / wall, 2) if wall else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    List the routes whose p95 latency grew, or whose throughput dropped,
+    by more than ``threshold`` (a fraction) against the baseline.
+    """
+    regressions = []
+    for name, current in results["routes"].items():
+        previous = baseline.get("routes", {}).get(name)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms"
+            )
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {previous['throughput_rps']} -> "
+                f"{current['throughput_rps']} req/s"
+            )
+    return regressions
+
+
+def _prepare_dataset(args) -> dict:
+    """
+    Seed the template database unless one with the same parameters exists.
+    """
+    meta_path = args.template + ".json"
+    params = {
+        "orders": args.orders,
+        "lines_per_order": args.lines_per_order,
+        "users": args.users,
+        "products": args.products,
+        "days": args.days,
+        "seed": args.seed,
+    }
+    if not args.reseed and os.path.exists(args.template) and os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        if meta["params"] == params:
+            return meta
+    print(f"Seeding {args.orders} orders into {args.template}...", flush=True)
+    counts = seed_database(args.template, **params)
+    meta = {"params": params, **params, **counts}
+    with open(meta_path, "w", encoding="utf-8") as meta_file:
+        json.dump(meta, meta_file, indent=2)
+    return meta
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--template",
+        default=os.path.join(APP_DIR, "bench-template.db"),
+        help="Seeded SQLite file, reused between runs",
+    )
+    add_dataset_arguments(parser)
+    parser.add_argument("--reseed", action="store_true")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per route")
+    parser.add_argument(
+        "--warmup", type=int, default=20, help="Unmeasured requests per route"
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes of the application server",
+    )
+    parser.add_argument(
+        "--route",
+        action="append",
+        default=[],
+        help="Only run routes whose name contains this text (repeatable)",
+    )
+    parser.add_argument("--output", default=os.path.join(APP_DIR, "bench-results.json"))
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=env_int("BENCHMARK_THRESHOLD_PERCENT", 20) / 100,
+        help="Allowed regression, as a fraction (default 0.2)",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store these results as the new baseline",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """
+    Command-line entry point.
+    """
+    args = _parse_args()
+    meta = _prepare_dataset(args)
+    # Every run starts from an identical copy of the seeded data.
+    working = args.template + ".run"
+    shutil.copyfile(args.template, working)
+    port = _free_port()
+    server = _start_server(working, port, args.workers)
+    headers = {
+        "x-api-key": os.getenv("API_KEY", ""),
+        "Content-Type": "application/json",
+    }
+
+    def get_json(path: str):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        try:
+            connection.request("GET", path, headers=headers)
+            return json.loads(connection.getresponse().read())
+        finally:
+            connection.close()
+
+    workload = Workload(meta)
+    results = {
+        "dataset": meta["params"],
+        "requests_per_route": args.requests,
+        "concurrency": args.concurrency,
+        "workers": args.workers,
+        "routes": {},
+    }
+    try:
+        for index, (name, factory) in enumerate(workload.routes(get_json)):
+            if args.route and not any(part in name for part in args.route):
+                continue
+            rng = random.Random(args.seed + index)
+            requests = list(
+                enumerate(factory(rng) for _ in range(args.warmup + args.requests))
+            )
+            stats = _run_route(port, headers, requests, args.concurrency, args.warmup)
+            results["routes"][name] = stats
+            print(
+                f"{name:<64} {stats['throughput_rps']:>9.1f} req/s  p50 {stats['p50_ms']:>8.2f}ms"
+                f"  p95 {stats['p95_ms']:>8.2f}ms  p99 {stats['p99_ms']:>8.2f}ms"
+                f"  errors {stats['errors']}",
+                flush=True,
+            )
+    finally:
+        server.terminate()
+        server.wait()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(working + suffix):
+                os.remove(working + suffix)
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, indent=2)
+    if args.update_baseline or not os.path.exists(args.baseline):
+        shutil.copyfile(args.output, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline.get("workers", 1) != args.workers:
+        print(
+            f"Baseline recorded with {baseline.get('workers', 1)} worker(s): not compared"
+        )
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
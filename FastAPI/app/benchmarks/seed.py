@@ -0,0 +1,164 @@
+"""
+This module generates a reproducible synthetic dataset of orders and
+order-product relationships in a local SQLite file, for the benchmarks.
+
+Run it from the application directory with
+``python -m benchmarks.seed --path bench.db --orders 1000000``.
+"""
+
+# pylint: disable=E0401,import-outside-toplevel,too-many-arguments,too-many-locals
+
+import argparse
+import os
+import random
+import time
+from datetime import date, timedelta
+
+SEED_CHUNK_SIZE = 50000
+# Order dates end on a fixed day so a seed always produces the same rows.
+SEED_END_DATE = date(2024, 12, 31)
+
+
+def _order_rows(rng, orders: int, users: int, days: list):
+    """
+    Yield ``(id, user_id, date, total)`` tuples for the orders.
+    """
+    for order_id in range(1, orders + 1):
+        yield (
+            order_id,
+            rng.randint(1, users),
+            rng.choice(days),
+            round(rng.uniform(1, 500), 2),
+        )
+
+
+def _line_rows(rng, orders: int, lines_per_order: int, products: int):
+    """
+    Yield ``(order_id, product_id, quantity)`` tuples; every order gets
+    between 0 and ``2 * lines_per_order`` lines.
+    """
+    for order_id in range(1, orders + 1):
+        for _ in range(rng.randint(0, 2 * lines_per_order)):
+            yield (order_id, rng.randint(1, products), rng.randint(1, 10))
+
+
+def _insert_chunked(connection, sql: str, rows) -> int:
+    """
+    Insert ``rows`` with ``executemany`` in chunks and return how many were written.
+    """
+    written = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == SEED_CHUNK_SIZE:
+            connection.executemany(sql, chunk)
+            written += len(chunk)
+            chunk = []
+    if chunk:
+        connection.executemany(sql, chunk)
+        written += len(chunk)
+    return written
+
+
+def seed_database(
+    path: str,
+    orders: int,
+    lines_per_order: int = 3,
+    users: int = 50000,
+    products: int = 10000,
+    days: int = 365,
+    seed: int = 42,
+):
+    """
+    Create a fresh SQLite database at ``path`` with the application schema
+    and fill it with synthetic data.
+
+    The same arguments always produce the same rows. Rows are written with
+    plain ``executemany`` calls on the driver connection, inside a single
+    transaction, bypassing the ORM: a million orders with their lines take
+    about a minute.
+
+    :param path: The SQLite file to create (replaced if it exists)
+    :param orders: The number of orders
+    :param lines_per_order: The average number of lines per order
+    :param users: The number of distinct users
+    :param products: The number of distinct products
+    :param days: The number of distinct order dates, ending on SEED_END_DATE
+    :param seed: The random seed
+    :return: A dict with the number of orders and lines written
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    # The database is chosen from the environment when config.database is
+    # first imported, so it is only imported once the path is known.
+    os.environ["SQLITE_DATABASE"] = path
+    from config.database import connection_scope, database
+    from config.migrations import run_migrations
+    from services.summary_service import SummaryService
+
+    run_migrations()
+    rng = random.Random(seed)
+    day_values = [
+        (SEED_END_DATE - timedelta(days=offset)).isoformat() for offset in range(days)
+    ]
+    with connection_scope("seed_database"):
+        connection = database.connection()
+        connection.execute("PRAGMA synchronous = OFF")
+        with database.atomic():
+            order_count = _insert_chunked(
+                connection,
+                "INSERT INTO orders (id, user_id, date, total) VALUES (?, ?, ?, ?)",
+                _order_rows(rng, orders, users, day_values),
+            )
+            line_count = _insert_chunked(
+                connection,
+                "INSERT INTO order_products (order_id, product_id, quantity) VALUES (?, ?, ?)",
+                _line_rows(rng, orders, lines_per_order, products),
+            )
+        SummaryService.rebuild()
+        # Fold the WAL into the main file so the database can be copied.
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    database.close()
+    return {"orders": order_count, "order_products": line_count}
+
+
+def add_dataset_arguments(parser: argparse.ArgumentParser):
+    """
+    Add the options describing the generated dataset to a parser.
+    """
+    parser.add_argument("--orders", type=int, default=1000000)
+    parser.add_argument("--lines-per-order", type=int, default=3)
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=42)
+
+
+def main():
+    """
+    Command-line entry point.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--path", default="bench.db")
+    add_dataset_arguments(parser)
+    args = parser.parse_args()
+    started = time.perf_counter()
+    counts = seed_database(
+        args.path,
+        args.orders,
+        lines_per_order=args.lines_per_order,
+        users=args.users,
+        products=args.products,
+        days=args.days,
+        seed=args.seed,
+    )
+    elapsed = time.perf_counter() - started
+    print(
+        f"Seeded {counts['orders']} orders and {counts['order_products']} "
+        f"order products in {elapsed:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,36 +2,715 @@
 This module defines the database configuration and the models for orders and order products.
 """
 
-# pylint: disable=too-few-public-methods
+# pylint: disable=E0401,too-few-public-methods,abstract-method
 
+import functools
+import itertools
 import os  # type: ignore
-from datetime import date  # type: ignore
+import random
+import threading
+import time
+from datetime import date, datetime  # type: ignore
 from dotenv import load_dotenv  # type: ignore
 
 from peewee import (
     AutoField,
+    BigAutoField,
+    BooleanField,
+    CharField,
+    CompositeKey,
     DateField,
+    DateTimeField,
     FloatField,
     ForeignKeyField,
     IntegerField,
     Model,
     MySQLDatabase,
+    OperationalError,
+    SqliteDatabase,
+    TextField,
 )
+from playhouse.pool import MaxConnectionsExceeded, PooledMySQLDatabase
+from playhouse.shortcuts import ReconnectMixin
 
+from config.settings import env_flag, env_float, env_int
+from helpers.circuit_breaker import CircuitBreaker, CircuitOpenError
+from helpers.consistency import primary_required
+from helpers.fault_injection import FaultInjectionMixin
+from helpers.metrics import DB_LATENCY, DB_QUERIES, DB_ROWS
 
 # Cargar variables de entorno
 load_dotenv()
 
+STATEMENT_TYPES = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE"})
+
+# MySQL client errors meaning the server cannot be reached: cannot connect
+# (socket, TCP), server gone away, connection lost during a query or while
+# connecting.
+CONNECTION_ERROR_CODES = frozenset({2002, 2003, 2006, 2013, 2055})
+# MySQL server errors after which the statement can simply be run again:
+# lock wait timeout and deadlock.
+RETRYABLE_ERROR_CODES = frozenset({1205, 1213})
+
+DB_RETRY_ATTEMPTS = env_int("DB_RETRY_ATTEMPTS", 3)
+DB_RETRY_BASE_DELAY = env_float("DB_RETRY_BASE_DELAY_MS", 50.0) / 1000
+DB_RETRY_MAX_DELAY = env_float("DB_RETRY_MAX_DELAY_MS", 1000.0) / 1000
+
+# Name of the service operation running on each thread, set by connection_scope.
+_operation = threading.local()
+# Replica serving the reads of the current thread (None: the primary), set
+# by the read scopes.
+_routing = threading.local()
+
+
+def current_operation() -> str:
+    """
+    Return the name of the service operation running on this thread.
+    """
+    return getattr(_operation, "name", None) or "unscoped"
+
+
+def _error_chain(exc):
+    """
+    Yield an error and the errors it was raised from, outermost first:
+    the services wrap the driver errors in their own.
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        yield exc
+        exc = exc.__cause__ or exc.__context__
+
+
+def _error_code(exc) -> int | None:
+    """
+    Return the MySQL error code of a driver error, if any.
+    """
+    return exc.args[0] if exc.args and isinstance(exc.args[0], int) else None
+
+
+def is_connection_error(exc: BaseException) -> bool:
+    """
+    Tell whether an error means the database could not be reached (as
+    opposed to a query the database answered with an error).
+
+    Args:
+        exc (BaseException): The error, possibly wrapping the driver error.
+
+    Returns:
+        bool: True for lost or refused connections and network timeouts.
+    """
+    for error in _error_chain(exc):
+        if isinstance(error, MaxConnectionsExceeded):
+            # The pool is exhausted: the database is busy, not down.
+            return False
+        if isinstance(error, (ConnectionError, TimeoutError)):
+            return True
+        if isinstance(error, OperationalError) and (
+            _error_code(error) in CONNECTION_ERROR_CODES
+            or "unable to open database file" in str(error)
+        ):
+            return True
+    return False
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """
+    Tell whether an operation failing with this error may succeed when run
+    again: lost connections, deadlocks and lock timeouts.
+
+    Args:
+        exc (BaseException): The error, possibly wrapping the driver error.
+
+    Returns:
+        bool: True when retrying makes sense.
+    """
+    if is_connection_error(exc):
+        return True
+    return any(
+        isinstance(error, OperationalError)
+        and (
+            _error_code(error) in RETRYABLE_ERROR_CODES
+            or "database is locked" in str(error)
+        )
+        for error in _error_chain(exc)
+    )
+
+
+class DatabaseUnavailableError(Exception):
+    """
+    Raised when an operation failed because the database could not be
+    reached, instead of the error of the service, so it is answered with
+    503 rather than a generic 500.
+
+    Attributes:
+        retry_after (int): Seconds the client should wait before retrying.
+        status_code (int): The HTTP status the error is answered with.
+    """
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _statement_type(sql: str) -> str:
+    """
+    Return the SQL verb of a statement, or "OTHER" for anything else.
+    """
+    verb = sql.lstrip()[:7].split(None, 1)[0].upper() if sql.strip() else ""
+    return verb if verb in STATEMENT_TYPES else "OTHER"
+
+
+class QueryMetricsMixin:
+    """
+    Records the count, latency and row count of every statement, labelled
+    with the service operation and the statement type.
+
+    Rows are the driver's row count: the rows returned by a SELECT on the
+    buffered MySQL cursors, the rows affected by a write.
+    """
+
+    def execute_sql(self, sql, params=None, commit=None):
+        """
+        Execute a statement and record its metrics.
+        """
+        labels = (current_operation(), _statement_type(sql))
+        started = time.perf_counter()
+        try:
+            cursor = super().execute_sql(sql, params, commit)
+        finally:
+            DB_LATENCY.observe(labels, time.perf_counter() - started)
+            DB_QUERIES.inc(labels)
+        if cursor.rowcount > 0:
+            DB_ROWS.inc(labels, cursor.rowcount)
+        return cursor
+
+
+class ReplicaRoutingMixin:
+    """
+    Sends the SELECT statements of a read scope to the replica chosen for
+    it, unless a transaction is open on the primary.
+    """
+
+    def execute_sql(self, sql, params=None, commit=None):
+        """
+        Execute a statement on the replica of the read scope or on this database.
+        """
+        replica = getattr(_routing, "replica", None)
+        if (
+            replica is not None
+            and replica is not self
+            and not self.in_transaction()
+            and _statement_type(sql) == "SELECT"
+        ):
+            return replica.execute_sql(sql, params)
+        return super().execute_sql(sql, params, commit)
+
+
+class InstrumentedMySQLDatabase(  # pylint: disable=too-many-ancestors
+    ReplicaRoutingMixin, FaultInjectionMixin, QueryMetricsMixin, MySQLDatabase
+):
+    """
+    MySQL database recording query metrics.
+    """
+
+
+class InstrumentedSqliteDatabase(  # pylint: disable=too-many-ancestors
+    ReplicaRoutingMixin, FaultInjectionMixin, QueryMetricsMixin, SqliteDatabase
+):
+    """
+    SQLite database recording query metrics, used as a local stand-in for
+    MySQL by the benchmarks.
+    """
+
+    def atomic(self, *args, **kwargs):
+        # Take the write lock when the transaction begins: a read-then-write
+        # transaction would otherwise fail with "database is locked" when it
+        # upgrades its lock while another writer is active.
+        kwargs.setdefault("lock_type", "IMMEDIATE")
+        return super().atomic(*args, **kwargs)
+
+
+class PooledDatabase(  # pylint: disable=too-many-ancestors
+    ReplicaRoutingMixin,
+    FaultInjectionMixin,
+    QueryMetricsMixin,
+    ReconnectMixin,
+    PooledMySQLDatabase,
+):
+    """
+    MySQL connection pool that records checkout statistics.
+
+    Connections older than the stale timeout are recycled, dead connections
+    are detected with a ping on checkout and replaced, and queries failing
+    with "server has gone away" are retried once on a fresh connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._checkout_state = threading.local()
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._checkout_seconds = 0.0
+        self._max_checkout_seconds = 0.0
+
+    def connect(self, reuse_if_open=False):
+        self._checkout_state.waited = False
+        started = time.perf_counter()
+        try:
+            opened = super().connect(reuse_if_open)
+        except MaxConnectionsExceeded:
+            with self._stats_lock:
+                self._timeouts += 1
+            raise
+        if opened:
+            elapsed = time.perf_counter() - started
+            with self._stats_lock:
+                self._checkouts += 1
+                self._waits += int(self._checkout_state.waited)
+                self._checkout_seconds += elapsed
+                self._max_checkout_seconds = max(self._max_checkout_seconds, elapsed)
+        return opened
+
+    def _connect(self):
+        try:
+            return super()._connect()
+        except MaxConnectionsExceeded:
+            self._checkout_state.waited = True
+            raise
+
+    def stats(self):
+        """
+        Return a snapshot of the pool usage.
+
+        Returns:
+            dict: Connections in use and idle, checkouts, checkouts that had
+            to wait for a free connection, checkouts that timed out and the
+            average and maximum checkout latency in milliseconds.
+        """
+        with self._stats_lock:
+            checkouts = self._checkouts
+            average = self._checkout_seconds / checkouts if checkouts else 0.0
+            return {
+                "pooled": True,
+                "max_connections": self._max_connections,
+                "in_use": len(self._in_use),
+                "idle": len(self._connections),
+                "checkouts": checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "avg_checkout_ms": round(average * 1000, 3),
+                "max_checkout_ms": round(self._max_checkout_seconds * 1000, 3),
+            }
+
+
+def _sqlite_database(path: str):
+    """
+    Build a local SQLite database.
+    """
+    return InstrumentedSqliteDatabase(
+        path,
+        pragmas={"foreign_keys": 1, "journal_mode": "wal", "synchronous": "normal"},
+        timeout=30,
+    )
+
+
+def _mysql_database(host: str, port: int):
+    """
+    Build a MySQL database on the given server, pooled when
+    MYSQL_POOL_ENABLED is set.
+    """
+    connect_kwargs = {
+        "user": os.getenv("MYSQL_USER"),
+        "password": os.getenv("MYSQL_PASSWORD"),
+        "host": host,
+        "port": port,
+    }
+    if not env_flag("MYSQL_POOL_ENABLED"):
+        return InstrumentedMySQLDatabase(os.getenv("MYSQL_DATABASE"), **connect_kwargs)
+    return PooledDatabase(
+        os.getenv("MYSQL_DATABASE"),
+        max_connections=env_int("MYSQL_POOL_MAX_CONNECTIONS", 20),
+        stale_timeout=env_int("MYSQL_POOL_STALE_TIMEOUT", 300),
+        timeout=env_int("MYSQL_POOL_TIMEOUT", 10),
+        **connect_kwargs,
+    )
+
+
+def _build_database():
+    """
+    Build the primary database from the environment. When SQLITE_DATABASE
+    is set, a local SQLite file is used instead of MySQL.
+    """
+    sqlite_path = os.getenv("SQLITE_DATABASE")
+    if sqlite_path:
+        return _sqlite_database(sqlite_path)
+    return _mysql_database(os.getenv("MYSQL_HOST"), int(os.getenv("MYSQL_PORT")))
+
+
+def _build_replicas():
+    """
+    Build the read replicas: SQLITE_REPLICAS lists SQLite files when
+    SQLITE_DATABASE is set, MYSQL_REPLICA_HOSTS lists ``host[:port]``
+    servers otherwise. Both are comma-separated and empty by default.
+    """
+    if os.getenv("SQLITE_DATABASE"):
+        paths = os.getenv("SQLITE_REPLICAS", "")
+        return [
+            _sqlite_database(path.strip()) for path in paths.split(",") if path.strip()
+        ]
+    replicas = []
+    for address in os.getenv("MYSQL_REPLICA_HOSTS", "").split(","):
+        if address.strip():
+            host, _, port = address.strip().partition(":")
+            replicas.append(_mysql_database(host, int(port or os.getenv("MYSQL_PORT"))))
+    return replicas
+
+
+class ReplicaSet:
+    """
+    Chooses the replica serving each read scope.
+
+    Attributes:
+        replicas (list): The replica databases.
+        selection (str): "round_robin", or "least_loaded" to pick the replica
+            with the fewest read scopes in progress.
+    """
+
+    def __init__(self, replicas: list, selection: str = "round_robin"):
+        if selection not in ("round_robin", "least_loaded"):
+            raise ValueError("REPLICA_SELECTION must be round_robin or least_loaded")
+        self.replicas = replicas
+        self.selection = selection
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self._in_flight = [0] * len(replicas)
+        self._reads = [0] * len(replicas)
+        self._primary_reads = 0
+
+    def acquire(self):
+        """
+        Return the index of the replica for a new read scope, or None when
+        the read must go to the primary (no replicas, or read-your-writes).
+        """
+        with self._lock:
+            if not self.replicas or primary_required():
+                self._primary_reads += 1
+                return None
+            if self.selection == "least_loaded":
+                index = min(range(len(self.replicas)), key=self._in_flight.__getitem__)
+            else:
+                index = next(self._turn) % len(self.replicas)
+            self._in_flight[index] += 1
+            self._reads[index] += 1
+            return index
+
+    def release(self, index: int):
+        """
+        Mark a read scope on the replica ``index`` as finished.
+        """
+        with self._lock:
+            self._in_flight[index] -= 1
+
+    def stats(self):
+        """
+        Return the read routing counters.
+
+        Returns:
+            dict: The selection policy, the reads sent to the primary and,
+            per replica, the reads routed to it and those in progress.
+        """
+        with self._lock:
+            return {
+                "selection": self.selection,
+                "primary_reads": self._primary_reads,
+                "replicas": [
+                    {
+                        "database": replica.database,
+                        "reads": reads,
+                        "in_flight": in_flight,
+                    }
+                    for replica, reads, in_flight in zip(
+                        self.replicas, self._reads, self._in_flight
+                    )
+                ],
+            }
+
+
 # Configuración de la base de datos
-database = MySQLDatabase(
-    os.getenv("MYSQL_DATABASE"),
-    user=os.getenv("MYSQL_USER"),
-    password=os.getenv("MYSQL_PASSWORD"),
-    host=os.getenv("MYSQL_HOST"),
-    port=int(os.getenv("MYSQL_PORT")),
+database = _build_database()
+replica_set = ReplicaSet(
+    _build_replicas(), os.getenv("REPLICA_SELECTION", "round_robin")
 )
 
 
+# Guards the primary database: after consecutive connection failures the
+# scopes fail at once with CircuitOpenError instead of each waiting for the
+# driver timeout.
+db_breaker = CircuitBreaker(
+    "The database",
+    failure_threshold=env_int("DB_BREAKER_FAILURE_THRESHOLD", 5),
+    reset_timeout=env_float("DB_BREAKER_RESET_SECONDS", 10.0),
+    half_open_probes=env_int("DB_BREAKER_HALF_OPEN_PROBES", 1),
+)
+
+
+def _retry_delay(attempt: int) -> float:
+    """
+    Return the jittered exponential backoff before retry number ``attempt``.
+    """
+    return min(
+        DB_RETRY_MAX_DELAY, DB_RETRY_BASE_DELAY * 2 ** (attempt - 1)
+    ) * random.uniform(0.5, 1.0)
+
+
+class ConnectionScope:  # pylint: disable=too-many-instance-attributes
+    """
+    Context manager and decorator behind ``connection_scope``.
+
+    Attributes:
+        operation (str | None): The name of the service operation the queries
+            are recorded under; None keeps the enclosing one.
+        read (bool): Whether the scope only reads and may use a replica.
+        idempotent (bool): Whether the decorated operation may be run again
+            after a transient error.
+    """
+
+    def __init__(
+        self,
+        operation: str | None = None,
+        read: bool = False,
+        idempotent: bool | None = None,
+    ):
+        self.operation = operation
+        self.read = read
+        self.idempotent = read if idempotent is None else idempotent
+        self._connection = None
+        self._opened = False
+        self._replica_index = None
+        self._previous = None
+        self._probe = None
+
+    def __call__(self, func):
+        operation = self.operation or func.__qualname__
+        read, idempotent = self.read, self.idempotent
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Only the outermost scope retries: it holds the whole operation.
+            if not idempotent or getattr(_routing, "depth", 0):
+                with ConnectionScope(operation, read, idempotent):
+                    return func(*args, **kwargs)
+            for attempt in itertools.count(1):
+                try:
+                    with ConnectionScope(operation, read, idempotent):
+                        return func(*args, **kwargs)
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    if attempt >= DB_RETRY_ATTEMPTS or not is_transient_error(exc):
+                        raise
+                time.sleep(_retry_delay(attempt))
+            return None
+
+        return wrapper
+
+    def _target(self):
+        """
+        Return the database the scope uses: the enclosing scope's when it is
+        nested, a replica for an outermost read scope when one is available,
+        the primary otherwise.
+        """
+        current = getattr(_routing, "replica", None)
+        if not self.read:
+            return None
+        if getattr(_routing, "depth", 0):
+            return current
+        self._replica_index = replica_set.acquire()
+        if self._replica_index is None:
+            return None
+        return replica_set.replicas[self._replica_index]
+
+    def _record(self, exc):
+        """
+        Report the outcome of an outermost primary scope to the breaker.
+        Errors the database answered with prove it reachable.
+        """
+        if self._probe is None:
+            return
+        if exc is not None and is_connection_error(exc):
+            db_breaker.record_failure(self._probe)
+        elif exc is not None and isinstance(exc, CircuitOpenError):
+            db_breaker.release(self._probe)
+        else:
+            db_breaker.record_success(self._probe)
+
+    def __enter__(self):
+        self._previous = (
+            getattr(_operation, "name", None),
+            getattr(_routing, "replica", None),
+            getattr(_routing, "depth", 0),
+        )
+        replica = self._target()
+        self._probe = None
+        if not self._previous[2] and replica is None:
+            try:
+                self._probe = db_breaker.before_call()
+            except CircuitOpenError:
+                if self._replica_index is not None:
+                    replica_set.release(self._replica_index)
+                raise
+        self._connection = replica or database
+        try:
+            self._opened = self._connection.connect(reuse_if_open=True)
+        except Exception as exc:
+            if self._replica_index is not None:
+                replica_set.release(self._replica_index)
+            self._record(exc)
+            raise
+        _routing.replica = replica
+        _routing.depth = self._previous[2] + 1
+        if self.operation:
+            _operation.name = self.operation
+        return database
+
+    def __exit__(self, exc_type, exc, traceback):
+        _operation.name, _routing.replica, _routing.depth = self._previous
+        if self._replica_index is not None:
+            replica_set.release(self._replica_index)
+        connection = self._connection
+        if (
+            self._opened
+            and isinstance(connection, PooledDatabase)
+            and not connection.is_closed()
+        ):
+            connection.close()
+        elif exc is not None and not self._previous[2] and is_connection_error(exc):
+            # A lost connection kept open for the thread would be reused by
+            # the next scope (a retry): drop it so the next one reconnects.
+            try:
+                connection.close()
+            except OperationalError:
+                pass
+        self._record(exc)
+        if exc is not None and not self._previous[2] and is_connection_error(exc):
+            raise DatabaseUnavailableError("The database is unreachable") from exc
+
+
+def connection_scope(
+    operation: str | None = None, read: bool = False, idempotent: bool | None = None
+) -> ConnectionScope:
+    """
+    Check out a connection for the current thread and give it back when the
+    block ends. It can also be used as a decorator on service methods, in
+    which case the queries are recorded under the method name.
+
+    Read scopes (``read=True``) send their SELECT statements to a read
+    replica when replicas are configured, except for clients inside their
+    read-your-writes window. Nested scopes use the database of the
+    outermost one and reuse its connection. Without a pool the connection
+    is kept open for the thread, as before.
+
+    Outermost scopes on the primary go through the database circuit
+    breaker: while it is open they fail at once with ``CircuitOpenError``.
+    An outermost scope failing to reach the database raises
+    ``DatabaseUnavailableError``.
+    Decorated idempotent operations (reads by default) are run again, up to
+    DB_RETRY_ATTEMPTS times with a jittered backoff, after a transient
+    error (lost connection, deadlock, lock timeout). Writes are not retried
+    unless marked ``idempotent=True``: a commit may have succeeded before
+    the connection was lost.
+    """
+    return ConnectionScope(operation, read, idempotent)
+
+
+def pool_stats():
+    """
+    Return the connection pool statistics, or a marker when pooling is off.
+    """
+    if isinstance(database, PooledDatabase):
+        return database.stats()
+    return {"pooled": False}
+
+
+def open_database():
+    """
+    Verify the database is reachable when the application starts.
+    """
+    with connection_scope("open_database"):
+        pass
+
+
+def ping_database() -> float:
+    """
+    Run a trivial query on the primary, through the circuit breaker.
+
+    Returns:
+        float: The round trip, in seconds.
+    """
+    started = time.perf_counter()
+    with connection_scope("ping_database"):
+        database.execute_sql("SELECT 1")
+    return time.perf_counter() - started
+
+
+def breaker_stats():
+    """
+    Return the state and counters of the database circuit breaker.
+    """
+    return db_breaker.stats()
+
+
+def close_database():
+    """
+    Close every connection held by this process when the application stops.
+    """
+    for connection in [database, *replica_set.replicas]:
+        if isinstance(connection, PooledDatabase):
+            connection.close_all()
+        elif not connection.is_closed():
+            connection.close()
+
+
+# Connections inherited from a parent process, kept referenced so they are
+# never garbage-collected (which would close the parent's sessions).
+_inherited_connections = []
+
+
+def _discard_inherited_connections():
+    """
+    Give a forked child process a clean connection state.
+
+    The connections and pool of the parent are left untouched for it: the
+    child starts without any and opens its own on first use. Locks are
+    recreated in case another thread of the parent held them at fork time.
+    """
+    # pylint: disable=protected-access
+    for connection in [database, *replica_set.replicas]:
+        _inherited_connections.append(connection._state.conn)
+        connection._state.reset()
+        connection._lock = threading.Lock()
+        if isinstance(connection, PooledDatabase):
+            _inherited_connections.extend(connection._connections)
+            _inherited_connections.extend(connection._in_use.values())
+            connection._connections = []
+            connection._in_use = {}
+            connection._pool_lock = threading.RLock()
+            connection._stats_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_discard_inherited_connections)
+
+
+def replica_stats():
+    """
+    Return the read routing statistics.
+    """
+    return replica_set.stats()
+
+
 class OrderModel(Model):
     """
     Represents an order in the database.
@@ -55,6 +734,8 @@ class OrderModel(Model):
 
         database = database
         table_name = "orders"
+        # Serves per-user lookups and per-user date ranges.
+        indexes = ((("user_id", "date"), False),)
 
 
 class ProductOrderModel(Model):
@@ -70,7 +751,7 @@ class ProductOrderModel(Model):
 
     id = AutoField(primary_key=True)
     order_id = ForeignKeyField(OrderModel, backref="products", on_delete="CASCADE")
-    product_id = IntegerField()
+    product_id = IntegerField(index=True)
     quantity = IntegerField()
 
     class Meta:
@@ -82,4 +763,196 @@ class ProductOrderModel(Model):
         table_name = "order_products"
 
 
+class OrderSummaryModel(Model):
+    """
+    Per-user, per-day totals of the orders, kept up to date by the order
+    service in the same transaction as every order write.
+
+    Attributes:
+        user_id (int): The identifier of the user.
+        date (DateField): The day the orders were placed.
+        order_count (int): The number of orders of the user on that day.
+        total_sum (float): The sum of the totals of those orders.
+    """
+
+    user_id = IntegerField()
+    date = DateField()
+    order_count = IntegerField(default=0)
+    total_sum = FloatField(default=0)
+
+    class Meta:
+        """
+        Meta class for specifying the table and database configuration.
+        """
+
+        database = database
+        table_name = "order_daily_summary"
+        primary_key = CompositeKey("user_id", "date")
+        # Serves per-day reports across every user.
+        indexes = ((("date",), False),)
+
+
+class ArchivedOrderModel(Model):
+    """
+    Represents an order moved out of the hot ``orders`` table by the
+    archival job. Archived orders keep their ID and are read-only.
+
+    Attributes:
+        id (int): The identifier the order had in the orders table.
+        user_id (int): The identifier of the user who placed the order.
+        date (DateField): The date the order was placed.
+        total (float): The total amount of the order.
+    """
+
+    id = IntegerField(primary_key=True)
+    user_id = IntegerField()
+    date = DateField()
+    total = FloatField()
+
+    class Meta:
+        """
+        Meta class for specifying the table and database configuration.
+        """
+
+        database = database
+        table_name = "orders_archive"
+        indexes = ((("user_id", "date"), False),)
+
+
+class ArchivedProductOrderModel(Model):
+    """
+    Represents an order-product association archived with its order.
+
+    Attributes:
+        id (int): The identifier the association had in the order_products table.
+        order_id (ForeignKeyField): A foreign key to the archived order.
+        product_id (int): The identifier of the product in the order.
+        quantity (int): The quantity of the product in the order.
+    """
+
+    id = IntegerField(primary_key=True)
+    order_id = ForeignKeyField(
+        ArchivedOrderModel, backref="products", on_delete="CASCADE"
+    )
+    product_id = IntegerField(index=True)
+    quantity = IntegerField()
+
+    class Meta:
+        """
+        Meta class for specifying the table and database configuration.
+        """
+
+        database = database
+        table_name = "order_products_archive"
+
+
+class OrderChangeModel(Model):
+    """
+    Outbox of the order and order-product changes, written in the same
+    transaction as each change and read by the change feed.
+
+    Attributes:
+        id (int): The position of the change in the feed (the event ID).
+        entity (str): "order" or "order_product".
+        entity_id (int): The ID of the changed row.
+        action (str): "created", "updated" or "deleted".
+        data (str | None): The JSON of the row after the change; None for
+            deletions.
+        created_at (datetime): When the change was recorded.
+    """
+
+    id = BigAutoField(primary_key=True)
+    entity = CharField(max_length=20)
+    entity_id = IntegerField()
+    action = CharField(max_length=10)
+    data = TextField(null=True)
+    created_at = DateTimeField(default=datetime.now, index=True)
+
+    class Meta:
+        """
+        Meta class for specifying the table and database configuration.
+        """
+
+        database = database
+        table_name = "order_changes"
+
+
+class ImportModel(Model):
+    """
+    Progress of a bulk import, committed together with each imported chunk
+    so an interrupted import resumes right after its last committed chunk.
+
+    Attributes:
+        id (str): The import ID chosen by the client or generated.
+        entity (str): "order" or "order_product".
+        rows_processed (int): Data rows of the file handled so far.
+        rows_inserted (int): Rows written to the database.
+        rows_failed (int): Rows rejected by the validation.
+        created_at (datetime): When the import started.
+        updated_at (datetime): When the last chunk was committed.
+    """
+
+    id = CharField(max_length=64, primary_key=True)
+    entity = CharField(max_length=20)
+    rows_processed = IntegerField(default=0)
+    rows_inserted = IntegerField(default=0)
+    rows_failed = IntegerField(default=0)
+    created_at = DateTimeField(default=datetime.now)
+    updated_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        """
+        Meta class for specifying the table and database configuration.
+        """
+
+        database = database
+        table_name = "imports"
+
+
+class JobModel(Model):
+    """
+    A long-running operation submitted to the background job runner.
+
+    Attributes:
+        id (str): The job ID.
+        job_type (str): The operation, e.g. "export_orders".
+        status (str): "queued", "running", "succeeded", "failed" or "cancelled".
+        params (str): The JSON of the validated parameters.
+        progress (str | None): The JSON of the last progress report.
+        result (str | None): The JSON of the result, once succeeded.
+        error (str | None): Why the job failed.
+        cancel_requested (bool): Whether a cancellation was requested.
+        attempts (int): How many times the job was started.
+        owner (str | None): The runner executing the job.
+        created_at (datetime): When the job was submitted.
+        started_at (datetime | None): When the last attempt started.
+        heartbeat_at (datetime | None): When its runner last reported it alive.
+        finished_at (datetime | None): When the job ended.
+    """
+
+    id = CharField(max_length=32, primary_key=True)
+    job_type = CharField(max_length=30)
+    status = CharField(max_length=10)
+    params = TextField()
+    progress = TextField(null=True)
+    result = TextField(null=True)
+    error = TextField(null=True)
+    cancel_requested = BooleanField(default=False)
+    attempts = IntegerField(default=0)
+    owner = CharField(max_length=32, null=True)
+    created_at = DateTimeField(default=datetime.now)
+    started_at = DateTimeField(null=True)
+    heartbeat_at = DateTimeField(null=True)
+    finished_at = DateTimeField(null=True)
+
+    class Meta:
+        """
+        Meta class for specifying the table and database configuration.
+        """
+
+        database = database
+        table_name = "jobs"
+        indexes = ((("status", "created_at"), False),)
+
+
 # Add a newline at the end of the file (below this comment)
@@ -0,0 +1,160 @@
+"""
+This module defines the versioned schema migrations and the runner that
+applies them.
+
+Run it from the application directory with ``python -m config.migrations``.
+"""
+
+# pylint: disable=E0401,too-few-public-methods
+
+from datetime import datetime
+
+from peewee import CharField, DateTimeField, IntegerField, Model
+from playhouse.migrate import SchemaMigrator, migrate
+
+from config.database import (
+    ArchivedOrderModel,
+    ArchivedProductOrderModel,
+    ImportModel,
+    JobModel,
+    OrderChangeModel,
+    OrderModel,
+    OrderSummaryModel,
+    ProductOrderModel,
+    connection_scope,
+    database,
+)
+
+
+class SchemaMigrationModel(Model):
+    """
+    Records the schema migrations already applied to the database.
+
+    Attributes:
+        version (int): The version number of the migration.
+        name (str): The name of the migration.
+        applied_at (datetime): When the migration was applied.
+    """
+
+    version = IntegerField(primary_key=True)
+    name = CharField(max_length=100)
+    applied_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        """
+        Meta class for specifying the table and database configuration.
+        """
+
+        database = database
+        table_name = "schema_migrations"
+
+
+def _add_index_if_missing(migrator, table: str, columns: tuple, unique: bool = False):
+    """
+    Create an index unless one on the same columns already exists.
+    """
+    existing = {tuple(index.columns) for index in database.get_indexes(table)}
+    if tuple(columns) not in existing:
+        migrate(migrator.add_index(table, columns, unique))
+
+
+def _initial_schema(migrator):
+    """
+    Create the orders and order_products tables on an empty database.
+    """
+    del migrator
+    models = [OrderModel, ProductOrderModel]
+    database.create_tables([model for model in models if not model.table_exists()])
+
+
+def _order_search_indexes(migrator):
+    """
+    Index the columns used by the order and order-product search filters.
+    """
+    _add_index_if_missing(migrator, "orders", ("user_id", "date"))
+    _add_index_if_missing(migrator, "order_products", ("product_id",))
+
+
+def _order_summary(migrator):
+    """
+    Create the per-user, per-day order summary and backfill it.
+    """
+    del migrator
+    # Imported here: the service layer depends on this package, not the
+    # other way around.
+    from services.summary_service import (  # pylint: disable=import-outside-toplevel
+        SummaryService,
+    )
+
+    database.create_tables([OrderSummaryModel])
+    SummaryService.rebuild()
+
+
+def _order_archive(migrator):
+    """
+    Create the archive tables receiving the orders moved out of the hot tables.
+    """
+    del migrator
+    database.create_tables([ArchivedOrderModel, ArchivedProductOrderModel])
+
+
+def _order_changes(migrator):
+    """
+    Create the outbox table feeding the order change feed.
+    """
+    del migrator
+    database.create_tables([OrderChangeModel])
+
+
+def _imports(migrator):
+    """
+    Create the table tracking the progress of the bulk imports.
+    """
+    del migrator
+    database.create_tables([ImportModel])
+
+
+def _jobs(migrator):
+    """
+    Create the table of the background jobs.
+    """
+    del migrator
+    database.create_tables([JobModel])
+
+
+# Append new migrations at the end; never renumber or edit applied ones.
+MIGRATIONS = [
+    (1, "initial_schema", _initial_schema),
+    (2, "order_search_indexes", _order_search_indexes),
+    (3, "order_summary", _order_summary),
+    (4, "order_archive", _order_archive),
+    (5, "order_changes", _order_changes),
+    (6, "imports", _imports),
+    (7, "jobs", _jobs),
+]
+
+
+def run_migrations():
+    """
+    Apply every migration that has not been applied yet, in version order.
+
+    :return: The versions applied by this run
+    """
+    applied_now = []
+    with connection_scope("run_migrations"):
+        database.create_tables([SchemaMigrationModel])
+        applied = {row.version for row in SchemaMigrationModel.select()}
+        migrator = SchemaMigrator.from_database(database)
+        for version, name, migration in MIGRATIONS:
+            if version in applied:
+                continue
+            with database.atomic():
+                migration(migrator)
+                SchemaMigrationModel.create(version=version, name=name)
+            applied_now.append(version)
+    return applied_now
+
+
+if __name__ == "__main__":
+    versions = run_migrations()
+    print(f"Applied migrations: {versions or 'none'}")
@@ -0,0 +1,60 @@
+"""
+This module provides helpers to read typed settings from the environment.
+"""
+
+import os  # type: ignore
+from dotenv import load_dotenv  # type: ignore
+
+# Cargar variables de entorno
+load_dotenv()
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """
+    Read a boolean flag from the environment.
+
+    Args:
+        name (str): The name of the environment variable.
+        default (bool): The value used when the variable is not set.
+
+    Returns:
+        bool: True for "1", "true", "yes" or "on" (case-insensitive).
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_int(name: str, default: int) -> int:
+    """
+    Read an integer setting from the environment.
+
+    Args:
+        name (str): The name of the environment variable.
+        default (int): The value used when the variable is not set.
+
+    Returns:
+        int: The configured value.
+    """
+    value = os.getenv(name)
+    return default if value is None else int(value)
+
+
+def env_float(name: str, default: float) -> float:
+    """
+    Read a float setting from the environment.
+
+    Args:
+        name (str): The name of the environment variable.
+        default (float): The value used when the variable is not set.
+
+    Returns:
+        float: The configured value.
+    """
+    value = os.getenv(name)
+    return default if value is None else float(value)
+
+
+# Seconds a stopping worker waits for the requests and database work in flight.
+GRACEFUL_SHUTDOWN_SECONDS = env_float("GRACEFUL_SHUTDOWN_SECONDS", 20.0)
@@ -0,0 +1,181 @@
+"""
+This module provides a circuit breaker: after repeated failures of a
+dependency, calls fail at once for a while instead of each waiting for the
+failure again, then a few probes decide whether the dependency is back.
+"""
+
+# pylint: disable=too-many-instance-attributes
+
+import math
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a dependency whose circuit is open.
+
+    Attributes:
+        retry_after (int): Seconds the client should wait before retrying.
+        status_code (int): The HTTP status the error is answered with.
+    """
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker.
+
+    Closed, calls go through and ``failure_threshold`` consecutive failures
+    open the circuit. Open, calls fail with ``CircuitOpenError`` until
+    ``reset_timeout`` seconds have passed; the circuit is then half open and
+    lets ``half_open_probes`` calls through at a time. A probe succeeding
+    closes the circuit, a probe failing opens it again.
+
+    Attributes:
+        name (str): The protected dependency, used in error messages.
+        failure_threshold (int): Consecutive failures opening the circuit.
+        reset_timeout (float): Seconds the circuit stays open.
+        half_open_probes (int): Calls allowed at once while half open.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        half_open_probes: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._opened = 0
+        self._rejected = 0
+
+    def _retry_after(self) -> int:
+        """
+        Return the whole seconds left before the circuit half opens.
+        """
+        remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+        return max(1, math.ceil(remaining))
+
+    def before_call(self) -> bool:
+        """
+        Admit a call.
+
+        Returns:
+            bool: Whether the call is a half-open probe, to be passed back
+            to ``record_success`` or ``record_failure``.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half open with
+                every probe slot taken.
+        """
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self._rejected += 1
+                    raise CircuitOpenError(
+                        f"{self.name} is unavailable", self._retry_after()
+                    )
+                self._state = HALF_OPEN
+                self._probes = 0
+            if self._state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    self._rejected += 1
+                    raise CircuitOpenError(f"{self.name} is recovering", 1)
+                self._probes += 1
+                return True
+            return False
+
+    def record_success(self, probe: bool = False):
+        """
+        Record a call that reached the dependency: the circuit closes.
+        """
+        with self._lock:
+            if probe:
+                self._probes -= 1
+            self._failures = 0
+            self._state = CLOSED
+
+    def record_failure(self, probe: bool = False):
+        """
+        Record a call that failed to reach the dependency.
+        """
+        with self._lock:
+            if probe:
+                self._probes -= 1
+            self._failures += 1
+            if probe or (
+                self._state == CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._opened += 1
+
+    def release(self, probe: bool = False):
+        """
+        Record a call that ended without telling whether the dependency
+        works, so its probe slot is freed without changing the state.
+        """
+        if probe:
+            with self._lock:
+                self._probes -= 1
+
+    def reset(self):
+        """
+        Close the circuit and clear its counters.
+        """
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probes = 0
+            self._opened = 0
+            self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        """
+        The current state: "closed", "open" or "half_open".
+        """
+        with self._lock:
+            if (
+                self._state == OPEN
+                and time.monotonic() - self._opened_at >= self.reset_timeout
+            ):
+                return HALF_OPEN
+            return self._state
+
+    def stats(self):
+        """
+        Return the circuit breaker state and counters.
+
+        Returns:
+            dict: The state, the consecutive failures, how many times the
+            circuit opened and the calls rejected without being attempted.
+        """
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_seconds": self.reset_timeout,
+                "times_opened": self._opened,
+                "rejected": self._rejected,
+            }
@@ -0,0 +1,116 @@
+"""
+This module provides read-your-writes consistency for replica reads: a
+client that has just written is pinned to the primary for a short window,
+so it never reads a replica that has not caught up with its own write.
+"""
+
+# pylint: disable=E0401,too-few-public-methods
+
+import threading
+import time
+from contextvars import ContextVar
+
+from config.settings import env_float
+
+READ_YOUR_WRITES_SECONDS = env_float("READ_YOUR_WRITES_SECONDS", 5.0)
+CONSISTENCY_HEADER = b"x-consistency-key"
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+# Client of the request being handled, set by ReadYourWritesMiddleware.
+_client_key: ContextVar = ContextVar("client_key", default=None)
+
+
+class WriteTracker:
+    """
+    Remembers, per client, until when its reads must go to the primary.
+
+    Attributes:
+        window (float): Seconds a client stays pinned after a write.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._lock = threading.Lock()
+        self._pinned_until = {}
+
+    def record_write(self, key: str):
+        """
+        Pin ``key`` to the primary for the next ``window`` seconds.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._pinned_until[key] = now + self.window
+            # Forget expired clients once in a while so the map stays small.
+            if len(self._pinned_until) > 10000:
+                self._pinned_until = {
+                    client: until
+                    for client, until in self._pinned_until.items()
+                    if until > now
+                }
+
+    def is_pinned(self, key: str) -> bool:
+        """
+        Return whether ``key`` wrote within the last ``window`` seconds.
+        """
+        with self._lock:
+            return self._pinned_until.get(key, 0.0) > time.monotonic()
+
+
+write_tracker = WriteTracker(READ_YOUR_WRITES_SECONDS)
+
+
+def primary_required() -> bool:
+    """
+    Return whether the reads of the current request must go to the primary
+    because its client wrote within the read-your-writes window.
+    """
+    key = _client_key.get()
+    return key is not None and write_tracker.is_pinned(key)
+
+
+def _client_of(scope) -> str | None:
+    """
+    Return the client key of a request: its X-Consistency-Key header, if
+    any. The API key is shared by every client, so it cannot stand in for
+    it: one write would pin the reads of all the clients.
+    """
+    value = dict(scope.get("headers") or []).get(CONSISTENCY_HEADER)
+    return value.decode("latin-1") if value else None
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware identifying the client of every request and recording
+    its successful writes.
+
+    Clients opt in by sending an ``X-Consistency-Key`` header (a session or
+    user ID): a write only pins the requests carrying the same key. The
+    requests without one always read from the replicas.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        key = _client_of(scope)
+        token = _client_key.set(key)
+        is_write = key is not None and scope["method"] in WRITE_METHODS
+
+        async def send_wrapper(message):
+            # Pinned before the response reaches the client, so its next
+            # request already reads from the primary.
+            if (
+                is_write
+                and message["type"] == "http.response.start"
+                and message["status"] < 400
+            ):
+                write_tracker.record_write(key)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _client_key.reset(token)
@@ -0,0 +1,85 @@
+"""
+This module provides helpers for ETag / If-None-Match conditional responses.
+"""
+
+import hashlib
+
+from fastapi import Request, Response
+
+
+def compute_etag(*parts) -> str:
+    """
+    Build a strong ETag from the given values.
+
+    Args:
+        *parts: Values identifying the content of the representation.
+
+    Returns:
+        str: The quoted ETag.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def models_etag(*models, extra=None) -> str:
+    """
+    Build a strong ETag from the field values of Pydantic models, without
+    serializing them to JSON.
+
+    Args:
+        *models: The models included in the representation.
+        extra: Any other value that is part of the representation.
+
+    Returns:
+        str: The quoted ETag.
+    """
+    return compute_etag(extra, [tuple(model.__dict__.values()) for model in models])
+
+
+def rows_etag(*rows, extra=None) -> str:
+    """
+    Build a strong ETag from the values of plain row dicts.
+
+    Args:
+        *rows: The rows included in the representation (None for a
+            missing one).
+        extra: Any other value that is part of the representation.
+
+    Returns:
+        str: The quoted ETag.
+    """
+    return compute_etag(extra, [tuple(row.values()) if row else None for row in rows])
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Check whether the request's If-None-Match header matches the ETag.
+
+    Args:
+        request (Request): The incoming request.
+        etag (str): The ETag of the current representation.
+
+    Returns:
+        bool: True when the client already has this representation.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    # If-None-Match uses the weak comparison function.
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag for candidate in candidates
+    )
+
+
+def not_modified_response(etag: str) -> Response:
+    """
+    Build the empty ``304 Not Modified`` response for the given ETag.
+
+    Args:
+        etag (str): The ETag of the current representation.
+
+    Returns:
+        Response: The 304 response.
+    """
+    return Response(status_code=304, headers={"ETag": etag})
@@ -0,0 +1,101 @@
+"""
+This module provides a fault injector making the database statements fail on
+purpose, so an outage can be rehearsed without stopping a real server.
+"""
+
+# pylint: disable=E0401,too-few-public-methods
+
+import os  # type: ignore
+import threading
+import time
+
+from peewee import OperationalError
+
+from config.settings import env_float
+
+
+class FaultInjector:
+    """
+    Makes the database statements fail on purpose, to rehearse an outage
+    locally (the circuit breaker, the retries, the readiness endpoint)
+    without stopping a real server. Off unless ``inject`` is called or
+    DB_FAULT_INJECTION is set to one of the fault kinds.
+    """
+
+    # Driver error code and message of each kind of fault.
+    FAULTS = {
+        "connection": (
+            2013,
+            "Lost connection to MySQL server during query (simulated)",
+        ),
+        "deadlock": (1213, "Deadlock found when trying to get lock (simulated)"),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Read without the lock by ``check``, so statements pay nothing
+        # while no fault is injected.
+        self._active = False
+        self._kind = None
+        self._remaining = None
+        self._delay = 0.0
+
+    def inject(self, kind: str | None, count: int | None = None, delay: float = 0.0):
+        """
+        Fail the next ``count`` statements (all of them when None) with a
+        fault of ``kind``, after waiting ``delay`` seconds each, as a slow
+        server would. ``kind=None`` only adds the delay.
+        """
+        if kind is not None and kind not in self.FAULTS:
+            raise ValueError(f"Unknown fault kind: {kind}")
+        with self._lock:
+            self._kind, self._remaining, self._delay = kind, count, delay
+            self._active = kind is not None or bool(delay)
+
+    def clear(self):
+        """
+        Stop injecting faults.
+        """
+        self.inject(None)
+
+    def check(self):
+        """
+        Apply the injected fault, if any, to the statement about to run.
+        """
+        if not self._active:
+            return
+        with self._lock:
+            kind, delay = self._kind, self._delay
+            if kind is not None and self._remaining is not None:
+                if self._remaining <= 0:
+                    kind = None
+                else:
+                    self._remaining -= 1
+                    if not self._remaining and not delay:
+                        self._active = False
+        if delay:
+            time.sleep(delay)
+        if kind is not None:
+            code, message = self.FAULTS[kind]
+            raise OperationalError(code, message)
+
+
+fault_injector = FaultInjector()
+if os.getenv("DB_FAULT_INJECTION"):
+    fault_injector.inject(
+        os.getenv("DB_FAULT_INJECTION"),
+        delay=env_float("DB_FAULT_DELAY_MS", 0.0) / 1000,
+    )
+
+
+class FaultInjectionMixin:
+    """
+    Runs the statements through the fault injector.
+    """
+
+    def execute_sql(self, sql, params=None, commit=None):
+        """
+        Execute a statement, unless a fault is injected.
+        """
+        fault_injector.check()
+        return super().execute_sql(sql, params, commit)
@@ -0,0 +1,171 @@
+"""
+This module provides helpers for sparse fieldsets: the ``fields`` query
+parameter restricting a representation to some of its attributes.
+"""
+
+# pylint: disable=E0401
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from helpers.etag import is_not_modified, not_modified_response, rows_etag
+from helpers.responses import rows_response
+
+
+def parse_fields(fields: str | None, schema: type[BaseModel]) -> list[str] | None:
+    """
+    Parse a comma-separated list of field names.
+
+    Args:
+        fields (str | None): The ``fields`` query parameter, e.g. ``"id,total"``.
+        schema (type[BaseModel]): The model whose fields may be requested.
+
+    Returns:
+        list[str] | None: The requested fields in the order of the model, so
+        every request for the same set gets the same representation; None
+        when no fieldset was requested.
+
+    Raises:
+        ValueError: If the list is empty or names an unknown field.
+    """
+    if fields is None:
+        return None
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    if not names:
+        raise ValueError("fields must name at least one field")
+    unknown = sorted(names.difference(schema.model_fields))
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown)}. "
+            f"Available fields: {', '.join(schema.model_fields)}"
+        )
+    return [name for name in schema.model_fields if name in names]
+
+
+def project_rows(rows: list[dict], fields: list[str]) -> list[dict]:
+    """
+    Keep only the requested keys of rows read with a narrowed projection.
+
+    Args:
+        rows (list[dict]): The rows, which may carry extra keys (the ``id``
+            read for the pagination).
+        fields (list[str]): The requested fields.
+
+    Returns:
+        list[dict]: The rows restricted to ``fields``.
+    """
+    if all(len(row) == len(fields) for row in rows):
+        return rows
+    return [{name: row[name] for name in fields} for row in rows]
+
+
+def select_columns(model, fields: list[str] | None) -> list:
+    """
+    Return the columns to read for a sparse fieldset.
+
+    Args:
+        model: The peewee model read.
+        fields (list[str] | None): The requested fields, or None for all.
+
+    Returns:
+        list: The columns of ``fields`` plus ``id``, which keys the rows; an
+        empty list (every column) when no fieldset was requested.
+    """
+    if fields is None:
+        return []
+    return [model.id, *(getattr(model, name) for name in fields if name != "id")]
+
+
+def project_model(model: BaseModel | None, fields: list[str]) -> dict | None:
+    """
+    Restrict an already loaded model (from a cache) to the requested fields.
+
+    Args:
+        model (BaseModel | None): The model, or None for a missing entity.
+        fields (list[str]): The requested fields.
+
+    Returns:
+        dict | None: The requested attributes, or None when ``model`` is None.
+    """
+    if model is None:
+        return None
+    return {name: getattr(model, name) for name in fields}
+
+
+def fieldset_response(
+    request: Request, content: dict, rows: list, fields: list[str], extra=None
+) -> Response:
+    """
+    Build the conditional JSON response of a representation narrowed to a
+    sparse fieldset.
+
+    Args:
+        request (Request): The incoming request.
+        content (dict): The response body.
+        rows (list): The projected rows of the body, for the ETag.
+        fields (list[str]): The requested fields.
+        extra: Any other value that is part of the representation.
+
+    Returns:
+        Response: The JSON response, or ``304 Not Modified`` when the client
+        already has it.
+    """
+    etag = rows_etag(*rows, extra=(fields, extra))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    return rows_response(content, etag)
+
+
+def fieldset_page_response(
+    request: Request, key: str, rows: list, next_cursor: str | None, fields: list[str]
+) -> Response:
+    """
+    Build the conditional JSON response of a page narrowed to a sparse
+    fieldset.
+
+    Args:
+        request (Request): The incoming request.
+        key (str): The name of the list in the body, e.g. ``"orders"``.
+        rows (list): The projected rows of the page.
+        next_cursor (str | None): The cursor of the following page.
+        fields (list[str]): The requested fields.
+
+    Returns:
+        Response: The JSON response, or ``304 Not Modified`` when the client
+        already has it.
+    """
+    return fieldset_response(
+        request,
+        {key: rows, "next_cursor": next_cursor},
+        rows,
+        fields,
+        extra=next_cursor,
+    )
+
+
+def fieldset_batch_response(
+    request: Request, key: str, ids: list[int], rows: list, fields: list[str]
+) -> Response:
+    """
+    Build the conditional JSON response of entities requested by ID and
+    narrowed to a sparse fieldset.
+
+    Args:
+        request (Request): The incoming request.
+        key (str): The name of the list in the body, e.g. ``"orders"``.
+        ids (list[int]): The requested IDs, in request order.
+        rows (list): The projected row of each ID, None when it does not exist.
+        fields (list[str]): The requested fields.
+
+    Returns:
+        Response: The JSON response listing the rows and the missing IDs, or
+        ``304 Not Modified`` when the client already has it.
+    """
+    not_found = [entity_id for entity_id, row in zip(ids, rows) if row is None]
+    return fieldset_response(
+        request,
+        {key: rows, "not_found": not_found},
+        rows,
+        fields,
+        extra=(ids, not_found),
+    )
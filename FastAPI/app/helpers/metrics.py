@@ -0,0 +1,230 @@
+"""
+This module provides a small in-process metrics registry rendered in the
+Prometheus text exposition format, so metrics can be scraped without any
+external collector or client library.
+"""
+
+import threading
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    """
+    Escape a label value as required by the exposition format.
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=None) -> str:
+    """
+    Render a label set such as ``{method="GET",route="/orders"}``.
+    """
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Metric:
+    """
+    Base class of the metrics: a named family of samples keyed by label values.
+
+    Attributes:
+        name (str): The metric name.
+        documentation (str): The help text.
+        labelnames (tuple[str]): The names of the labels.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def samples(self):
+        """
+        Return the ``(suffix, labels, value)`` samples of the family.
+        """
+        with self._lock:
+            items = list(self._values.items())
+        return [("", self._format(labels), value) for labels, value in items]
+
+    def _format(self, labels, extra=None) -> str:
+        return _format_labels(self.labelnames, labels, extra)
+
+    def render(self) -> str:
+        """
+        Render the family in the text exposition format.
+        """
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(
+            f"{self.name}{suffix}{labels} {float(value)!r}"
+            for suffix, labels, value in self.samples()
+        )
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """
+    A monotonically increasing value.
+    """
+
+    kind = "counter"
+
+    def inc(self, labels=(), amount: float = 1):
+        """
+        Add ``amount`` to the sample with the given label values.
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    A value that can go up and down.
+    """
+
+    kind = "gauge"
+
+    def inc(self, labels=(), amount: float = 1):
+        """
+        Add ``amount`` to the sample with the given label values.
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels=(), amount: float = 1):
+        """
+        Subtract ``amount`` from the sample with the given label values.
+        """
+        self.inc(labels, -amount)
+
+
+class Histogram(Metric):
+    """
+    Counts observations in cumulative buckets, with their sum and count.
+
+    Attributes:
+        buckets (tuple[float]): The upper bounds of the buckets, ascending.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels=(), value: float = 0.0):
+        """
+        Record one observation for the given label values.
+        """
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket counts (the last one is +Inf), then the sum.
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            else:
+                state[len(self.buckets)] += 1
+            state[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(state)) for labels, state in self._values.items()]
+        samples = []
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                samples.append(
+                    ("_bucket", self._format(labels, ("le", le)), cumulative)
+                )
+            samples.append(("_sum", self._format(labels), state[-1]))
+            samples.append(("_count", self._format(labels), cumulative))
+        return samples
+
+
+class Registry:
+    """
+    Holds the metric families exposed by the process.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Add a metric family to the registry and return it.
+        """
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Render every registered family in the text exposition format.
+        """
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(
+    Counter(
+        "http_requests_total",
+        "HTTP requests handled, by route template and status code.",
+        ("method", "route", "status"),
+    )
+)
+HTTP_LATENCY = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time spent handling HTTP requests, by route template.",
+        ("method", "route"),
+    )
+)
+HTTP_IN_PROGRESS = REGISTRY.register(
+    Gauge(
+        "http_requests_in_progress",
+        "HTTP requests being handled, by route template.",
+        ("method", "route"),
+    )
+)
+DB_QUERIES = REGISTRY.register(
+    Counter(
+        "db_queries_total",
+        "Database statements executed, by service operation and statement type.",
+        ("operation", "statement"),
+    )
+)
+DB_LATENCY = REGISTRY.register(
+    Histogram(
+        "db_query_duration_seconds",
+        "Time spent executing database statements, by service operation and "
+        "statement type.",
+        ("operation", "statement"),
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+    )
+)
+DB_ROWS = REGISTRY.register(
+    Counter(
+        "db_query_rows_total",
+        "Rows returned or affected by database statements, as reported by the "
+        "driver, by service operation and statement type.",
+        ("operation", "statement"),
+    )
+)
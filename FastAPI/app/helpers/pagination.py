@@ -0,0 +1,116 @@
+"""
+This module provides helpers for keyset (cursor) pagination.
+
+Cursors are opaque to clients: they encode the last ``id`` returned in a page
+so the next page can be read with ``WHERE id > ? ORDER BY id LIMIT ?``.
+"""
+
+import base64
+import binascii
+import heapq
+from operator import itemgetter
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+_CURSOR_PREFIX = "id:"
+
+
+def clamp_limit(limit: int) -> int:
+    """
+    Validate a requested page size and cap it to the hard maximum.
+
+    Args:
+        limit (int): The page size requested by the client.
+
+    Returns:
+        int: The page size to use in the query.
+
+    Raises:
+        ValueError: If the limit is lower than one.
+    """
+    if limit < 1:
+        raise ValueError("Limit must be greater than zero")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Build the opaque cursor pointing right after the given id.
+
+    Args:
+        last_id (int): The id of the last row of the current page.
+
+    Returns:
+        str: The cursor to send back to the client.
+    """
+    raw = f"{_CURSOR_PREFIX}{last_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> int:
+    """
+    Decode a cursor received from the client.
+
+    Args:
+        cursor (str | None): The cursor, or None for the first page.
+
+    Returns:
+        int: The id after which the next page starts (0 for the first page).
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    if not cursor:
+        return 0
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+    except (binascii.Error, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not raw.startswith(_CURSOR_PREFIX):
+        raise ValueError("Invalid cursor")
+    try:
+        last_id = int(raw[len(_CURSOR_PREFIX) :])
+    except ValueError as exc:
+        raise ValueError("Invalid cursor") from exc
+    if last_id < 0:
+        raise ValueError("Invalid cursor")
+    return last_id
+
+
+def keyset_rows(
+    sources: list, after_id: int, limit: int, columns: list[str] | None = None
+) -> list:
+    """
+    Read the rows following ``after_id`` from one or several tables and
+    merge them by ``id``.
+
+    One extra row is read from each table so the caller can tell whether
+    another page exists.
+
+    Args:
+        sources (list): ``(model, conditions)`` pairs, one per table.
+        after_id (int): The id after which the page starts.
+        limit (int): The page size.
+        columns (list[str] | None): Only read these columns, plus ``id``
+            (None: every column).
+
+    Returns:
+        list: Up to ``limit + 1`` row dicts per table, sorted by ``id``.
+    """
+    if columns is not None and "id" not in columns:
+        columns = ["id", *columns]
+    pages = [
+        list(
+            model.select(*[getattr(model, column) for column in columns or ()])
+            .where(model.id > after_id, *conditions)
+            .order_by(model.id)
+            .limit(limit + 1)
+            .dicts()
+        )
+        for model, conditions in sources
+    ]
+    return (
+        pages[0] if len(pages) == 1 else list(heapq.merge(*pages, key=itemgetter("id")))
+    )
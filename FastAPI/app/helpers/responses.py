@@ -0,0 +1,67 @@
+"""
+This module provides single-pass JSON responses for Pydantic models and
+plain rows, and a streaming response for endpoints still reading their
+request body.
+"""
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+
+def json_response(model: BaseModel, etag: str | None = None) -> Response:
+    """
+    Serialize a model straight to JSON bytes.
+
+    FastAPI would otherwise validate the returned value against the response
+    model and encode it again; models built from trusted database rows are
+    dumped once by pydantic-core instead.
+
+    Args:
+        model (BaseModel): The response body.
+        etag (str | None): The ETag header to send, if any.
+
+    Returns:
+        Response: The JSON response.
+    """
+    headers = {"ETag": etag} if etag else None
+    return Response(
+        content=model.model_dump_json(), media_type="application/json", headers=headers
+    )
+
+
+def rows_response(content: dict, etag: str | None = None) -> Response:
+    """
+    Serialize plain rows (dicts, lists and scalars) straight to JSON bytes,
+    for representations narrowed to a sparse fieldset.
+
+    Args:
+        content (dict): The response body.
+        etag (str | None): The ETag header to send, if any.
+
+    Returns:
+        Response: The JSON response.
+    """
+    headers = {"ETag": etag} if etag else None
+    return Response(
+        content=to_json(content), media_type="application/json", headers=headers
+    )
+
+
+class UploadStreamingResponse(StreamingResponse):
+    """
+    Streaming response whose content is produced while the request body is
+    still being read.
+
+    ``StreamingResponse`` reads the incoming messages to detect a client
+    disconnect, which steals the body chunks from ``request.stream()``. This
+    response leaves them to the content instead: a disconnect surfaces there
+    as ``ClientDisconnect`` while the body is read, and as a failed send
+    afterwards.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
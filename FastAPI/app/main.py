@@ -1,64 +1,174 @@
 """
 Main application module for FastAPI.
 Includes routes for orders and order products.
+
+``create_app`` is the single factory of the application; ``app`` is the
+instance built from it when the module is imported, once per process.
 """
 
 # pylint: disable=E0401,W0613
 
 # Standard imports
+import asyncio
 from contextlib import asynccontextmanager
 
 # Third-party imports
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from starlette.responses import RedirectResponse
 
 # Local imports
 from routes.order_router import order_route
 from routes.product_order_route import order_product_route
-from config.database import database as connection
+from routes.stats_route import stats_route
+from routes.job_route import job_route
+from config.database import (
+    DatabaseUnavailableError,
+    breaker_stats,
+    close_database,
+    open_database,
+    ping_database,
+)
+from config.settings import GRACEFUL_SHUTDOWN_SECONDS, env_float
+from helpers.circuit_breaker import CircuitOpenError
 from helpers.api_key_auth import get_api_key
+from helpers.consistency import ReadYourWritesMiddleware
+from helpers.metrics import REGISTRY
+from services.executor import UNAVAILABLE_ERRORS, DatabaseBusyError, db_executor
+from services.job_service import job_runner
+
+READINESS_TIMEOUT = env_float("READINESS_TIMEOUT_MS", 1000) / 1000
 
-app = FastAPI(
-    title="Pylint microservice implementation",
-    version="2.0",
-    contact={
-        "name": "Juan Felipe Giraldo",
-    },
-)
 
 @asynccontextmanager
 async def lifespan(lifespan_app: FastAPI):
     """
-    Handles the lifespan of the application, ensuring
-    the database connection is open during the app's lifecycle.
+    Handles the lifespan of the application in each worker process,
+    ensuring the database is reachable at startup and starting the
+    background job runner. At shutdown, the running jobs are stopped and
+    queued again, and the database work still running finishes, before
+    every connection (or the whole pool) of the process is released.
     """
-    if connection.is_closed():
-        connection.connect()
+    open_database()
+    job_runner.start()
     try:
         yield
     finally:
-        if not connection.is_closed():
-            connection.close()
+        await asyncio.gather(
+            asyncio.to_thread(job_runner.stop, GRACEFUL_SHUTDOWN_SECONDS),
+            db_executor.drain(GRACEFUL_SHUTDOWN_SECONDS),
+        )
+        close_database()
+
+
+async def database_busy(
+    request: Request,
+    exc: DatabaseBusyError | CircuitOpenError | DatabaseUnavailableError,
+):
+    """
+    Sheds the request with 503 when the database executor is saturated, the
+    database circuit breaker is open or the database cannot be reached.
+    """
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
-# Create the FastAPI app instance with custom lifespan management
-app = FastAPI(lifespan=lifespan)
 
-@app.get("/")
 async def docs():
     """
     Redirects to the API documentation.
     """
     return RedirectResponse(url="/docs")
 
-# Include routers for orders and order products
-app.include_router(
-    order_route, prefix="/order", tags=["Orders"], dependencies=[Depends(get_api_key)]
-)
-app.include_router(
-    order_product_route,
-    prefix="/product_order_route",
-    tags=["Order Products"],
-    dependencies=[Depends(get_api_key)],
-)
 
-# Ensure a final newline to comply with PEP 8
+async def metrics():
+    """
+    Exposes the HTTP and database metrics in the Prometheus text format.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+async def readiness():
+    """
+    Reports whether this worker can serve requests: 200 when the database
+    answers a trivial query in time, 503 otherwise, with the circuit breaker
+    state. While the circuit is open the database is not queried.
+    """
+    database = {"ok": False}
+    try:
+        latency = await asyncio.wait_for(
+            db_executor.run(ping_database), READINESS_TIMEOUT
+        )
+        database = {"ok": True, "latency_ms": round(latency * 1000, 3)}
+    except CircuitOpenError:
+        database["error"] = "circuit open"
+    except DatabaseUnavailableError:
+        database["error"] = "unreachable"
+    except (DatabaseBusyError, asyncio.TimeoutError):
+        database["error"] = "timeout"
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        database["error"] = str(exc)
+    return JSONResponse(
+        status_code=200 if database["ok"] else 503,
+        content={
+            "status": "ready" if database["ok"] else "unavailable",
+            "database": database,
+            "breaker": breaker_stats(),
+        },
+    )
+
+
+def create_app() -> FastAPI:
+    """
+    Build the FastAPI application with its middleware, routes and lifespan.
+
+    Returns:
+        FastAPI: The application.
+    """
+    application = FastAPI(
+        title="Pylint microservice implementation",
+        version="2.0",
+        contact={
+            "name": "Juan Felipe Giraldo",
+        },
+        lifespan=lifespan,
+    )
+    application.add_middleware(ReadYourWritesMiddleware)
+    for error in UNAVAILABLE_ERRORS:
+        application.add_exception_handler(error, database_busy)
+    application.add_api_route("/", docs, methods=["GET"])
+    application.add_api_route(
+        "/metrics", metrics, methods=["GET"], include_in_schema=False
+    )
+    application.add_api_route(
+        "/health/ready", readiness, methods=["GET"], include_in_schema=False
+    )
+
+    # Include routers for orders and order products
+    application.include_router(
+        order_route,
+        prefix="/order",
+        tags=["Orders"],
+        dependencies=[Depends(get_api_key)],
+    )
+    application.include_router(
+        order_product_route,
+        prefix="/product_order_route",
+        tags=["Order Products"],
+        dependencies=[Depends(get_api_key)],
+    )
+    application.include_router(
+        stats_route,
+        prefix="/stats",
+        tags=["Stats"],
+        dependencies=[Depends(get_api_key)],
+    )
+    application.include_router(
+        job_route, prefix="/jobs", tags=["Jobs"], dependencies=[Depends(get_api_key)]
+    )
+    return application
+
+
+app = create_app()
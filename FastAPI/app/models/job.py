@@ -0,0 +1,125 @@
+"""
+This module defines the background jobs and the parameters of each job type.
+"""
+
+# pylint: disable=E0401,too-few-public-methods
+
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from models.order import OrderFilters, OrderPurge
+
+
+class ExportJobParams(OrderFilters):
+    """
+    Represents the parameters of an export written to a file.
+
+    Attributes:
+        entity (str): "order" or "order_product" (the lines of the
+            matching orders).
+        format (str): "ndjson" or "csv".
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    entity: Literal["order", "order_product"] = "order"
+    format: Literal["ndjson", "csv"] = "ndjson"
+
+
+class PurgeJobParams(OrderPurge):
+    """
+    Represents the parameters of a bulk delete of orders.
+
+    Attributes:
+        chunk_size (int | None): Orders per transaction, the configured
+            default when omitted.
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    chunk_size: int | None = Field(None, ge=1)
+
+
+class ArchiveJobParams(BaseModel):
+    """
+    Represents the parameters of an archival of old orders.
+
+    Attributes:
+        older_than_days (int | None): Age, in days, from which orders are
+            archived, the configured default when omitted.
+        batch_size (int | None): Orders moved per transaction, the
+            configured default when omitted.
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    older_than_days: int | None = Field(None, ge=0)
+    batch_size: int | None = Field(None, ge=1)
+
+
+class RebuildSummaryJobParams(BaseModel):
+    """
+    Represents the parameters of a rebuild of the order summary (none).
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class JobCreate(BaseModel):
+    """
+    Represents the payload used to submit a job.
+
+    Attributes:
+        type (str): The operation to run.
+        params (dict): The parameters of the operation, validated against
+            the parameters model of its type.
+    """
+
+    type: Literal["export_orders", "purge_orders", "archive_orders", "rebuild_summary"]
+    params: dict = Field(default_factory=dict)
+
+
+class Job(BaseModel):
+    """
+    Represents a background job and its progress.
+
+    Attributes:
+        id (str): The job ID.
+        type (str): The operation.
+        status (str): "queued", "running", "succeeded", "failed" or "cancelled".
+        params (dict): The validated parameters.
+        progress (dict | None): The last progress report of the operation.
+        result (dict | None): The result, once succeeded.
+        error (str | None): Why the job failed.
+        cancel_requested (bool): Whether a cancellation was requested.
+        attempts (int): How many times the job was started.
+        created_at (datetime): When the job was submitted.
+        started_at (datetime | None): When the last attempt started.
+        finished_at (datetime | None): When the job ended.
+    """
+
+    id: str
+    type: str
+    status: str
+    params: dict
+    progress: dict | None = None
+    result: dict | None = None
+    error: str | None = None
+    cancel_requested: bool = False
+    attempts: int = 0
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class JobPage(BaseModel):
+    """
+    Represents a list of jobs, newest first.
+
+    Attributes:
+        jobs (list[Job]): The jobs.
+    """
+
+    jobs: list[Job]
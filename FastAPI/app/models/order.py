@@ -2,23 +2,157 @@
 This module defines the Order class which represents an order in the system.
 """
 
-from pydantic import BaseModel
+# pylint: disable=E0401
+
+from datetime import date as date_type
+
+from pydantic import BaseModel, Field, SerializeAsAny
+
+from models.product_order import OrderLine, ProductOrder
 
 
 class Order(BaseModel):
     """
-    Represents an order.
+    Represents an order as read from the database.
+
+    Attributes:
+        id (int): The unique identifier of the order.
+        user_id (int): The identifier of the user associated with the order.
+        date (date): The date when the order was placed.
+        total (float): The total amount of the order.
+    """
+
+    id: int
+    user_id: int
+    date: date_type
+    total: float
+
+
+class OrderCreate(BaseModel):
+    """
+    Represents the payload used to create an order.
+
+    Attributes:
+        user_id (int): The identifier of the user placing the order.
+        date (date): The date of the order, today when omitted.
+        total (float): The total amount of the order, never negative.
+    """
+
+    user_id: int
+    date: date_type = Field(default_factory=date_type.today)
+    total: float = Field(ge=0)
+
+
+class OrderWithProductsCreate(OrderCreate):
+    """
+    Represents the payload used to create an order together with its lines.
+
+    Attributes:
+        products (list[OrderLine]): The product lines of the order.
+    """
+
+    products: list[OrderLine] = Field(default_factory=list)
+
+
+class OrderWithProducts(Order):
+    """
+    Represents an order together with its order-product relationships.
+
+    Attributes:
+        products (list[ProductOrder]): The product lines of the order.
+    """
+
+    products: list[ProductOrder]
+
+
+class OrderFilters(BaseModel):
+    """
+    Represents the optional query filters of the order list and export.
+
+    Attributes:
+        user_id (int | None): Only orders placed by this user.
+        date_from (date | None): Only orders placed on or after this date.
+        date_to (date | None): Only orders placed on or before this date.
+        min_total (float | None): Only orders whose total is at least this amount.
+        max_total (float | None): Only orders whose total is at most this amount.
+    """
+
+    user_id: int | None = None
+    date_from: date_type | None = None
+    date_to: date_type | None = None
+    min_total: float | None = None
+    max_total: float | None = None
+
+
+class OrderPurge(OrderFilters):
+    """
+    Represents the orders selected for a bulk delete: an explicit ID list,
+    the list filters, or both.
+
+    Attributes:
+        ids (list[int] | None): Only orders with these IDs.
+    """
+
+    ids: list[int] | None = None
+
+
+class OrderPage(BaseModel):
+    """
+    Represents a page of orders.
+
+    Attributes:
+        orders (list[Order]): The orders of the page, with their product
+            lines when they were requested.
+        next_cursor (str | None): The cursor of the next page, if any.
+    """
+
+    orders: list[SerializeAsAny[Order]]
+    next_cursor: str | None = None
+
+
+class OrderBatch(BaseModel):
+    """
+    Represents orders fetched by a list of IDs.
+
+    Attributes:
+        orders (list[Order | None]): The orders in request order, None when
+            the ID does not exist.
+        not_found (list[int]): The requested IDs that do not exist.
+    """
+
+    orders: list[SerializeAsAny[Order] | None]
+    not_found: list[int]
+
+
+class OrderSummary(BaseModel):
+    """
+    Represents the aggregate of the orders of one group.
+
+    Attributes:
+        user_id (int | None): The user of the group, when grouped by user.
+        date (date | None): The day of the group, when grouped by day.
+        count (int): The number of orders in the group.
+        total (float): The sum of the totals of those orders.
+        average (float): The average total of those orders.
+    """
+
+    user_id: int | None = None
+    date: date_type | None = None
+    count: int
+    total: float
+    average: float
+
+
+class OrderSummaryReport(BaseModel):
+    """
+    Represents the order aggregates for one grouping.
 
     Attributes:
-        id (str): The unique identifier of the order.
-        user_id (str): The identifier of the user associated with the order.
-        date (str): The date when the order was placed.
-        total (flstroat): The total amount of the order.
+        group_by (str): The grouping: "user", "day" or "user_day".
+        groups (list[OrderSummary]): The aggregates, ordered by group key.
     """
 
-    id: str
-    user_id: str
-    date: str
-    total: str
+    group_by: str
+    groups: list[OrderSummary]
 
     # Add a newline at the end of the file (below this comment)
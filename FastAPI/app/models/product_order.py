@@ -1,8 +1,9 @@
 """
-This module defines the Order class which represents an order in the system.
+This module defines the ProductOrder class which represents the products of
+an order in the system.
 """
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ProductOrder(BaseModel):
@@ -10,15 +11,83 @@ class ProductOrder(BaseModel):
     Represents an order-product relationship.
 
     Attributes:
-        id (str): The unique identifier of the order-product relationship.
-        order_id (str): The identifier of the associated order.
-        product_id (str): The identifier of the associated product.
-        quantity (str): The quantity of the product in the order.
+        id (int): The unique identifier of the order-product relationship.
+        order_id (int): The identifier of the associated order.
+        product_id (int): The identifier of the associated product.
+        quantity (int): The quantity of the product in the order.
     """
 
-    id: str
-    order_id: str
-    product_id: str
-    quantity: str
+    id: int
+    order_id: int
+    product_id: int
+    quantity: int
+
+
+class ProductOrderCreate(BaseModel):
+    """
+    Represents the payload used to create or update an order-product relationship.
+
+    Attributes:
+        order_id (int): The identifier of the associated order.
+        product_id (int): The identifier of the associated product.
+        quantity (int): The quantity of the product, greater than zero.
+    """
+
+    order_id: int
+    product_id: int
+    quantity: int = Field(gt=0)
+
+
+class OrderLine(BaseModel):
+    """
+    Represents a product line sent together with a new order.
+
+    Attributes:
+        product_id (int): The identifier of the product.
+        quantity (int): The quantity of the product, greater than zero.
+    """
+
+    product_id: int
+    quantity: int = Field(gt=0)
+
+
+class ProductOrderFilters(BaseModel):
+    """
+    Represents the optional query filters of the order-product list.
+
+    Attributes:
+        order_id (int | None): Only the lines of this order.
+        product_id (int | None): Only the lines of this product.
+    """
+
+    order_id: int | None = None
+    product_id: int | None = None
+
+
+class ProductOrderPage(BaseModel):
+    """
+    Represents a page of order-product relationships.
+
+    Attributes:
+        order_products (list[ProductOrder]): The relationships of the page.
+        next_cursor (str | None): The cursor of the next page, if any.
+    """
+
+    order_products: list[ProductOrder]
+    next_cursor: str | None = None
+
+
+class ProductOrderBatch(BaseModel):
+    """
+    Represents order-product relationships fetched by a list of IDs.
+
+    Attributes:
+        order_products (list[ProductOrder | None]): The relationships in
+            request order, None when the ID does not exist.
+        not_found (list[int]): The requested IDs that do not exist.
+    """
+
+    order_products: list[ProductOrder | None]
+    not_found: list[int]
 
     # Add a newline at the end of the file (below this comment)
@@ -0,0 +1,120 @@
+"""
+This module defines the routes for submitting and following background jobs.
+"""
+
+# pylint: disable=E0401
+
+from typing import Literal
+
+from fastapi import APIRouter, Body, HTTPException, Query
+from fastapi.responses import FileResponse
+from models.job import Job, JobCreate, JobPage
+from helpers.responses import json_response
+from helpers.route_metrics import MetricsRoute
+from services.executor import UNAVAILABLE_ERRORS, in_db_executor
+from services.job_service import JOB_LIST_LIMIT, JOB_TYPES, JobService
+
+job_route = APIRouter(route_class=MetricsRoute)
+
+
+@job_route.post("", response_model=Job, status_code=202)
+@in_db_executor
+def submit_job(job: JobCreate = Body(...)):
+    """
+    Queues a long operation and returns at once with the job, whose ``id``
+    is then polled with ``GET /jobs/{job_id}``. The types are
+    ``export_orders`` (to a file, downloaded from ``/jobs/{job_id}/file``),
+    ``purge_orders``, ``archive_orders`` and ``rebuild_summary``; ``params``
+    are those of the matching synchronous endpoint or command.
+    """
+    try:
+        return JobService.submit_job(job.type, job.params)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@job_route.get("", response_model=JobPage)
+@in_db_executor
+def list_jobs(
+    status: (
+        Literal["queued", "running", "succeeded", "failed", "cancelled"] | None
+    ) = None,
+    job_type: str | None = Query(None, alias="type"),
+    limit: int = Query(JOB_LIST_LIMIT, ge=1, le=JOB_LIST_LIMIT),
+):
+    """
+    Lists the most recent jobs, optionally by status and type.
+    """
+    if job_type is not None and job_type not in JOB_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported job type")
+    try:
+        jobs = JobService.list_jobs(status=status, job_type=job_type, limit=limit)
+        return json_response(JobPage.model_construct(jobs=jobs))
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@job_route.get("/{job_id}", response_model=Job)
+@in_db_executor
+def get_job(job_id: str):
+    """
+    Retrieves a job with its status, its last progress report and, once
+    succeeded, its result.
+    """
+    try:
+        job = JobService.get_job(job_id)
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return json_response(job)
+
+
+@job_route.post("/{job_id}/cancel", response_model=Job)
+@in_db_executor
+def cancel_job(job_id: str):
+    """
+    Cancels a job. A queued job is cancelled at once; a running one stops
+    after its current step, keeping the work already done.
+    """
+    try:
+        job = JobService.cancel_job(job_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return json_response(job)
+
+
+@job_route.get("/{job_id}/file")
+@in_db_executor
+def download_job_file(job_id: str):
+    """
+    Downloads the file written by a succeeded export job.
+    """
+    try:
+        job = JobService.get_job(job_id)
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    try:
+        path, media_type = JobService.export_file(job)
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    filename = f"{job.params['entity']}s-{job.id}.{job.params['format']}"
+    return FileResponse(path, media_type=media_type, filename=filename)
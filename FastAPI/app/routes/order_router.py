@@ -4,40 +4,243 @@ This module defines the routes for handling orders in the API.
 
 # pylint: disable=E0401
 
-from fastapi import APIRouter, Body, HTTPException
-from models.order import Order
+import json
+from datetime import date
+from typing import Literal
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from models.order import (
+    Order,
+    OrderBatch,
+    OrderCreate,
+    OrderFilters,
+    OrderPage,
+    OrderPurge,
+    OrderSummaryReport,
+    OrderWithProductsCreate,
+)
+from helpers.etag import is_not_modified, models_etag, not_modified_response
+from helpers.fieldsets import (
+    fieldset_batch_response,
+    fieldset_page_response,
+    fieldset_response,
+    parse_fields,
+    project_model,
+)
+from helpers.responses import UploadStreamingResponse, json_response
+from helpers.route_metrics import MetricsRoute
+from helpers.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from services.order_service import OrderService  # type: ignore
+from services.export_service import EXPORT_FORMATS, ExportService
+from services.loader import BatchLoader, get_order_loader, parse_id_list
+from services.change_feed import change_feed
+from services.executor import UNAVAILABLE_ERRORS, db_executor, in_db_executor
+from services.import_service import Importer, stream_import
+from services.outbox import ORDER
+from services.purge_service import PURGE_CHUNK_SIZE, PurgeService
+from services.summary_service import SummaryService
 
-order_route = APIRouter()
+order_route = APIRouter(route_class=MetricsRoute)
 # pylint: disable=no-value-for-parameter
 
 
-@order_route.get("/orders")
-def get_all_orders():
+@order_route.get("/orders", response_model=OrderPage | OrderBatch)
+@in_db_executor
+def get_all_orders(  # pylint: disable=too-many-arguments
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    filters: OrderFilters = Depends(),
+    include: Literal["products"] | None = None,
+    include_archived: bool = False,
+    ids: str | None = None,
+    fields: str | None = None,
+    loader: BatchLoader = Depends(get_order_loader),
+):
     """
-    Retrieves all orders from the database.
+    Retrieves a page of orders, optionally filtered by user, date range and
+    total range. Pass the returned ``next_cursor`` back as ``cursor`` to read
+    the following page. With ``include=products`` the lines of the whole page
+    are loaded with one extra query and nested in each order. With
+    ``include_archived=true`` the archived orders are listed too, merged by
+    ID. Answers ``If-None-Match`` with ``304 Not Modified`` when the page
+    did not change.
+
+    With ``ids=3,1,2`` the given orders are returned instead, in request
+    order, with ``null`` and a ``not_found`` entry for the missing ones.
+
+    With ``fields=id,total`` each order only has the listed fields, and only
+    those columns are read from the database.
     """
     try:
-        orders = OrderService.get_all_orders()
-        return {"orders": orders}
+        selected = parse_fields(fields, Order)
+        if selected is not None and include is not None:
+            raise ValueError("fields cannot be combined with include")
+        if ids is not None:
+            return _get_orders_by_ids(
+                request, parse_id_list(ids), loader, include, selected
+            )
+        orders, next_cursor = OrderService.get_all_orders(
+            limit=limit,
+            cursor=cursor,
+            include_archived=include_archived,
+            fields=selected,
+            **filters.model_dump(),
+        )
+        if selected is not None:
+            return fieldset_page_response(
+                request, "orders", orders, next_cursor, selected
+            )
+        if include == "products":
+            orders = OrderService.with_products(orders)
+        etag = models_etag(*orders, extra=next_cursor)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        page = OrderPage.model_construct(orders=orders, next_cursor=next_cursor)
+        return json_response(page, etag)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@order_route.get("/orders/{order_id}")
-def get_order_by_id(order_id: int):
+def _get_orders_by_ids(
+    request: Request,
+    order_ids: list[int],
+    loader: BatchLoader,
+    include: str | None,
+    fields: list[str] | None = None,
+):
+    """
+    Resolves the requested orders with one batched query, keeping the
+    request order and marking the IDs that do not exist.
+    """
+    if fields is not None:
+        rows = loader.bind(fields=fields).load_many(order_ids)
+        return fieldset_batch_response(request, "orders", order_ids, rows, fields)
+    found = [order for order in loader.load_many(order_ids) if order]
+    if include == "products":
+        found = OrderService.with_products(found)
+    by_id = {order.id: order for order in found}
+    not_found = [order_id for order_id in order_ids if order_id not in by_id]
+    etag = models_etag(*found, extra=(order_ids, not_found))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    batch = OrderBatch.model_construct(
+        orders=[by_id.get(order_id) for order_id in order_ids], not_found=not_found
+    )
+    return json_response(batch, etag)
+
+
+@order_route.get("/orders/export")
+def export_orders(
+    filters: OrderFilters = Depends(),
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+):
     """
-    Retrieves an order by ID.
+    Streams every order matching the filters as NDJSON or CSV.
     """
+    try:
+        chunks = ExportService.export_orders(export_format, **filters.model_dump())
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return StreamingResponse(
+        db_executor.iterate(chunks),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="orders.{export_format}"'
+        },
+    )
+
+
+@order_route.get("/changes")
+async def stream_changes(
+    last_event_id: int | None = Query(None, ge=0),
+    last_event_id_header: int | None = Header(None, alias="Last-Event-ID", ge=0),
+):
+    """
+    Streams the order and order-product changes as Server-Sent Events,
+    instead of polling the lists. Each event carries its change ID;
+    reconnect with it in ``Last-Event-ID`` (or ``last_event_id``) to
+    receive the changes missed meanwhile.
+    """
+    if last_event_id_header is not None:
+        last_event_id = last_event_id_header
+    return StreamingResponse(
+        change_feed.events(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@order_route.get("/orders/summary", response_model=OrderSummaryReport)
+@in_db_executor
+def get_order_summary(
+    group_by: Literal["user", "day", "user_day"] = "user",
+    user_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    """
+    Retrieves the order count, sum and average of the totals per user, per
+    day or per user and day, optionally restricted to one user and a date
+    range. Served from the summary table, without scanning the orders.
+    """
+    try:
+        groups = SummaryService.get_summary(
+            group_by, user_id=user_id, date_from=date_from, date_to=date_to
+        )
+        return json_response(
+            OrderSummaryReport.model_construct(group_by=group_by, groups=groups)
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@order_route.get("/orders/{order_id}", response_model=Order)
+@in_db_executor
+def get_order_by_id(
+    order_id: int,
+    request: Request,
+    include: Literal["products"] | None = None,
+    fields: str | None = None,
+):
+    """
+    Retrieves an order by ID, with its product lines nested when
+    ``include=products`` is given, or restricted to the listed fields with
+    ``fields=id,total``. Answers ``If-None-Match`` with
+    ``304 Not Modified`` when the order did not change.
+    """
+    try:
+        selected = parse_fields(fields, Order)
+        if selected is not None and include is not None:
+            raise ValueError("fields cannot be combined with include")
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     try:
         order = OrderService.get_order_by_id(order_id)
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
-        return order
+        if selected is not None:
+            projected = project_model(order, selected)
+            return fieldset_response(request, projected, [projected], selected)
+        if include == "products":
+            order = OrderService.with_products([order])[0]
+        etag = models_etag(order)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        return json_response(order, etag)
     except ValueError as exc:
-        raise HTTPException(
-            status_code=400, detail="Invalid order ID"
-        ) from exc
+        raise HTTPException(status_code=400, detail="Invalid order ID") from exc
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
     except Exception as exc:
         raise HTTPException(
             status_code=500, detail="An error occurred while retrieving the order"
@@ -45,7 +248,8 @@ def get_order_by_id(order_id: int):
 
 
 @order_route.post("/orders")
-def create_order(order: Order = Body(...)):
+@in_db_executor
+def create_order(order: OrderCreate = Body(...)):
     """
     Creates a new order.
     """
@@ -56,14 +260,118 @@ def create_order(order: Order = Body(...)):
         return {"message": "Order created", "order": order_instance}
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500, detail="An error occurred while creating the order"
+        ) from exc
+
+
+@order_route.post("/orders/with_products")
+@in_db_executor
+def create_order_with_products(order: OrderWithProductsCreate = Body(...)):
+    """
+    Creates an order together with its product lines in one transaction.
+    """
+    try:
+        order_instance = OrderService.create_order_with_products(
+            user_id=order.user_id,
+            date=order.date,
+            total=order.total,
+            products=order.products,
+        )
+        return {"message": "Order created", "order": order_instance}
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
     except Exception as exc:
         raise HTTPException(
             status_code=500, detail="An error occurred while creating the order"
         ) from exc
 
 
+@order_route.post("/orders/bulk")
+@in_db_executor
+def create_orders_bulk(items: list[dict] = Body(...), all_or_nothing: bool = False):
+    """
+    Creates many orders in one transaction. Invalid items are reported by
+    index; the valid ones are still created unless ``all_or_nothing`` is set.
+    """
+    try:
+        ids, errors = OrderService.create_orders_bulk(
+            items, all_or_nothing=all_or_nothing
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500, detail="An error occurred while creating the orders"
+        ) from exc
+    if errors and all_or_nothing:
+        raise HTTPException(status_code=422, detail={"errors": errors})
+    created = sum(1 for new_id in ids if new_id is not None)
+    return {
+        "message": "Orders created",
+        "created": created,
+        "ids": ids,
+        "errors": errors,
+    }
+
+
+@order_route.post("/orders/purge")
+def purge_orders(
+    selection: OrderPurge = Body(...),
+    after_id: int = 0,
+    chunk_size: int = PURGE_CHUNK_SIZE,
+):
+    """
+    Deletes every order selected by an ID list and/or the list filters,
+    with their lines, in chunks of short transactions. Streams one NDJSON
+    progress line per chunk; an interrupted purge resumes from the last
+    ``last_id`` passed as ``after_id``.
+    """
+    try:
+        progress = PurgeService.purge_orders(
+            after_id=after_id, chunk_size=chunk_size, **selection.model_dump()
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return StreamingResponse(
+        db_executor.iterate(json.dumps(report) + "\n" for report in progress),
+        media_type="application/x-ndjson",
+    )
+
+
+@order_route.post("/orders/import")
+async def import_orders(
+    request: Request,
+    import_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    import_id: str | None = Query(None, max_length=64),
+):
+    """
+    Imports the orders of a CSV (with a header row) or NDJSON file sent as
+    the raw request body, while it is received. Valid rows are inserted in
+    chunks of one transaction each; one NDJSON progress line is streamed
+    per chunk, with the errors of its rejected rows, then the totals. Send
+    the file again with the returned ``import_id`` to resume an interrupted
+    import after its last committed chunk.
+    """
+    try:
+        importer = await db_executor.run(Importer.open, ORDER, import_format, import_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return UploadStreamingResponse(
+        stream_import(importer, request.stream()), media_type="application/x-ndjson"
+    )
+
+
 @order_route.put("/orders/{order_id}")
-def update_order(order_id: int, order: Order = Body(...)):
+@in_db_executor
+def update_order(order_id: int, order: OrderCreate = Body(...)):
     """
     Updates an order.
     """
@@ -76,6 +384,8 @@ def update_order(order_id: int, order: Order = Body(...)):
         return {"message": "Order updated", "order": updated_order}
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
     except Exception as exc:
         raise HTTPException(
             status_code=500, detail="An error occurred while updating the order"
@@ -83,6 +393,7 @@ def update_order(order_id: int, order: Order = Body(...)):
 
 
 @order_route.delete("/orders/{order_id}")
+@in_db_executor
 def delete_order(order_id: int):
     """
     Deletes an order by ID.
@@ -93,9 +404,9 @@ def delete_order(order_id: int):
             raise HTTPException(status_code=404, detail="Order not found")
         return {"message": "Order deleted"}
     except ValueError as exc:
-        raise HTTPException(
-            status_code=400, detail="Invalid order ID"
-        ) from exc
+        raise HTTPException(status_code=400, detail="Invalid order ID") from exc
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
     except Exception as exc:
         raise HTTPException(
             status_code=500, detail="An error occurred while deleting the order"
@@ -2,51 +2,222 @@
 This module defines the routes for handling order-product relationships in the API.
 """
 
-from fastapi import APIRouter, Body, HTTPException
-from app.models.product_order import ProductOrder
-from app.services.product_order_service import OrderProductService  # type: ignore
+# pylint: disable=E0401
 
-order_product_route = APIRouter()
+from typing import Literal
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from models.order import OrderFilters
+from models.product_order import (
+    ProductOrder,
+    ProductOrderBatch,
+    ProductOrderCreate,
+    ProductOrderFilters,
+    ProductOrderPage,
+)
+from helpers.etag import is_not_modified, models_etag, not_modified_response
+from helpers.fieldsets import (
+    fieldset_batch_response,
+    fieldset_page_response,
+    fieldset_response,
+    parse_fields,
+    project_model,
+)
+from helpers.responses import UploadStreamingResponse, json_response
+from helpers.route_metrics import MetricsRoute
+from helpers.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from services.product_order_service import OrderProductService  # type: ignore
+from services.export_service import EXPORT_FORMATS, ExportService
+from services.loader import BatchLoader, get_order_product_loader, parse_id_list
+from services.executor import UNAVAILABLE_ERRORS, db_executor, in_db_executor
+from services.import_service import Importer, stream_import
+from services.outbox import ORDER_PRODUCT
+
+order_product_route = APIRouter(route_class=MetricsRoute)
 # pylint: disable=no-value-for-parameter
 
 
-@order_product_route.get("/order_products", response_model=list[ProductOrder])
-def get_order_products():
+@order_product_route.get(
+    "/order_products", response_model=ProductOrderPage | ProductOrderBatch
+)
+@in_db_executor
+def get_order_products(  # pylint: disable=too-many-arguments
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    filters: ProductOrderFilters = Depends(),
+    include_archived: bool = False,
+    ids: str | None = None,
+    fields: str | None = None,
+    loader: BatchLoader = Depends(get_order_product_loader),
+):
     """
-    Retrieve all order-product relationships.
+    Retrieve a page of order-product relationships, optionally filtered by
+    order and product. Pass the returned ``next_cursor`` back as ``cursor``
+    to read the following page. With ``include_archived=true`` the archived
+    relationships are listed too, merged by ID. Answers ``If-None-Match``
+    with ``304 Not Modified`` when the page did not change.
+
+    With ``ids=3,1,2`` the given relationships are returned instead, in
+    request order, with ``null`` and a ``not_found`` entry for the missing ones.
+
+    With ``fields=id,quantity`` each relationship only has the listed fields,
+    and only those columns are read from the database.
     """
     try:
-        order_products = OrderProductService.get_order_products()
-        return {"order_products": order_products}
+        selected = parse_fields(fields, ProductOrder)
+        if ids is not None:
+            return _get_order_products_by_ids(
+                request, parse_id_list(ids), loader, selected
+            )
+        order_products, next_cursor = OrderProductService.get_order_products(
+            limit=limit,
+            cursor=cursor,
+            include_archived=include_archived,
+            fields=selected,
+            **filters.model_dump(),
+        )
+        if selected is not None:
+            return fieldset_page_response(
+                request, "order_products", order_products, next_cursor, selected
+            )
+        etag = models_etag(*order_products, extra=next_cursor)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        page = ProductOrderPage.model_construct(
+            order_products=order_products, next_cursor=next_cursor
+        )
+        return json_response(page, etag)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@order_product_route.get("/order_products/{order_product_id}", response_model=ProductOrder)
-def get_order_product(order_product_id: int):
+def _get_order_products_by_ids(
+    request: Request,
+    order_product_ids: list[int],
+    loader: BatchLoader,
+    fields: list[str] | None = None,
+):
     """
-    Retrieve an order-product relationship by its ID.
+    Resolve the requested order-product relationships with one batched
+    query, keeping the request order and marking the IDs that do not exist.
+    """
+    if fields is not None:
+        rows = loader.bind(fields=fields).load_many(order_product_ids)
+        return fieldset_batch_response(
+            request, "order_products", order_product_ids, rows, fields
+        )
+    order_products = loader.load_many(order_product_ids)
+    found = [order_product for order_product in order_products if order_product]
+    not_found = [
+        order_product_id
+        for order_product_id, order_product in zip(order_product_ids, order_products)
+        if order_product is None
+    ]
+    etag = models_etag(*found, extra=(order_product_ids, not_found))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    batch = ProductOrderBatch.model_construct(
+        order_products=order_products, not_found=not_found
+    )
+    return json_response(batch, etag)
+
+
+@order_product_route.get("/order_products/export")
+def export_order_products(
+    filters: OrderFilters = Depends(),
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+):
+    """
+    Stream every order-product relationship whose order matches the order
+    filters as NDJSON or CSV.
     """
+    try:
+        chunks = ExportService.export_order_products(
+            export_format, **filters.model_dump()
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return StreamingResponse(
+        db_executor.iterate(chunks),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="order_products.{export_format}"'
+        },
+    )
+
+
+@order_product_route.post("/order_products/import")
+async def import_order_products(
+    request: Request,
+    import_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    import_id: str | None = Query(None, max_length=64),
+):
+    """
+    Import the order-product relationships of a CSV or NDJSON file sent as
+    the raw request body, in chunks, streaming the progress as NDJSON. Rows
+    referencing a missing order are reported and skipped. Send the file
+    again with the returned ``import_id`` to resume an interrupted import.
+    """
+    try:
+        importer = await db_executor.run(
+            Importer.open, ORDER_PRODUCT, import_format, import_id
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return UploadStreamingResponse(
+        stream_import(importer, request.stream()), media_type="application/x-ndjson"
+    )
+
+
+@order_product_route.get(
+    "/order_products/{order_product_id}", response_model=ProductOrder
+)
+@in_db_executor
+def get_order_product(
+    order_product_id: int, request: Request, fields: str | None = None
+):
+    """
+    Retrieve an order-product relationship by its ID. Answers
+    ``If-None-Match`` with ``304 Not Modified`` when it did not change.
+    With ``fields=id,quantity`` only the listed fields are returned.
+    """
+    try:
+        selected = parse_fields(fields, ProductOrder)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     try:
         order_product = OrderProductService.get_order_product_by_id(order_product_id)
         if not order_product:
             raise HTTPException(
                 status_code=404, detail="Order-product relationship not found"
             )
-        return order_product
+        if selected is not None:
+            projected = project_model(order_product, selected)
+            return fieldset_response(request, projected, [projected], selected)
+        etag = models_etag(order_product)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        return json_response(order_product, etag)
     except ValueError as exc:
-        raise HTTPException(
-            status_code=400, detail="Invalid order-product ID"
-        ) from exc
+        raise HTTPException(status_code=400, detail="Invalid order-product ID") from exc
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
     except Exception as exc:
         raise HTTPException(
             status_code=500,
-            detail="An error occurred while retrieving the order-product relationship"
+            detail="An error occurred while retrieving the order-product relationship",
         ) from exc
 
 
-@order_product_route.post("/order_products", response_model=ProductOrder)
-def create_order_product(order_product: ProductOrder = Body(...)):
+@order_product_route.post("/order_products")
+@in_db_executor
+def create_order_product(order_product: ProductOrderCreate = Body(...)):
     """
     Create a new order-product relationship.
     """
@@ -54,7 +225,7 @@ def create_order_product(order_product: ProductOrder = Body(...)):
         order_product_instance = OrderProductService.create_order_product(
             order_id=order_product.order_id,
             product_id=order_product.product_id,
-            quantity=order_product.quantity
+            quantity=order_product.quantity,
         )
         return {
             "message": "Order-product relationship created",
@@ -62,15 +233,18 @@ def create_order_product(order_product: ProductOrder = Body(...)):
         }
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
     except Exception as exc:
         raise HTTPException(
             status_code=500,
-            detail="An error occurred while creating the order-product relationship"
+            detail="An error occurred while creating the order-product relationship",
         ) from exc
 
 
-@order_product_route.put("/order_products/{order_product_id}", response_model=ProductOrder)
-def update_order_product(order_product_id: int, order_product_data: ProductOrder):
+@order_product_route.put("/order_products/{order_product_id}")
+@in_db_executor
+def update_order_product(order_product_id: int, order_product_data: ProductOrderCreate):
     """
     Update an existing order-product relationship.
     """
@@ -79,7 +253,7 @@ def update_order_product(order_product_id: int, order_product_data: ProductOrder
             order_product_id,
             order_id=order_product_data.order_id,
             product_id=order_product_data.product_id,
-            quantity=order_product_data.quantity
+            quantity=order_product_data.quantity,
         )
         if not updated_order_product:
             raise HTTPException(
@@ -91,14 +265,17 @@ def update_order_product(order_product_id: int, order_product_data: ProductOrder
         }
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
     except Exception as exc:
         raise HTTPException(
             status_code=500,
-            detail="An error occurred while updating the order-product relationship"
+            detail="An error occurred while updating the order-product relationship",
         ) from exc
 
 
 @order_product_route.delete("/order_products/{order_product_id}")
+@in_db_executor
 def delete_order_product(order_product_id: int):
     """
     Delete an order-product relationship by its ID.
@@ -112,8 +289,10 @@ def delete_order_product(order_product_id: int):
         return {"message": "Order-product relationship deleted"}
     except ValueError as exc:
         raise HTTPException(status_code=400, detail="Invalid order-product ID") from exc
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
     except Exception as exc:
         raise HTTPException(
             status_code=500,
-            detail="An error occurred while deleting the order-product relationship"
+            detail="An error occurred while deleting the order-product relationship",
         ) from exc
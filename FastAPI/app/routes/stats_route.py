@@ -0,0 +1,79 @@
+"""
+This module defines the routes exposing runtime statistics of the service.
+"""
+
+# pylint: disable=E0401
+
+from fastapi import APIRouter
+from config.database import breaker_stats, pool_stats, replica_stats
+from services.cache import cache_stats
+from services.change_feed import change_feed_stats
+from services.executor import executor_stats
+from services.group_commit import group_commit_stats
+from services.job_service import job_stats
+
+stats_route = APIRouter()
+
+
+@stats_route.get("/pool")
+def get_pool_stats():
+    """
+    Returns the database connection pool statistics.
+    """
+    return pool_stats()
+
+
+@stats_route.get("/replicas")
+def get_replica_stats():
+    """
+    Returns the reads routed to each replica and to the primary.
+    """
+    return replica_stats()
+
+
+@stats_route.get("/cache")
+def get_cache_stats():
+    """
+    Returns the hit, miss and eviction counters of the entity caches.
+    """
+    return cache_stats()
+
+
+@stats_route.get("/executor")
+def get_executor_stats():
+    """
+    Returns the queue depth, wait times and shed calls of the database executor.
+    """
+    return executor_stats()
+
+
+@stats_route.get("/group_commit")
+def get_group_commit_stats():
+    """
+    Returns the batches and rows written by the insert group commit.
+    """
+    return group_commit_stats()
+
+
+@stats_route.get("/change_feed")
+def get_change_feed_stats():
+    """
+    Returns the subscribers, polls and changes published by the change feed.
+    """
+    return change_feed_stats()
+
+
+@stats_route.get("/jobs")
+def get_job_stats():
+    """
+    Returns the jobs running and the jobs started, finished and requeued.
+    """
+    return job_stats()
+
+
+@stats_route.get("/breaker")
+def get_breaker_stats():
+    """
+    Returns the state of the database circuit breaker and its counters.
+    """
+    return breaker_stats()
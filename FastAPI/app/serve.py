@@ -0,0 +1,70 @@
+"""
+This module starts the application under uvicorn, with one or several
+worker processes.
+
+Run it from the application directory with ``python -m serve``. The worker
+count comes from WEB_CONCURRENCY (0 uses one worker per CPU core); every
+worker imports ``main`` on its own and so builds its own application,
+database connections and pool. The pending database migrations are applied
+first, once, unless MIGRATE_ON_START is false.
+"""
+
+# pylint: disable=E0401
+
+import os
+
+import uvicorn
+
+from config.database import close_database
+from config.migrations import run_migrations
+from config.settings import GRACEFUL_SHUTDOWN_SECONDS, env_flag, env_int
+
+
+def worker_count() -> int:
+    """
+    Return the number of worker processes to run.
+
+    Returns:
+        int: WEB_CONCURRENCY, or the number of CPU cores when it is 0.
+    """
+    workers = env_int("WEB_CONCURRENCY", 1)
+    if workers < 0:
+        raise ValueError("WEB_CONCURRENCY must be 0 or a positive integer")
+    return workers or os.cpu_count() or 1
+
+
+def migrate():
+    """
+    Apply the pending migrations before any worker starts, so a new
+    version never serves requests against the schema of the previous one.
+    The connection is closed afterwards: the workers open their own.
+    """
+    if not env_flag("MIGRATE_ON_START", True):
+        return
+    try:
+        versions = run_migrations()
+    finally:
+        close_database()
+    print(f"Applied migrations: {versions or 'none'}")
+
+
+def main():
+    """
+    Command-line entry point.
+
+    On SIGTERM or SIGINT every worker stops accepting connections, lets the
+    requests in flight finish for up to GRACEFUL_SHUTDOWN_SECONDS and then
+    runs the application shutdown, which closes its connections.
+    """
+    migrate()
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=env_int("PORT", 80),
+        workers=worker_count(),
+        timeout_graceful_shutdown=int(GRACEFUL_SHUTDOWN_SECONDS),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+This module moves old orders, with their lines, from the hot tables into the
+archive tables, so the hot tables and their indexes stay small.
+
+Run it from the application directory with
+``python -m services.archive_service --days 365``.
+"""
+
+# pylint: disable=E0401,too-few-public-methods
+
+import argparse
+from datetime import date, timedelta
+
+from peewee import fn
+
+from config.database import (
+    ArchivedOrderModel,
+    ArchivedProductOrderModel,
+    OrderModel,
+    ProductOrderModel,
+    connection_scope,
+    database,
+)
+from config.settings import env_int
+
+ARCHIVE_AFTER_DAYS = env_int("ARCHIVE_AFTER_DAYS", 365)
+ARCHIVE_BATCH_SIZE = env_int("ARCHIVE_BATCH_SIZE", 500)
+
+ORDER_COLUMNS = ("id", "user_id", "date", "total")
+LINE_COLUMNS = ("id", "order_id", "product_id", "quantity")
+
+
+def _fields(model, columns):
+    """
+    Return the fields of ``model`` named by ``columns``, in order.
+    """
+    return [getattr(model, column) for column in columns]
+
+
+def _kept_in_place():
+    """
+    Return the conditions excluding the orders that own the highest order
+    ID and the highest line ID.
+
+    Some databases (SQLite, MySQL before 8.0 after a restart) hand out
+    ``max(id) + 1`` as the next ID: moving the newest row away would let a
+    new order or line reuse an archived ID.
+    """
+    conditions = []
+    max_order_id = OrderModel.select(fn.MAX(OrderModel.id)).scalar()
+    if max_order_id is not None:
+        conditions.append(OrderModel.id != max_order_id)
+    max_line_id = ProductOrderModel.select(fn.MAX(ProductOrderModel.id)).scalar()
+    if max_line_id is not None:
+        owner = ProductOrderModel.select(ProductOrderModel.order_id).where(
+            ProductOrderModel.id == max_line_id
+        )
+        conditions.append(OrderModel.id.not_in(owner))
+    return conditions
+
+
+@connection_scope("ArchiveService.archive_orders")
+def _archive_batch(conditions, after_id: int, batch_size: int):
+    """
+    Move the next batch of orders and their lines in one short transaction.
+
+    :return: The ``(last_id, orders_moved, lines_moved)`` of the batch, or
+        None when no order is left to archive
+    """
+    with database.atomic():
+        query = (
+            OrderModel.select(OrderModel.id)
+            .where(OrderModel.id > after_id, *conditions)
+            .order_by(OrderModel.id)
+            .limit(batch_size)
+        )
+        if database.for_update:
+            query = query.for_update()
+        order_ids = [order_id for (order_id,) in query.tuples()]
+        if not order_ids:
+            return None
+        ArchivedOrderModel.insert_from(
+            OrderModel.select(*_fields(OrderModel, ORDER_COLUMNS)).where(
+                OrderModel.id.in_(order_ids)
+            ),
+            _fields(ArchivedOrderModel, ORDER_COLUMNS),
+        ).execute()
+        ArchivedProductOrderModel.insert_from(
+            ProductOrderModel.select(*_fields(ProductOrderModel, LINE_COLUMNS)).where(
+                ProductOrderModel.order_id.in_(order_ids)
+            ),
+            _fields(ArchivedProductOrderModel, LINE_COLUMNS),
+        ).execute()
+        lines_moved = (
+            ProductOrderModel.delete()
+            .where(ProductOrderModel.order_id.in_(order_ids))
+            .execute()
+        )
+        orders_moved = OrderModel.delete().where(OrderModel.id.in_(order_ids)).execute()
+    return order_ids[-1], orders_moved, lines_moved
+
+
+def _archive(cutoff: date, batch_size: int):
+    """
+    Move the orders placed before ``cutoff`` batch by batch, yielding the
+    running totals after each batch.
+    """
+    with connection_scope("ArchiveService.archive_orders"):
+        conditions = [OrderModel.date < cutoff, *_kept_in_place()]
+    moved = {"batches": 0, "orders": 0, "lines": 0}
+    after_id = 0
+    while True:
+        result = _archive_batch(conditions, after_id, batch_size)
+        if result is None:
+            return
+        after_id, orders_moved, lines_moved = result
+        moved["batches"] += 1
+        moved["orders"] += orders_moved
+        moved["lines"] += lines_moved
+        yield dict(moved)
+
+
+class ArchiveService:
+    """
+    Service class to move old orders to the archive tables.
+    """
+
+    @staticmethod
+    def archive_batches(
+        older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE
+    ):
+        """
+        Build a generator moving the orders placed more than
+        ``older_than_days`` days ago, with their lines, to the archive
+        tables, one batch per step.
+
+        Each batch of at most ``batch_size`` orders is copied and deleted in
+        its own short transaction, so the online writes are never blocked
+        for long; running the job again continues where it stopped. The
+        order summary is left as it is: archived orders still count in the
+        aggregates. The caches need no invalidation either, since reads fall
+        back to the archive and the rows do not change.
+
+        :param older_than_days: Age, in days, from which orders are archived
+        :param batch_size: Orders moved per transaction
+        :raises ValueError: if the age or the batch size is invalid
+        :return: A generator of the running totals (batches, orders and
+            lines moved), yielded after each batch
+        """
+        if older_than_days < 0:
+            raise ValueError("older_than_days must not be negative")
+        if batch_size < 1:
+            raise ValueError("batch_size must be greater than zero")
+        return _archive(date.today() - timedelta(days=older_than_days), batch_size)
+
+    @staticmethod
+    def archive_orders(
+        older_than_days: int = ARCHIVE_AFTER_DAYS,
+        batch_size: int = ARCHIVE_BATCH_SIZE,
+        max_batches: int | None = None,
+    ):
+        """
+        Archive the old orders, see ``archive_batches``.
+
+        :param older_than_days: Age, in days, from which orders are archived
+        :param batch_size: Orders moved per transaction
+        :param max_batches: Stop after this many batches (None: no limit)
+        :raises ValueError: if the age or the batch size is invalid
+        :return: A dict with the number of batches, orders and lines moved
+        """
+        batches = ArchiveService.archive_batches(older_than_days, batch_size)
+        moved = {"batches": 0, "orders": 0, "lines": 0}
+        while max_batches is None or moved["batches"] < max_batches:
+            totals = next(batches, None)
+            if totals is None:
+                break
+            moved = totals
+        return moved
+
+
+def main():
+    """
+    Command-line entry point.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+    moved = ArchiveService.archive_orders(
+        older_than_days=args.days,
+        batch_size=args.batch_size,
+        max_batches=args.max_batches,
+    )
+    print(
+        f"Archived {moved['orders']} orders and {moved['lines']} order products "
+        f"in {moved['batches']} batches"
+    )
+
+
+if __name__ == "__main__":
+    main()
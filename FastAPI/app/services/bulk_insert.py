@@ -0,0 +1,41 @@
+"""
+This module provides helpers to insert many rows with chunked multi-row
+INSERT statements and recover the generated IDs.
+"""
+
+# pylint: disable=E0401
+
+from peewee import SqliteDatabase
+
+BULK_CHUNK_SIZE = 500
+
+
+def insert_rows(
+    model, rows: list[dict], chunk_size: int = BULK_CHUNK_SIZE
+) -> list[int]:
+    """
+    Insert ``rows`` into ``model`` with one ``insert_many`` per chunk.
+
+    It must run inside a transaction so the chunks are committed together.
+    Databases supporting RETURNING report the IDs directly. Otherwise the ID
+    reported by the driver is used: MySQL returns the first ID of a multi-row
+    INSERT (consecutive for a single statement) and SQLite the last one.
+
+    :param model: The peewee model to insert into
+    :param rows: The column values of every row, in order
+    :param chunk_size: Maximum number of rows per INSERT statement
+    :return: The generated IDs, in the same order as ``rows``
+    """
+    database = model._meta.database  # pylint: disable=protected-access
+    ids = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start : start + chunk_size]
+        query = model.insert_many(chunk)
+        if database.returning_clause:
+            ids.extend(row[0] for row in query.returning(model.id).tuples().execute())
+            continue
+        reported_id = query.execute()
+        if isinstance(database, SqliteDatabase):
+            reported_id -= len(chunk) - 1
+        ids.extend(range(reported_id, reported_id + len(chunk)))
+    return ids
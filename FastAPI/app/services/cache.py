@@ -0,0 +1,158 @@
+"""
+This module provides an in-process read-through cache with bounded size,
+LRU eviction and a per-entry TTL, used in front of single-entity lookups.
+"""
+
+# pylint: disable=E0401,too-many-instance-attributes
+
+import threading
+import time
+from collections import OrderedDict
+
+from config.settings import env_flag, env_float, env_int
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a fixed TTL.
+
+    Attributes:
+        max_size (int): Maximum number of entries kept in memory.
+        ttl (float): Seconds an entry stays valid after being stored.
+        cache_none (bool): Whether ``None`` results (not found) are cached.
+    """
+
+    def __init__(self, max_size: int, ttl: float, cache_none: bool = False):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.cache_none = cache_none
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a load that raced with a write does
+        # not store the value it read before the write.
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def get(self, key):
+        """
+        Return the cached value for ``key``, or ``MISSING``.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def get_or_load(self, key, loader):
+        """
+        Return the cached value for ``key``, calling ``loader`` on a miss and
+        caching its result.
+
+        Args:
+            key: The cache key.
+            loader (callable): Loads the value when it is not cached.
+
+        Returns:
+            The cached or freshly loaded value.
+        """
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+        generation = self._generation
+        value = loader()
+        if value is not None or self.cache_none:
+            self._store(key, value, generation)
+        return value
+
+    def _store(self, key, value, generation):
+        """
+        Store ``value`` unless an invalidation happened since ``generation``.
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, *keys):
+        """
+        Drop the given keys from the cache.
+        """
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._invalidations += 1
+
+    def clear(self):
+        """
+        Drop every entry from the cache.
+        """
+        with self._lock:
+            self._generation += 1
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+            dict: Size, hits, misses, hit ratio, evictions, expirations and
+            invalidations since the process started.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+            }
+
+
+order_cache = TTLCache(
+    max_size=env_int("CACHE_MAX_SIZE", 10000),
+    ttl=env_float("CACHE_TTL_SECONDS", 30.0),
+    cache_none=env_flag("CACHE_NEGATIVE_ENABLED"),
+)
+order_product_cache = TTLCache(
+    max_size=env_int("CACHE_MAX_SIZE", 10000),
+    ttl=env_float("CACHE_TTL_SECONDS", 30.0),
+    cache_none=env_flag("CACHE_NEGATIVE_ENABLED"),
+)
+
+
+def cache_stats():
+    """
+    Return the counters of every entity cache.
+    """
+    return {
+        "orders": order_cache.stats(),
+        "order_products": order_product_cache.stats(),
+    }
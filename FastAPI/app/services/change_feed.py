@@ -0,0 +1,325 @@
+"""
+This module streams the order and order-product changes recorded in the
+outbox to any number of subscribers, as Server-Sent Events.
+
+Run it from the application directory with ``python -m services.change_feed``
+to prune the changes older than the retention.
+
+Each process runs a single poller reading the outbox in batches and fanning
+the new changes out to its subscribers, so the database load depends on
+the number of changes, not on the number of clients.
+"""
+
+# pylint: disable=E0401,too-many-instance-attributes
+
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+from peewee import fn
+
+from config.database import OrderChangeModel, connection_scope
+from config.settings import env_float, env_int
+from services.executor import DatabaseBusyError, db_executor
+
+CHANGE_FEED_POLL_INTERVAL = env_float("CHANGE_FEED_POLL_INTERVAL_MS", 500.0) / 1000
+CHANGE_FEED_BATCH_SIZE = env_int("CHANGE_FEED_BATCH_SIZE", 500)
+CHANGE_FEED_QUEUE_SIZE = env_int("CHANGE_FEED_QUEUE_SIZE", 1000)
+CHANGE_FEED_GAP_TIMEOUT = env_float("CHANGE_FEED_GAP_TIMEOUT_MS", 5000.0) / 1000
+CHANGE_FEED_KEEPALIVE = env_float("CHANGE_FEED_KEEPALIVE_SECONDS", 15.0)
+OUTBOX_RETENTION_HOURS = env_int("OUTBOX_RETENTION_HOURS", 24)
+OUTBOX_PRUNE_INTERVAL = 600.0
+OUTBOX_PRUNE_CHUNK_SIZE = 5000
+
+# Sentinel queued for a subscriber that fell too far behind.
+_OVERFLOW = object()
+
+
+@connection_scope("ChangeFeed.read_changes", idempotent=True)
+def read_changes(after_id: int, limit: int, up_to: int | None = None) -> list[dict]:
+    """
+    Read the changes following ``after_id``, oldest first.
+
+    :param after_id: Only changes with a greater ID
+    :param limit: Maximum number of changes
+    :param up_to: Only changes with this ID or a lower one, when given
+    :return: The changes as dicts
+    """
+    conditions = [OrderChangeModel.id > after_id]
+    if up_to is not None:
+        conditions.append(OrderChangeModel.id <= up_to)
+    return list(
+        OrderChangeModel.select()
+        .where(*conditions)
+        .order_by(OrderChangeModel.id)
+        .limit(limit)
+        .dicts()
+    )
+
+
+@connection_scope("ChangeFeed.bounds", idempotent=True)
+def _bounds():
+    """
+    Return the lowest and highest change IDs kept in the outbox (0 when empty).
+    """
+    lowest, highest = (
+        OrderChangeModel.select(
+            fn.MIN(OrderChangeModel.id), fn.MAX(OrderChangeModel.id)
+        )
+        .tuples()
+        .get()
+    )
+    return lowest or 0, highest or 0
+
+
+@connection_scope("ChangeFeed.prune_changes")
+def prune_changes(retention_hours: int = OUTBOX_RETENTION_HOURS) -> int:
+    """
+    Delete the changes older than the retention, in chunks. The newest
+    change is always kept so its ID is never handed out again.
+
+    :return: The number of changes deleted
+    """
+    cutoff = datetime.now() - timedelta(hours=retention_hours)
+    _, highest = _bounds()
+    deleted = 0
+    while True:
+        chunk = [
+            change_id
+            for (change_id,) in OrderChangeModel.select(OrderChangeModel.id)
+            .where(OrderChangeModel.created_at < cutoff, OrderChangeModel.id < highest)
+            .order_by(OrderChangeModel.id)
+            .limit(OUTBOX_PRUNE_CHUNK_SIZE)
+            .tuples()
+        ]
+        if not chunk:
+            return deleted
+        deleted += (
+            OrderChangeModel.delete().where(OrderChangeModel.id.in_(chunk)).execute()
+        )
+
+
+def format_event(change: dict) -> str:
+    """
+    Encode a change as a Server-Sent Event.
+    """
+    payload = {
+        "id": change["id"],
+        "entity": change["entity"],
+        "entity_id": change["entity_id"],
+        "action": change["action"],
+        "data": json.loads(change["data"]) if change["data"] else None,
+        "created_at": change["created_at"],
+    }
+    return (
+        f"id: {change['id']}\n"
+        f"event: {change['entity']}.{change['action']}\n"
+        f"data: {json.dumps(payload, default=str)}\n\n"
+    )
+
+
+class ChangeFeed:
+    """
+    Polls the outbox once per process and fans the changes out.
+
+    Outbox IDs are handed out when a change is written but become visible
+    when it commits, possibly out of order. The poller therefore stops at a
+    missing ID until it appears or ``gap_timeout`` elapses (the transaction
+    was rolled back), so no committed change is ever skipped.
+
+    Attributes:
+        poll_interval (float): Seconds between polls when idle.
+        batch_size (int): Maximum number of changes read per query.
+        queue_size (int): Changes buffered per subscriber; a subscriber
+            falling further behind is disconnected and resumes from the
+            outbox when it reconnects.
+        gap_timeout (float): Seconds to wait for a missing ID.
+    """
+
+    def __init__(
+        self, poll_interval: float, batch_size: int, queue_size: int, gap_timeout: float
+    ):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.gap_timeout = gap_timeout
+        self._subscribers = set()
+        self._task = None
+        self._position = None
+        self._gap_since = None
+        self._last_prune = 0.0
+        self._polls = 0
+        self._published = 0
+        self._dropped = 0
+
+    def _settled(self, changes: list) -> list:
+        """
+        Return the changes that can be published: those before the first
+        missing ID that is still within its timeout.
+        """
+        expected = self._position + 1
+        ready = []
+        for change in changes:
+            if change["id"] != expected:
+                now = time.monotonic()
+                if self._gap_since is None:
+                    self._gap_since = now
+                if now - self._gap_since < self.gap_timeout:
+                    break
+            self._gap_since = None
+            ready.append(change)
+            expected = change["id"] + 1
+        return ready
+
+    def _publish(self, changes: list):
+        """
+        Queue the changes for every subscriber.
+        """
+        for queue in list(self._subscribers):
+            for change in changes:
+                try:
+                    queue.put_nowait(change)
+                except asyncio.QueueFull:
+                    # Too far behind: end its stream, it resumes from the outbox.
+                    self._subscribers.discard(queue)
+                    self._dropped += 1
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(_OVERFLOW)
+                    break
+        self._position = changes[-1]["id"]
+        self._published += len(changes)
+
+    async def _poll(self):
+        """
+        Publish the new changes while there are subscribers.
+        """
+        while self._subscribers:
+            changes = []
+            try:
+                if time.monotonic() - self._last_prune > OUTBOX_PRUNE_INTERVAL:
+                    self._last_prune = time.monotonic()
+                    await db_executor.run(prune_changes)
+                changes = await db_executor.run(
+                    read_changes, self._position, self.batch_size
+                )
+                self._polls += 1
+            except Exception:  # pylint: disable=broad-exception-caught
+                # Saturated or failing database: retried on the next round.
+                pass
+            ready = self._settled(changes)
+            if ready:
+                self._publish(ready)
+            if len(ready) < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def _running(self) -> bool:
+        """
+        Return whether the poller of this process is running.
+        """
+        return self._task is not None and not self._task.done()
+
+    async def _start(self):
+        """
+        Start the poller of this process if it is not running, from the
+        newest change: earlier ones are only replayed on request.
+        """
+        if self._running():
+            return
+        _, highest = await db_executor.run(_bounds)
+        if not self._running():
+            self._position = highest
+            self._gap_since = None
+            self._task = asyncio.create_task(self._poll())
+
+    async def events(self, last_event_id: int | None = None):
+        """
+        Stream the changes as Server-Sent Events.
+
+        Without ``last_event_id`` the stream starts with the next change.
+        Otherwise the changes following it are replayed from the outbox
+        first; a ``reset`` event is sent when some of them were already
+        pruned, so the client knows to reload its data. A comment is sent
+        when nothing happened for a while, to keep the connection open.
+
+        :param last_event_id: The ID of the last change the client received
+        :return: An async generator of encoded events
+        """
+        queue = asyncio.Queue(self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            await self._start()
+            yield f"retry: {int(self.poll_interval * 2000)}\n\n"
+            delivered = self._position if last_event_id is None else last_event_id
+            if last_event_id is not None:
+                lowest, _ = await db_executor.run(_bounds)
+                if lowest and last_event_id < lowest - 1:
+                    yield "event: reset\ndata: {}\n\n"
+                # Replay up to the poller position; the queue has the rest.
+                while delivered < self._position:
+                    changes = await db_executor.run(
+                        read_changes, delivered, self.batch_size, self._position
+                    )
+                    if not changes:
+                        break
+                    for change in changes:
+                        yield format_event(change)
+                    delivered = changes[-1]["id"]
+            while True:
+                try:
+                    change = await asyncio.wait_for(queue.get(), CHANGE_FEED_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if change is _OVERFLOW:
+                    return
+                if change["id"] > delivered:
+                    yield format_event(change)
+                    delivered = change["id"]
+        except DatabaseBusyError:
+            return
+        finally:
+            self._subscribers.discard(queue)
+
+    def stats(self):
+        """
+        Return the change feed counters of this process.
+
+        Returns:
+            dict: The subscribers, the last published change ID, the polls,
+            the changes published and the subscribers dropped for lagging.
+        """
+        return {
+            "subscribers": len(self._subscribers),
+            "position": self._position,
+            "polls": self._polls,
+            "published": self._published,
+            "dropped_subscribers": self._dropped,
+        }
+
+
+change_feed = ChangeFeed(
+    poll_interval=CHANGE_FEED_POLL_INTERVAL,
+    batch_size=CHANGE_FEED_BATCH_SIZE,
+    queue_size=CHANGE_FEED_QUEUE_SIZE,
+    gap_timeout=CHANGE_FEED_GAP_TIMEOUT,
+)
+
+
+def change_feed_stats():
+    """
+    Return the change feed counters.
+    """
+    return change_feed.stats()
+
+
+def main():
+    """
+    Command-line entry point.
+    """
+    print(f"Pruned {prune_changes()} changes from the outbox")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+This module provides the bounded executor running the blocking database work
+of the route handlers, with a bounded wait queue and a queue-time deadline so
+bursts are shed early instead of queueing without limit.
+"""
+
+# pylint: disable=E0401,too-many-instance-attributes
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.database import DatabaseUnavailableError
+from config.settings import env_float, env_int
+from helpers.circuit_breaker import CircuitOpenError
+
+
+class DatabaseBusyError(Exception):
+    """
+    Raised when a call is rejected because the executor is saturated.
+
+    Attributes:
+        retry_after (int): Seconds the client should wait before retrying.
+        status_code (int): The HTTP status the error is answered with.
+    """
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Errors meaning the database cannot serve the request right now. The route
+# handlers let them through, and the application answers them with 503 and
+# a Retry-After header rather than a generic 500.
+UNAVAILABLE_ERRORS = (DatabaseBusyError, CircuitOpenError, DatabaseUnavailableError)
+
+
+class DatabaseExecutor:
+    """
+    Thread pool dedicated to database work, with admission control.
+
+    At most ``max_workers`` calls run at once and at most ``max_queue``
+    more wait for a worker. A call that finds the queue full, or that is
+    still waiting after ``queue_timeout`` seconds, fails with
+    ``DatabaseBusyError`` without ever reaching the database.
+
+    Attributes:
+        max_workers (int): Maximum number of calls running concurrently.
+        max_queue (int): Maximum number of calls waiting for a worker.
+        queue_timeout (float): Maximum seconds a call may wait for a worker.
+        retry_after (int): Seconds suggested to rejected clients.
+    """
+
+    def __init__(
+        self, max_workers: int, max_queue: int, queue_timeout: float, retry_after: int
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="db-executor")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._max_queued = 0
+        self._completed = 0
+        self._rejected = 0
+        self._expired = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run ``func`` on a database worker and return its result.
+
+        Args:
+            func (callable): The blocking function to run.
+            *args: Positional arguments of ``func``.
+            **kwargs: Keyword arguments of ``func``.
+
+        Returns:
+            The value returned by ``func``.
+
+        Raises:
+            DatabaseBusyError: If the queue is full or the call waited longer
+                than the queue timeout.
+        """
+        with self._lock:
+            if self._queued + self._running >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise DatabaseBusyError("Database queue is full", self.retry_after)
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+        # The worker runs in a copy of the caller's context, so request-scoped
+        # context variables (the read-your-writes client) reach it.
+        context = contextvars.copy_context()
+        future = self._pool.submit(
+            context.run, self._execute, time.perf_counter(), func, args, kwargs
+        )
+        result = asyncio.wrap_future(future)
+        try:
+            return await asyncio.wait_for(asyncio.shield(result), self.queue_timeout)
+        except asyncio.TimeoutError:
+            # Only a call that has not started yet can be cancelled; a running
+            # one is past the queue and is awaited to completion.
+            if not future.cancel():
+                return await result
+            with self._lock:
+                self._queued -= 1
+                self._expired += 1
+            raise DatabaseBusyError(
+                "Timed out waiting for a database worker", self.retry_after
+            ) from None
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Wait until no call is queued or running, for at most ``timeout``
+        seconds, so shutdown does not close connections under running work.
+
+        Returns:
+            bool: Whether the executor became idle in time.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if not self._queued and not self._running:
+                    return True
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+
+    def reset_after_fork(self):
+        """
+        Give a forked child process its own worker threads: the threads of
+        the parent do not exist in the child.
+        """
+        self._pool = ThreadPoolExecutor(
+            self.max_workers, thread_name_prefix="db-executor"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+
+    def _execute(self, enqueued_at: float, func, args, kwargs):
+        """
+        Worker side of ``run``: account for the wait, then call ``func``.
+        """
+        waited = time.perf_counter() - enqueued_at
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._wait_seconds += waited
+            self._max_wait_seconds = max(self._max_wait_seconds, waited)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    async def iterate(self, iterator):
+        """
+        Consume a blocking iterator on the database workers, one item per
+        call, so streamed responses are subject to the same limits.
+        """
+        iterator = iter(iterator)
+        done = object()
+        while True:
+            item = await self.run(next, iterator, done)
+            if item is done:
+                return
+            yield item
+
+    def stats(self):
+        """
+        Return the executor counters.
+
+        Returns:
+            dict: The limits, the current queue depth and running calls, the
+            deepest queue seen, the completed, rejected (queue full) and
+            expired (queue timeout) calls and the average and maximum time
+            spent waiting for a worker in milliseconds.
+        """
+        with self._lock:
+            started = self._completed + self._running
+            average = self._wait_seconds / started if started else 0.0
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_timeout_seconds": self.queue_timeout,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "max_queue_depth": self._max_queued,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "expired": self._expired,
+                "avg_wait_ms": round(average * 1000, 3),
+                "max_wait_ms": round(self._max_wait_seconds * 1000, 3),
+            }
+
+
+db_executor = DatabaseExecutor(
+    max_workers=env_int("DB_EXECUTOR_MAX_WORKERS", 20),
+    max_queue=env_int("DB_EXECUTOR_MAX_QUEUE", 100),
+    queue_timeout=env_float("DB_EXECUTOR_QUEUE_TIMEOUT", 2.0),
+    retry_after=env_int("DB_EXECUTOR_RETRY_AFTER", 1),
+)
+os.register_at_fork(after_in_child=db_executor.reset_after_fork)
+
+
+def in_db_executor(handler):
+    """
+    Turn a blocking route handler into an async one running on the
+    database executor instead of the shared threadpool.
+
+    The wrapper keeps the handler's signature, so FastAPI still resolves
+    its parameters and dependencies.
+    """
+
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        return await db_executor.run(handler, *args, **kwargs)
+
+    return wrapper
+
+
+def executor_stats():
+    """
+    Return the database executor counters.
+    """
+    return db_executor.stats()
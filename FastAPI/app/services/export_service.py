@@ -0,0 +1,129 @@
+"""
+This module provides services to export orders and order-product
+relationships as streamed NDJSON or CSV documents.
+"""
+
+# pylint: disable=E0401
+
+import csv
+import io
+import json
+
+from config.database import OrderModel, ProductOrderModel, connection_scope
+from services.filters import order_conditions
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _encode_ndjson(columns, rows):
+    """
+    Encode a chunk of rows as newline-delimited JSON.
+    """
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows
+    )
+
+
+def _encode_csv(rows):
+    """
+    Encode a chunk of rows as CSV lines.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def _stream(query, id_field, columns, export_format):
+    """
+    Yield the encoded result of ``query`` chunk by chunk.
+
+    Rows are read as plain tuples with keyset pagination on ``id_field`` so
+    only one chunk is held in memory at a time, whatever the table size. The
+    connection is only held while a chunk is being read, never while the
+    client consumes it.
+    """
+    if export_format == "csv":
+        yield _encode_csv([columns])
+    after_id = 0
+    while True:
+        with connection_scope("ExportService.export", read=True):
+            rows = list(
+                query.where(id_field > after_id)
+                .order_by(id_field)
+                .limit(EXPORT_CHUNK_SIZE)
+                .tuples()
+                .iterator()
+            )
+        if not rows:
+            return
+        if export_format == "csv":
+            yield _encode_csv(rows)
+        else:
+            yield _encode_ndjson(columns, rows)
+        if len(rows) < EXPORT_CHUNK_SIZE:
+            return
+        after_id = rows[-1][0]
+
+
+def _validate(export_format: str):
+    """
+    Validate the export format shared by every export.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError("Unsupported export format")
+
+
+class ExportService:
+    """
+    Service class to stream full-table exports without buffering them.
+    """
+
+    @staticmethod
+    def export_orders(export_format: str, **filters):
+        """
+        Build a generator streaming every order matching the filters.
+
+        :param export_format: Either "ndjson" or "csv"
+        :param filters: Optional user_id, date_from, date_to, min_total and
+            max_total filters
+        :raises ValueError: if the format or a filter range is invalid
+        :return: A generator of encoded text chunks
+        """
+        _validate(export_format)
+        conditions = order_conditions(**filters)
+        query = OrderModel.select(
+            OrderModel.id, OrderModel.user_id, OrderModel.date, OrderModel.total
+        )
+        if conditions:
+            query = query.where(*conditions)
+        columns = ["id", "user_id", "date", "total"]
+        return _stream(query, OrderModel.id, columns, export_format)
+
+    @staticmethod
+    def export_order_products(export_format: str, **filters):
+        """
+        Build a generator streaming every order-product relationship whose
+        order matches the filters.
+
+        :param export_format: Either "ndjson" or "csv"
+        :param filters: Optional user_id, date_from, date_to, min_total and
+            max_total filters on the parent order
+        :raises ValueError: if the format or a filter range is invalid
+        :return: A generator of encoded text chunks
+        """
+        _validate(export_format)
+        conditions = order_conditions(**filters)
+        query = ProductOrderModel.select(
+            ProductOrderModel.id,
+            ProductOrderModel.order_id,
+            ProductOrderModel.product_id,
+            ProductOrderModel.quantity,
+        )
+        if conditions:
+            query = query.join(OrderModel).where(*conditions)
+        columns = ["id", "order_id", "product_id", "quantity"]
+        return _stream(query, ProductOrderModel.id, columns, export_format)
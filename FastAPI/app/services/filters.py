@@ -0,0 +1,69 @@
+"""
+This module builds the SQL filter conditions shared by the order and
+order-product list and export queries.
+"""
+
+# pylint: disable=E0401
+
+from datetime import date
+
+from config.database import OrderModel, ProductOrderModel
+
+
+def order_conditions(  # pylint: disable=too-many-arguments
+    user_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    min_total: float | None = None,
+    max_total: float | None = None,
+    model=OrderModel,
+):
+    """
+    Build the WHERE conditions filtering orders.
+
+    :param user_id: Only keep orders of this user
+    :param date_from: Only keep orders placed on or after this date
+    :param date_to: Only keep orders placed on or before this date
+    :param min_total: Only keep orders whose total is at least this amount
+    :param max_total: Only keep orders whose total is at most this amount
+    :param model: The order model the conditions apply to (the hot or the
+        archive table)
+    :raises ValueError: if a range is inverted
+    :return: The list of conditions, to be passed to ``where(*conditions)``
+    """
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise ValueError("date_from must be before date_to")
+    if min_total is not None and max_total is not None and min_total > max_total:
+        raise ValueError("min_total must be lower than max_total")
+    conditions = []
+    if user_id is not None:
+        conditions.append(model.user_id == user_id)
+    if date_from is not None:
+        conditions.append(model.date >= date_from)
+    if date_to is not None:
+        conditions.append(model.date <= date_to)
+    if min_total is not None:
+        conditions.append(model.total >= min_total)
+    if max_total is not None:
+        conditions.append(model.total <= max_total)
+    return conditions
+
+
+def order_product_conditions(
+    order_id: int | None = None, product_id: int | None = None, model=ProductOrderModel
+):
+    """
+    Build the WHERE conditions filtering order-product relationships.
+
+    :param order_id: Only keep the lines of this order
+    :param product_id: Only keep the lines of this product
+    :param model: The order-product model the conditions apply to (the hot
+        or the archive table)
+    :return: The list of conditions, to be passed to ``where(*conditions)``
+    """
+    conditions = []
+    if order_id is not None:
+        conditions.append(model.order_id == order_id)
+    if product_id is not None:
+        conditions.append(model.product_id == product_id)
+    return conditions
@@ -0,0 +1,243 @@
+"""
+This module provides group commit for single-row inserts: concurrent creates
+are collected for a short window and written with one multi-row INSERT in
+one transaction, while every caller still gets its own ID or error.
+"""
+
+# pylint: disable=E0401,too-few-public-methods,too-many-instance-attributes
+
+import threading
+
+from config.database import (
+    DatabaseUnavailableError,
+    OrderModel,
+    ProductOrderModel,
+    database,
+)
+from config.settings import env_flag, env_float, env_int
+from services.bulk_insert import insert_rows
+from services.outbox import CREATED, ORDER, ORDER_PRODUCT, record_changes
+from services.summary_service import apply_summary_deltas, summary_deltas
+
+
+def _caller_error(error: Exception) -> Exception:
+    """
+    Return a copy of a batch error for one of its callers: the same type and
+    attributes, so the callers handle it as the original, but an instance of
+    its own, raised from the original, so the tracebacks of the callers do
+    not pile up on one exception.
+    """
+    fresh = type(error).__new__(type(error), *error.args)
+    fresh.__dict__.update(error.__dict__)
+    return fresh
+
+
+class _Batch:
+    """
+    Rows collected during one window, and their results once written.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self.results = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class GroupCommitter:
+    """
+    Coalesces concurrent single-row inserts into batched transactions.
+
+    The first caller of a window becomes its leader: it waits until the
+    window elapses or ``max_rows`` rows are queued, writes the batch with
+    ``write_batch`` in one transaction and wakes the other callers. When the
+    batch fails, its rows are retried one by one so only the faulty rows
+    report an error. The other callers wait at most ``timeout`` seconds
+    after the window for the leader.
+
+    Attributes:
+        write_batch (callable): Writes a list of rows and returns their IDs,
+            in order; called inside a transaction.
+        window (float): Seconds the leader waits for more rows.
+        max_rows (int): Number of rows that closes a window early.
+        timeout (float): Seconds a caller waits for the leader to write the
+            batch, after the window.
+    """
+
+    def __init__(self, write_batch, window: float, max_rows: int, timeout: float):
+        self.write_batch = write_batch
+        self.window = window
+        self.max_rows = max_rows
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._current = None
+        self._batches = 0
+        self._rows = 0
+        self._fallbacks = 0
+        self._max_batch = 0
+
+    def submit(self, row: dict) -> int:
+        """
+        Queue one row and return its generated ID once its batch is committed.
+
+        Args:
+            row (dict): The column values of the row.
+
+        Returns:
+            int: The generated ID.
+
+        Raises:
+            DatabaseUnavailableError: If the leader did not write the batch in
+                time; the row may still be written afterwards.
+            Exception: The error raised when writing this row on its own.
+        """
+        with self._lock:
+            batch = self._current
+            leader = batch is None
+            if leader:
+                batch = self._current = _Batch()
+            position = len(batch.rows)
+            batch.rows.append(row)
+            if len(batch.rows) >= self.max_rows:
+                self._current = None
+                batch.full.set()
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._current is batch:
+                    self._current = None
+            self._flush(batch)
+        elif not batch.done.wait(self.window + self.timeout):
+            raise DatabaseUnavailableError(
+                "The group commit batch was not written in time"
+            )
+        if len(batch.results) <= position:
+            raise RuntimeError("The batch was not written")
+        result = batch.results[position]
+        if isinstance(result, Exception):
+            raise _caller_error(result) from result
+        return result
+
+    def _write(self, rows: list) -> list:
+        with database.atomic():
+            return self.write_batch(rows)
+
+    def _flush(self, batch: _Batch):
+        """
+        Write the rows of a closed batch and publish the results.
+        """
+        try:
+            try:
+                batch.results = self._write(batch.rows)
+            except Exception:  # pylint: disable=broad-exception-caught
+                if len(batch.rows) == 1:
+                    raise
+                with self._lock:
+                    self._fallbacks += 1
+                results = []
+                for row in batch.rows:
+                    try:
+                        results.extend(self._write([row]))
+                    except Exception as exc:  # pylint: disable=broad-exception-caught
+                        results.append(exc)
+                batch.results = results
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            batch.results = [exc] * len(batch.rows)
+        finally:
+            with self._lock:
+                self._batches += 1
+                self._rows += len(batch.rows)
+                self._max_batch = max(self._max_batch, len(batch.rows))
+            batch.done.set()
+
+    def stats(self):
+        """
+        Return the group commit counters.
+
+        Returns:
+            dict: Batches and rows written, the average and largest batch
+            and the batches that had to be retried row by row.
+        """
+        with self._lock:
+            return {
+                "window_ms": round(self.window * 1000, 3),
+                "max_rows": self.max_rows,
+                "batches": self._batches,
+                "rows": self._rows,
+                "avg_batch_size": (
+                    round(self._rows / self._batches, 2) if self._batches else 0.0
+                ),
+                "max_batch_size": self._max_batch,
+                "fallbacks": self._fallbacks,
+            }
+
+
+GROUP_COMMIT_ENABLED = env_flag("GROUP_COMMIT_ENABLED")
+GROUP_COMMIT_WINDOW = env_float("GROUP_COMMIT_WINDOW_MS", 3.0) / 1000
+GROUP_COMMIT_MAX_ROWS = env_int("GROUP_COMMIT_MAX_ROWS", 100)
+GROUP_COMMIT_TIMEOUT = env_float("GROUP_COMMIT_TIMEOUT_SECONDS", 10.0)
+
+
+def group_committer(model, after_write=None) -> GroupCommitter:
+    """
+    Build the group committer inserting into ``model``.
+
+    Args:
+        model: The peewee model to insert into.
+        after_write (callable | None): Called with the rows and their IDs in
+            the same transaction, to keep derived data up to date.
+
+    Returns:
+        GroupCommitter: The committer, using the configured window, size
+        and timeout.
+    """
+
+    def write_batch(rows):
+        ids = insert_rows(model, rows)
+        if after_write is not None:
+            after_write(rows, ids)
+        return ids
+
+    return GroupCommitter(
+        write_batch, GROUP_COMMIT_WINDOW, GROUP_COMMIT_MAX_ROWS, GROUP_COMMIT_TIMEOUT
+    )
+
+
+def _after_order_insert(rows, ids):
+    """
+    Add the written orders to the order summary and to the outbox.
+    """
+    apply_summary_deltas(
+        summary_deltas((row["user_id"], row["date"], row["total"]) for row in rows)
+    )
+    record_changes(
+        ORDER, CREATED, [{"id": new_id, **row} for new_id, row in zip(ids, rows)]
+    )
+
+
+def _after_order_product_insert(rows, ids):
+    """
+    Add the written order-product relationships to the outbox.
+    """
+    record_changes(
+        ORDER_PRODUCT,
+        CREATED,
+        [{"id": new_id, **row} for new_id, row in zip(ids, rows)],
+    )
+
+
+order_committer = group_committer(OrderModel, after_write=_after_order_insert)
+order_product_committer = group_committer(
+    ProductOrderModel, after_write=_after_order_product_insert
+)
+
+
+def group_commit_stats():
+    """
+    Return the counters of every group committer.
+    """
+    return {
+        "enabled": GROUP_COMMIT_ENABLED,
+        "orders": order_committer.stats(),
+        "order_products": order_product_committer.stats(),
+    }
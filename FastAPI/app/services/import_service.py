@@ -0,0 +1,368 @@
+"""
+This module imports orders and order-product relationships from CSV or
+NDJSON files, parsing them incrementally so memory stays bounded whatever
+the file size.
+
+Run it from the application directory with
+``python -m services.import_service order orders.csv --errors errors.ndjson``.
+"""
+
+# pylint: disable=E0401
+
+import argparse
+import csv
+import json
+import sys
+import uuid
+from datetime import datetime
+
+from pydantic import ValidationError
+
+from config.database import (
+    ImportModel,
+    OrderModel,
+    ProductOrderModel,
+    connection_scope,
+    database,
+)
+from config.settings import env_int
+from models.order import OrderCreate
+from models.product_order import ProductOrderCreate
+from services.bulk_insert import insert_rows
+from services.cache import order_cache, order_product_cache
+from services.executor import db_executor
+from services.outbox import CREATED, ORDER, ORDER_PRODUCT, record_changes
+from services.summary_service import apply_summary_deltas, summary_deltas
+
+IMPORT_CHUNK_SIZE = env_int("IMPORT_CHUNK_SIZE", 1000)
+IMPORT_MAX_LINE_BYTES = 65536
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+def _insert_orders(rows: list[dict]):
+    """
+    Insert validated orders with their summary rows and change events.
+
+    :return: The new order IDs, and the errors of the rows that could not be
+        inserted (none)
+    """
+    new_ids = insert_rows(OrderModel, rows)
+    apply_summary_deltas(
+        summary_deltas((row["user_id"], row["date"], row["total"]) for row in rows)
+    )
+    record_changes(
+        ORDER, CREATED, [{"id": new_id, **row} for new_id, row in zip(new_ids, rows)]
+    )
+    return new_ids, {}
+
+
+def _insert_order_products(rows: list[dict]):
+    """
+    Insert validated order-product relationships whose order exists, with
+    their change events.
+
+    :return: The new relationship IDs, and the errors of the rows
+        referencing a missing order, by position
+    """
+    order_ids = list({row["order_id"] for row in rows})
+    existing = {
+        order_id
+        for (order_id,) in OrderModel.select(OrderModel.id)
+        .where(OrderModel.id.in_(order_ids))
+        .tuples()
+    }
+    errors = {
+        position: [
+            {"type": "missing_order", "loc": ["order_id"], "msg": "Order not found"}
+        ]
+        for position, row in enumerate(rows)
+        if row["order_id"] not in existing
+    }
+    kept = [row for position, row in enumerate(rows) if position not in errors]
+    if not kept:
+        return [], errors
+    new_ids = insert_rows(ProductOrderModel, kept)
+    record_changes(
+        ORDER_PRODUCT,
+        CREATED,
+        [{"id": new_id, **row} for new_id, row in zip(new_ids, kept)],
+    )
+    return new_ids, errors
+
+
+# Schema, insert function and cache of each importable entity.
+IMPORT_TARGETS = {
+    ORDER: (OrderCreate, _insert_orders, order_cache),
+    ORDER_PRODUCT: (ProductOrderCreate, _insert_order_products, order_product_cache),
+}
+
+
+class Importer:
+    """
+    Imports one file chunk by chunk.
+
+    Every chunk is validated, then its valid rows are inserted and the
+    import progress is updated in one transaction, so a chunk is either
+    fully imported or not at all. Feeding the same file again under the
+    same import ID skips the rows already handled.
+
+    Attributes:
+        import_id (str): The ID the progress is stored under.
+        entity (str): "order" or "order_product".
+        import_format (str): "csv" or "ndjson".
+    """
+
+    def __init__(
+        self, import_id: str, entity: str, import_format: str, rows_processed: int
+    ):
+        self.import_id = import_id
+        self.entity = entity
+        self.import_format = import_format
+        self._resume_after = rows_processed
+        self._row_number = 0
+        self._skipped = 0
+        self._header = None
+
+    @staticmethod
+    @connection_scope("Importer.open")
+    def open(entity: str, import_format: str, import_id: str | None = None):
+        """
+        Start a new import, or resume the one stored under ``import_id``.
+
+        :param entity: "order" or "order_product"
+        :param import_format: "csv" or "ndjson"
+        :param import_id: The ID of the import; a new one is generated when None
+        :raises ValueError: if the entity, format or import ID is invalid
+        :return: The importer
+        """
+        if entity not in IMPORT_TARGETS:
+            raise ValueError("Unsupported import entity")
+        if import_format not in IMPORT_FORMATS:
+            raise ValueError("Unsupported import format")
+        import_id = import_id or uuid.uuid4().hex
+        if len(import_id) > 64:
+            raise ValueError("The import ID must have at most 64 characters")
+        state, _ = ImportModel.get_or_create(id=import_id, defaults={"entity": entity})
+        if state.entity != entity:
+            raise ValueError(f"Import {import_id} imports {state.entity} rows")
+        return Importer(import_id, entity, import_format, state.rows_processed)
+
+    def _parse(self, line: str):
+        """
+        Parse one data line into a dict, or return None for a CSV header.
+        CSV fields cannot contain line breaks.
+        """
+        if self.import_format == "ndjson":
+            value = json.loads(line)
+            if not isinstance(value, dict):
+                raise ValueError("Each line must be a JSON object")
+            return value
+        values = next(csv.reader([line]))
+        if self._header is None:
+            self._header = [name.strip() for name in values]
+            return None
+        # Empty cells are missing values, so the schema defaults apply.
+        return {name: value for name, value in zip(self._header, values) if value != ""}
+
+    def process(self, lines: list[str]) -> dict:
+        """
+        Import the data rows found in ``lines``, which follow the lines of
+        the previous calls.
+
+        :param lines: Consecutive lines of the file, without line breaks
+        :return: The progress after this chunk and the errors of its rows
+        """
+        schema, insert, cache = IMPORT_TARGETS[self.entity]
+        rows, numbers, errors = [], [], []
+        for line in lines:
+            line = line.lstrip("\ufeff").strip()
+            if not line:
+                continue
+            try:
+                value = self._parse(line)
+                if value is None:
+                    continue
+            except (ValueError, csv.Error) as exc:
+                self._row_number += 1
+                if self._row_number <= self._resume_after:
+                    self._skipped += 1
+                else:
+                    errors.append(
+                        {"row": self._row_number, "errors": [{"msg": str(exc)}]}
+                    )
+                continue
+            self._row_number += 1
+            if self._row_number <= self._resume_after:
+                self._skipped += 1
+                continue
+            try:
+                rows.append(schema.model_validate(value).model_dump())
+                numbers.append(self._row_number)
+            except ValidationError as exc:
+                errors.append(
+                    {
+                        "row": self._row_number,
+                        "errors": exc.errors(include_url=False, include_context=False),
+                    }
+                )
+        if not rows and not errors:
+            return self._report([], inserted=0)
+        with connection_scope("Importer.process"):
+            with database.atomic():
+                new_ids, rejected = insert(rows) if rows else ([], {})
+                errors.extend(
+                    {"row": numbers[position], "errors": row_errors}
+                    for position, row_errors in rejected.items()
+                )
+                inserted = len(rows) - len(rejected)
+                ImportModel.update(
+                    rows_processed=self._row_number,
+                    rows_inserted=ImportModel.rows_inserted + inserted,
+                    rows_failed=ImportModel.rows_failed + len(errors),
+                    updated_at=datetime.now(),
+                ).where(ImportModel.id == self.import_id).execute()
+        cache.invalidate(*new_ids)
+        self._resume_after = self._row_number
+        errors.sort(key=lambda error: error["row"])
+        return self._report(errors, inserted)
+
+    def _report(self, errors: list, inserted: int) -> dict:
+        """
+        Build the progress report of a chunk.
+        """
+        return {
+            "import_id": self.import_id,
+            "done": False,
+            "rows_processed": self._row_number,
+            "rows_skipped": self._skipped,
+            "rows_inserted": inserted,
+            "errors": errors,
+        }
+
+    @connection_scope("Importer.summary")
+    def summary(self) -> dict:
+        """
+        Return the totals of the import, across every resumed run.
+        """
+        state = ImportModel.get_by_id(self.import_id)
+        return {
+            "import_id": self.import_id,
+            "done": True,
+            "rows_processed": state.rows_processed,
+            "rows_inserted": state.rows_inserted,
+            "rows_failed": state.rows_failed,
+        }
+
+
+def _chunks_of_lines(lines, chunk_size: int):
+    """
+    Group an iterator of lines into lists of ``chunk_size`` lines.
+    """
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _lines_of(body):
+    """
+    Split an async iterator of byte chunks into decoded lines, holding at
+    most one line in memory besides the current chunk.
+    """
+    pending = b""
+    async for data in body:
+        pending += data
+        *lines, pending = pending.split(b"\n")
+        if len(pending) > IMPORT_MAX_LINE_BYTES:
+            raise ValueError(
+                f"Lines must be shorter than {IMPORT_MAX_LINE_BYTES} bytes"
+            )
+        for line in lines:
+            yield line.decode("utf-8", errors="replace")
+    if pending:
+        yield pending.decode("utf-8", errors="replace")
+
+
+async def stream_import(importer: Importer, body, chunk_size: int = IMPORT_CHUNK_SIZE):
+    """
+    Import an uploaded file while it is received.
+
+    :param importer: The importer of the file
+    :param body: The request body, as an async iterator of byte chunks
+    :param chunk_size: Lines per chunk (and transaction)
+    :return: An async generator of NDJSON progress lines: one per chunk,
+        then the totals of the import
+    """
+    chunk = []
+    try:
+        async for line in _lines_of(body):
+            chunk.append(line)
+            if len(chunk) == chunk_size:
+                report = await db_executor.run(importer.process, chunk)
+                chunk = []
+                yield json.dumps(report, default=str) + "\n"
+        if chunk:
+            report = await db_executor.run(importer.process, chunk)
+            yield json.dumps(report, default=str) + "\n"
+        summary = await db_executor.run(importer.summary)
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        # The committed chunks stay imported: sending the file again under
+        # the same import ID resumes after them.
+        yield json.dumps({"import_id": importer.import_id, "error": str(exc)}) + "\n"
+        return
+    yield json.dumps(summary) + "\n"
+
+
+def main():
+    """
+    Command-line entry point.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("entity", choices=sorted(IMPORT_TARGETS))
+    parser.add_argument("path")
+    parser.add_argument(
+        "--format",
+        choices=IMPORT_FORMATS,
+        default=None,
+        help="Defaults to the file extension",
+    )
+    parser.add_argument(
+        "--import-id", default=None, help="Resume the import stored under this ID"
+    )
+    parser.add_argument(
+        "--errors", default=None, help="Write the row errors to this file"
+    )
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+    import_format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    importer = Importer.open(args.entity, import_format, args.import_id)
+    print(f"Import {importer.import_id}", file=sys.stderr)
+    errors_file = (
+        open(args.errors, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+        if args.errors
+        else None
+    )
+    try:
+        with open(args.path, encoding="utf-8", newline="") as source:
+            for lines in _chunks_of_lines(source, args.chunk_size):
+                report = importer.process(lines)
+                for error in report["errors"]:
+                    if errors_file:
+                        errors_file.write(json.dumps(error, default=str) + "\n")
+                print(
+                    f"{report['rows_processed']} rows processed, "
+                    f"{len(report['errors'])} errors in the last chunk",
+                    file=sys.stderr,
+                )
+    finally:
+        if errors_file:
+            errors_file.close()
+    print(json.dumps(importer.summary()))
+
+
+if __name__ == "__main__":
+    main()
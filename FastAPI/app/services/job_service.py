@@ -0,0 +1,588 @@
+"""
+This module runs the long operations on orders (exports, bulk deletes,
+archival, summary rebuilds) as background jobs.
+
+Jobs are stored in the jobs table, so any worker process can report on them,
+and run on a small pool of job threads of their own: a long job never holds
+a database executor worker, and at most ``JOB_WORKERS`` of them (and at most
+the limit of their type) run at once in each process.
+"""
+
+# pylint: disable=E0401,too-many-instance-attributes
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from pydantic import ValidationError
+
+from config.database import JobModel, connection_scope
+from config.settings import env_float, env_int
+from models.job import (
+    ArchiveJobParams,
+    ExportJobParams,
+    Job,
+    PurgeJobParams,
+    RebuildSummaryJobParams,
+)
+from services.archive_service import ArchiveService
+from services.export_service import EXPORT_FORMATS, ExportService
+from services.purge_service import PurgeService
+from services.summary_service import SummaryService
+
+JOB_WORKERS = env_int("JOB_WORKERS", 2)
+JOB_MAX_EXPORTS = env_int("JOB_MAX_EXPORTS", 2)
+JOB_POLL_INTERVAL = env_float("JOB_POLL_INTERVAL_SECONDS", 2.0)
+JOB_STALE_SECONDS = env_float("JOB_STALE_SECONDS", 60.0)
+JOB_MAX_ATTEMPTS = env_int("JOB_MAX_ATTEMPTS", 3)
+JOB_EXPORT_DIR = os.getenv("JOB_EXPORT_DIR", "exports")
+JOB_CHECKPOINT_INTERVAL = 1.0
+JOB_DISPATCH_SCAN = 50
+JOB_LIST_LIMIT = 100
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+def export_path(job_id: str, export_format: str) -> str:
+    """
+    Return the path of the file written by an export job.
+    """
+    return os.path.join(JOB_EXPORT_DIR, f"{job_id}.{export_format}")
+
+
+def _write_export(chunks, path: str):
+    """
+    Write the export chunks to ``path``, yielding the bytes written so far.
+    The file only appears under its name once complete.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    partial = f"{path}.part"
+    written = 0
+    try:
+        with open(partial, "wb") as target:
+            for chunk in chunks:
+                data = chunk.encode()
+                target.write(data)
+                written += len(data)
+                yield {"bytes_written": written}
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    yield {"bytes_written": written, "file": os.path.basename(path)}
+
+
+def _export(job_id: str, params: dict):
+    """
+    Start an export of the orders, or of their lines, to a file.
+    """
+    export_format = params.pop("format")
+    if params.pop("entity") == "order_product":
+        chunks = ExportService.export_order_products(export_format, **params)
+    else:
+        chunks = ExportService.export_orders(export_format, **params)
+    return _write_export(chunks, export_path(job_id, export_format))
+
+
+def _checked(reports):
+    """
+    Re-raise the error a progress report carries, so the job fails.
+    """
+    for report in reports:
+        if "error" in report:
+            raise RuntimeError(report["error"])
+        yield report
+
+
+def _purge(job_id: str, params: dict):
+    """
+    Start a bulk delete of orders.
+    """
+    del job_id
+    return _checked(PurgeService.purge_orders(**params))
+
+
+def _archive(job_id: str, params: dict):
+    """
+    Start an archival of the old orders.
+    """
+    del job_id
+    return ArchiveService.archive_batches(**params)
+
+
+def _rebuild_summary(job_id: str, params: dict):
+    """
+    Start a rebuild of the order summary, a single step.
+    """
+    del job_id, params
+    yield {"summary_rows": SummaryService.rebuild()}
+
+
+# Parameters model, start function and per-process concurrency limit of each
+# job type. A start function validates the parameters eagerly and returns a
+# generator doing the work step by step, yielding a progress dict per step;
+# the last one is the result. Jobs may be run again from the start after an
+# interruption, so every step must be safe to repeat.
+JOB_TYPES = {
+    "export_orders": (ExportJobParams, _export, JOB_MAX_EXPORTS),
+    "purge_orders": (PurgeJobParams, _purge, 1),
+    "archive_orders": (ArchiveJobParams, _archive, 1),
+    "rebuild_summary": (RebuildSummaryJobParams, _rebuild_summary, 1),
+}
+
+
+def _params(job_type: str, params: dict) -> dict:
+    """
+    Validate the parameters of a job, as keyword arguments of its start
+    function (omitted values are left to the operation defaults).
+    """
+    schema = JOB_TYPES[job_type][0]
+    return schema.model_validate(params).model_dump(exclude_none=True)
+
+
+def _loads(value: str | None):
+    """
+    Decode an optional JSON column.
+    """
+    return json.loads(value) if value is not None else None
+
+
+def _to_job(row: JobModel) -> Job:
+    """
+    Build the job representation of a row.
+    """
+    return Job.model_construct(
+        id=row.id,
+        type=row.job_type,
+        status=row.status,
+        params=json.loads(row.params),
+        progress=_loads(row.progress),
+        result=_loads(row.result),
+        error=row.error,
+        cancel_requested=row.cancel_requested,
+        attempts=row.attempts,
+        created_at=row.created_at,
+        started_at=row.started_at,
+        finished_at=row.finished_at,
+    )
+
+
+class JobRunner:
+    """
+    Runs the queued jobs of the jobs table on a bounded pool of threads.
+
+    A dispatcher thread claims queued jobs (a conditional update, so each
+    job is claimed by one process only) while a job thread and the limit of
+    the job type are free, and marks the running jobs alive. A running job
+    is checkpointed between its steps, at most once per second: its progress
+    is saved and a requested cancellation stops it there. Jobs whose runner
+    stopped reporting for ``stale_after`` seconds (a killed process) are
+    queued again, up to ``max_attempts`` starts; jobs interrupted by a
+    graceful shutdown are queued again without counting an attempt.
+
+    Attributes:
+        max_workers (int): Maximum number of jobs running at once.
+        poll_interval (float): Seconds between two looks at the queue.
+        stale_after (float): Seconds without heartbeat after which a
+            running job is considered interrupted.
+        max_attempts (int): Starts after which an interrupted job fails.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        poll_interval: float,
+        stale_after: float,
+        max_attempts: int,
+    ):
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self._owner = None
+        self._lock = threading.Lock()
+        self._running = {}
+        self._pool = None
+        self._thread = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._counts = Counter()
+
+    def start(self):
+        """
+        Start the dispatcher and the job threads of this process.
+        """
+        if self._thread is not None:
+            return
+        self._owner = uuid.uuid4().hex
+        self._stopping.clear()
+        self._pool = ThreadPoolExecutor(
+            self.max_workers, thread_name_prefix="job-runner"
+        )
+        self._thread = threading.Thread(
+            target=self._loop, name="job-dispatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float) -> bool:
+        """
+        Stop claiming jobs and ask the running ones to stop at their next
+        step, for at most ``timeout`` seconds. They are queued again.
+
+        Returns:
+            bool: Whether every running job stopped in time.
+        """
+        if self._thread is None:
+            return True
+        deadline = time.monotonic() + timeout
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        while self._running and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._pool.shutdown(wait=False)
+        self._thread = None
+        return not self._running
+
+    def wake(self):
+        """
+        Look at the queue now instead of at the next poll.
+        """
+        self._wakeup.set()
+
+    def _loop(self):
+        """
+        Dispatcher thread: heartbeat, recover and claim jobs until stopped.
+        """
+        while not self._stopping.is_set():
+            try:
+                self._heartbeat()
+                self._recover_stale()
+                self._dispatch()
+            except Exception:  # pylint: disable=broad-exception-caught
+                # Unreachable database: retried on the next round.
+                pass
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    @connection_scope("JobRunner.heartbeat")
+    def _heartbeat(self):
+        """
+        Mark the jobs running in this process as alive.
+        """
+        with self._lock:
+            job_ids = list(self._running)
+        if job_ids:
+            JobModel.update(heartbeat_at=datetime.now()).where(
+                JobModel.id.in_(job_ids), JobModel.owner == self._owner
+            ).execute()
+
+    @connection_scope("JobRunner.recover_stale")
+    def _recover_stale(self):
+        """
+        Queue again, cancel or fail the running jobs whose runner is gone.
+        """
+        now = datetime.now()
+        stale = (JobModel.status == RUNNING) & (
+            JobModel.heartbeat_at < now - timedelta(seconds=self.stale_after)
+        )
+        JobModel.update(status=CANCELLED, finished_at=now).where(
+            stale,
+            JobModel.cancel_requested == True,  # pylint: disable=singleton-comparison
+        ).execute()
+        JobModel.update(
+            status=FAILED, error="Interrupted too many times", finished_at=now
+        ).where(stale, JobModel.attempts >= self.max_attempts).execute()
+        JobModel.update(status=QUEUED, owner=None).where(stale).execute()
+
+    @connection_scope("JobRunner.dispatch")
+    def _dispatch(self):
+        """
+        Claim and start queued jobs, oldest first, within the limits.
+        """
+        with self._lock:
+            free = self.max_workers - len(self._running)
+            running_types = Counter(self._running.values())
+        if free <= 0 or self._stopping.is_set():
+            return
+        queued = (
+            JobModel.select(JobModel.id, JobModel.job_type, JobModel.params)
+            .where(JobModel.status == QUEUED)
+            .order_by(JobModel.created_at)
+            .limit(JOB_DISPATCH_SCAN)
+        )
+        for job in list(queued):
+            if free <= 0:
+                return
+            limit = JOB_TYPES[job.job_type][2] if job.job_type in JOB_TYPES else 0
+            if running_types[job.job_type] >= limit:
+                continue
+            now = datetime.now()
+            claimed = (
+                JobModel.update(
+                    status=RUNNING,
+                    owner=self._owner,
+                    attempts=JobModel.attempts + 1,
+                    started_at=now,
+                    heartbeat_at=now,
+                )
+                .where(JobModel.id == job.id, JobModel.status == QUEUED)
+                .execute()
+            )
+            if not claimed:
+                continue
+            with self._lock:
+                self._running[job.id] = job.job_type
+                self._counts["started"] += 1
+            running_types[job.job_type] += 1
+            free -= 1
+            self._pool.submit(self._run, job.id, job.job_type, json.loads(job.params))
+
+    def _run(self, job_id: str, job_type: str, params: dict):
+        """
+        Job thread: run the steps of a job, checkpointing between them.
+        """
+        status, progress, error = SUCCEEDED, None, None
+        last_checkpoint = time.monotonic()
+        try:
+            steps = JOB_TYPES[job_type][1](job_id, _params(job_type, params))
+            try:
+                for progress in steps:
+                    if self._stopping.is_set():
+                        status = QUEUED
+                        break
+                    if time.monotonic() - last_checkpoint >= JOB_CHECKPOINT_INTERVAL:
+                        last_checkpoint = time.monotonic()
+                        if self._checkpoint(job_id, progress):
+                            status = CANCELLED
+                            break
+            finally:
+                steps.close()
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            status, error = FAILED, str(exc) or exc.__class__.__name__
+        finally:
+            try:
+                self._finish(job_id, status, progress, error)
+            except Exception:  # pylint: disable=broad-exception-caught
+                # Left running: queued again once its heartbeat is stale.
+                pass
+            with self._lock:
+                self._running.pop(job_id, None)
+                self._counts[status] += 1
+            self._wakeup.set()
+
+    @connection_scope("JobRunner.checkpoint")
+    def _checkpoint(self, job_id: str, progress: dict) -> bool:
+        """
+        Save the progress of a running job.
+
+        Returns:
+            bool: Whether the job must stop: it was cancelled, or it is no
+            longer owned by this process.
+        """
+        JobModel.update(
+            progress=json.dumps(progress, default=str), heartbeat_at=datetime.now()
+        ).where(JobModel.id == job_id, JobModel.owner == self._owner).execute()
+        row = (
+            JobModel.select(JobModel.cancel_requested, JobModel.owner)
+            .where(JobModel.id == job_id)
+            .get_or_none()
+        )
+        return row is None or row.cancel_requested or row.owner != self._owner
+
+    @connection_scope("JobRunner.finish")
+    def _finish(
+        self, job_id: str, status: str, progress: dict | None, error: str | None
+    ):
+        """
+        Record the outcome of a job, unless another process took it over.
+        """
+        now = datetime.now()
+        values = {
+            JobModel.status: status,
+            JobModel.error: error,
+            JobModel.heartbeat_at: now,
+        }
+        if progress is not None:
+            values[JobModel.progress] = json.dumps(progress, default=str)
+        if status == SUCCEEDED:
+            values[JobModel.result] = json.dumps(progress or {}, default=str)
+        if status == QUEUED:
+            # Interrupted by a shutdown: does not count as an attempt.
+            values[JobModel.owner] = None
+            values[JobModel.attempts] = JobModel.attempts - 1
+        else:
+            values[JobModel.finished_at] = now
+        JobModel.update(values).where(
+            JobModel.id == job_id, JobModel.owner == self._owner
+        ).execute()
+
+    def stats(self):
+        """
+        Return the job runner counters of this process.
+
+        Returns:
+            dict: The limits, the jobs running by type and the jobs started,
+            succeeded, failed, cancelled and queued again by a shutdown.
+        """
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "limits": {job_type: spec[2] for job_type, spec in JOB_TYPES.items()},
+                "running": dict(Counter(self._running.values())),
+                "started": self._counts["started"],
+                "succeeded": self._counts[SUCCEEDED],
+                "failed": self._counts[FAILED],
+                "cancelled": self._counts[CANCELLED],
+                "requeued": self._counts[QUEUED],
+            }
+
+
+job_runner = JobRunner(
+    max_workers=JOB_WORKERS,
+    poll_interval=JOB_POLL_INTERVAL,
+    stale_after=JOB_STALE_SECONDS,
+    max_attempts=JOB_MAX_ATTEMPTS,
+)
+
+
+def job_stats():
+    """
+    Return the job runner counters.
+    """
+    return job_runner.stats()
+
+
+class JobService:
+    """
+    Service class to submit, follow and cancel background jobs.
+    """
+
+    @staticmethod
+    @connection_scope()
+    def submit_job(job_type: str, params: dict):
+        """
+        Validate and queue a job.
+
+        :param job_type: The operation, a key of ``JOB_TYPES``
+        :param params: The parameters of the operation
+        :raises ValueError: if the type or the parameters are invalid
+        :return: The queued job
+        """
+        if job_type not in JOB_TYPES:
+            raise ValueError("Unsupported job type")
+        try:
+            stored = (
+                JOB_TYPES[job_type][0]
+                .model_validate(params)
+                .model_dump(mode="json", exclude_none=True)
+            )
+        except ValidationError as exc:
+            details = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                for error in exc.errors()
+            )
+            raise ValueError(f"Invalid job parameters: {details}") from exc
+        job_id = uuid.uuid4().hex
+        # The operation checks its own parameters before doing anything.
+        JOB_TYPES[job_type][1](job_id, _params(job_type, stored)).close()
+        row = JobModel.create(
+            id=job_id, job_type=job_type, status=QUEUED, params=json.dumps(stored)
+        )
+        job_runner.wake()
+        return _to_job(row)
+
+    @staticmethod
+    @connection_scope(idempotent=True)
+    def get_job(job_id: str):
+        """
+        Retrieve a job with its progress.
+
+        :param job_id: ID of the job
+        :return: The job, or None if not found
+        """
+        row = JobModel.get_or_none(JobModel.id == job_id)
+        return _to_job(row) if row else None
+
+    @staticmethod
+    @connection_scope(idempotent=True)
+    def list_jobs(
+        status: str | None = None,
+        job_type: str | None = None,
+        limit: int = JOB_LIST_LIMIT,
+    ):
+        """
+        Retrieve the most recent jobs.
+
+        :param status: Only jobs with this status
+        :param job_type: Only jobs of this type
+        :param limit: Maximum number of jobs
+        :return: The jobs, newest first
+        """
+        conditions = []
+        if status is not None:
+            conditions.append(JobModel.status == status)
+        if job_type is not None:
+            conditions.append(JobModel.job_type == job_type)
+        query = JobModel.select()
+        if conditions:
+            query = query.where(*conditions)
+        rows = query.order_by(JobModel.created_at.desc()).limit(
+            min(limit, JOB_LIST_LIMIT)
+        )
+        return [_to_job(row) for row in rows]
+
+    @staticmethod
+    @connection_scope()
+    def cancel_job(job_id: str):
+        """
+        Cancel a job: a queued job is cancelled at once, a running one stops
+        at its next step (a single-step job runs to completion).
+
+        :param job_id: ID of the job
+        :raises ValueError: if the job already finished
+        :return: The job, or None if not found
+        """
+        now = datetime.now()
+        cancelled = (
+            JobModel.update(status=CANCELLED, cancel_requested=True, finished_at=now)
+            .where(JobModel.id == job_id, JobModel.status == QUEUED)
+            .execute()
+        )
+        if not cancelled:
+            JobModel.update(cancel_requested=True).where(
+                JobModel.id == job_id, JobModel.status == RUNNING
+            ).execute()
+        job = JobService.get_job(job_id)
+        if job is not None and job.status in FINISHED and not job.cancel_requested:
+            raise ValueError(f"Job already {job.status}")
+        return job
+
+    @staticmethod
+    def export_file(job: Job):
+        """
+        Locate the file written by a succeeded export job.
+
+        :param job: The job
+        :raises ValueError: if the job is not a succeeded export
+        :return: A tuple with the path and the media type of the file
+        """
+        if job.type != "export_orders":
+            raise ValueError("Only export jobs have a file")
+        if job.status != SUCCEEDED:
+            raise ValueError(f"The export is {job.status}")
+        export_format = job.params.get("format", "ndjson")
+        path = export_path(job.id, export_format)
+        if not os.path.exists(path):
+            raise ValueError("The export file no longer exists")
+        return path, EXPORT_FORMATS[export_format]
@@ -0,0 +1,131 @@
+"""
+This module provides a request-scoped, DataLoader-style batching helper that
+coalesces single-entity lookups made during one request into batched queries.
+"""
+
+# pylint: disable=E0401,too-few-public-methods
+
+import functools
+
+from services.order_service import OrderService
+from services.product_order_service import OrderProductService
+
+MAX_BATCH_IDS = 500
+
+
+def parse_id_list(raw: str) -> list[int]:
+    """
+    Parse a comma-separated list of IDs such as ``"3,1,2"``.
+
+    :param raw: The raw query parameter
+    :raises ValueError: if an ID is not a positive integer or there are too many
+    :return: The IDs, in request order
+    """
+    try:
+        ids = [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError as exc:
+        raise ValueError("IDs must be comma-separated integers") from exc
+    if not ids:
+        raise ValueError("At least one ID is required")
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValueError(f"At most {MAX_BATCH_IDS} IDs can be requested at once")
+    if any(entity_id <= 0 for entity_id in ids):
+        raise ValueError("IDs must be positive")
+    return ids
+
+
+class PendingLoad:
+    """
+    Handle returned by ``BatchLoader.load``; resolving it dispatches every
+    lookup queued so far in one batch.
+    """
+
+    def __init__(self, loader, key):
+        self._loader = loader
+        self._key = key
+
+    def get(self):
+        """
+        Return the loaded value, or None when the key does not exist.
+        """
+        return self._loader.resolve(self._key)
+
+
+class BatchLoader:
+    """
+    Coalesces lookups by key into batched calls of ``batch_fn``.
+
+    Lookups are queued with ``load`` and run together the first time one of
+    them is resolved. Results are memoized for the lifetime of the loader,
+    which is meant to be a single request.
+
+    Attributes:
+        batch_fn (callable): Receives a list of keys and returns a mapping
+            from key to value; missing keys are treated as not found.
+        max_batch_size (int): Maximum number of keys per batched call.
+    """
+
+    def __init__(self, batch_fn, max_batch_size: int = MAX_BATCH_IDS):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._results = {}
+        self._queue = []
+
+    def bind(self, **kwargs) -> "BatchLoader":
+        """
+        Return a loader calling ``batch_fn`` with extra keyword arguments
+        (such as a sparse fieldset), whose results are memoized apart.
+        """
+        return BatchLoader(
+            functools.partial(self.batch_fn, **kwargs), self.max_batch_size
+        )
+
+    def load(self, key) -> PendingLoad:
+        """
+        Queue a lookup and return a handle to resolve it later.
+        """
+        if key not in self._results and key not in self._queue:
+            self._queue.append(key)
+        return PendingLoad(self, key)
+
+    def load_many(self, keys) -> list:
+        """
+        Resolve several keys at once, in the given order (None when missing).
+        """
+        handles = [self.load(key) for key in keys]
+        return [handle.get() for handle in handles]
+
+    def resolve(self, key):
+        """
+        Return the value for ``key``, dispatching the queued lookups first.
+        """
+        if key not in self._results:
+            if key not in self._queue:
+                self._queue.append(key)
+            self.dispatch()
+        return self._results.get(key)
+
+    def dispatch(self):
+        """
+        Run the queued lookups in batches of at most ``max_batch_size`` keys.
+        """
+        while self._queue:
+            batch = self._queue[: self.max_batch_size]
+            del self._queue[: self.max_batch_size]
+            found = self.batch_fn(batch)
+            for key in batch:
+                self._results[key] = found.get(key)
+
+
+def get_order_loader() -> BatchLoader:
+    """
+    Dependency building the order loader of the current request.
+    """
+    return BatchLoader(OrderService.get_orders_by_ids)
+
+
+def get_order_product_loader() -> BatchLoader:
+    """
+    Dependency building the order-product loader of the current request.
+    """
+    return BatchLoader(OrderProductService.get_order_products_by_ids)
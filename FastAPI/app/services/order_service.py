@@ -5,9 +5,81 @@ retrieving, creating, updating, and deleting orders in the database.
 
 # pylint: disable=E0401
 
+from datetime import date as date_type
+
 from peewee import IntegrityError, DoesNotExist
-from models.order import Order
-from config.database import OrderModel
+from pydantic import ValidationError
+from models.order import Order, OrderCreate, OrderWithProducts
+from models.product_order import OrderLine, ProductOrder
+from config.database import (
+    ArchivedOrderModel,
+    ArchivedProductOrderModel,
+    OrderModel,
+    ProductOrderModel,
+    connection_scope,
+    database,
+)
+from services.bulk_insert import insert_rows
+from services.cache import order_cache, order_product_cache
+from services.filters import order_conditions
+from services.group_commit import GROUP_COMMIT_ENABLED, order_committer
+from services.outbox import (
+    CREATED,
+    DELETED,
+    ORDER,
+    ORDER_PRODUCT,
+    UPDATED,
+    deleted_rows,
+    record_changes,
+)
+from services.summary_service import apply_summary_deltas, summary_deltas
+from helpers.fieldsets import project_rows, select_columns
+from helpers.pagination import (
+    DEFAULT_PAGE_SIZE,
+    clamp_limit,
+    decode_cursor,
+    encode_cursor,
+    keyset_rows,
+)
+
+BULK_MAX_ITEMS = 10000
+
+
+@connection_scope(idempotent=True)
+def _load_order(order_id: int):
+    """
+    Read an order from the database, bypassing the cache, falling back to
+    the archive when it is not in the hot table.
+    """
+    try:
+        row = OrderModel.select().where(OrderModel.id == order_id).dicts().first()
+        if row is None:
+            row = (
+                ArchivedOrderModel.select()
+                .where(ArchivedOrderModel.id == order_id)
+                .dicts()
+                .get()
+            )
+        return Order.model_construct(**row)
+    except DoesNotExist:
+        return None
+    except Exception as exc:
+        raise RuntimeError("Error retrieving the order") from exc
+
+
+def _lock_order(order_id: int):
+    """
+    Read the summary key and total of an order inside the current
+    transaction, locking the row where the database supports it.
+
+    :return: The ``(user_id, date, total)`` tuple, or None if not found
+    """
+    query = OrderModel.select(
+        OrderModel.user_id, OrderModel.date, OrderModel.total
+    ).where(OrderModel.id == order_id)
+    if database.for_update:
+        query = query.for_update()
+    return query.tuples().first()
 
 
 class OrderService:
@@ -16,20 +88,134 @@ class OrderService:
     """
 
     @staticmethod
-    def get_all_orders():
+    @connection_scope(read=True)
+    def get_all_orders(
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        include_archived: bool = False,
+        fields: list[str] | None = None,
+        **filters,
+    ):
+        """
+        Retrieve a page of orders using keyset pagination on the order ID.
+
+        :param limit: Maximum number of orders to return (capped to the hard maximum)
+        :param cursor: Opaque cursor returned by the previous page, or None
+        :param include_archived: Also list the archived orders, merged by ID
+        :param fields: Only read these columns and return them as plain dicts,
+            without building the models (None: full orders)
+        :param filters: Optional user_id, date_from, date_to, min_total and
+            max_total filters, applied as SQL conditions
+        :raises ValueError: if the limit, the cursor or a filter range is invalid
+        :return: A tuple with the list of orders and the cursor of the next page
+            (None when there are no more orders)
+        """
+        limit = clamp_limit(limit)
+        after_id = decode_cursor(cursor)
+        models = [OrderModel, ArchivedOrderModel] if include_archived else [OrderModel]
+        sources = [
+            (model, order_conditions(**filters, model=model)) for model in models
+        ]
+        try:
+            rows = keyset_rows(sources, after_id, limit, fields)
+        except Exception as exc:
+            raise RuntimeError("Error retrieving orders") from exc
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["id"])
+        if fields is not None:
+            return project_rows(rows, fields), next_cursor
+        # Rows come from the database with the right types: skip validation.
+        return [Order.model_construct(**row) for row in rows], next_cursor
+
+    @staticmethod
+    @connection_scope(read=True)
+    def get_orders_by_ids(order_ids: list[int], fields: list[str] | None = None):
         """
-        Retrieve all orders from the database.
+        Retrieve several orders with a single ``IN`` query, and a second one
+        on the archive for the IDs missing from the hot table.
+
+        :param order_ids: IDs of the orders to retrieve
+        :param fields: Only read these fields, as dicts rather than orders
+        :return: A mapping from order ID to order; missing IDs are absent
         """
+        if not order_ids:
+            return {}
         try:
-            orders = list(OrderModel.select())
-            return [Order(**order.__data__) for order in orders]
+            rows = (
+                OrderModel.select(*select_columns(OrderModel, fields))
+                .where(OrderModel.id.in_(list(order_ids)))
+                .dicts()
+            )
+            found = {row["id"]: row for row in rows}
+            missing = [order_id for order_id in order_ids if order_id not in found]
+            if missing:
+                archived = (
+                    ArchivedOrderModel.select(
+                        *select_columns(ArchivedOrderModel, fields)
+                    )
+                    .where(ArchivedOrderModel.id.in_(missing))
+                    .dicts()
+                )
+                found.update({row["id"]: row for row in archived})
+            if fields is not None:
+                return dict(zip(found, project_rows(list(found.values()), fields)))
+            return {
+                order_id: Order.model_construct(**row)
+                for order_id, row in found.items()
+            }
         except Exception as exc:
             raise RuntimeError("Error retrieving orders") from exc
 
+    @staticmethod
+    @connection_scope(read=True)
+    def with_products(orders: list[Order]):
+        """
+        Attach the order-product relationships to a list of orders.
+
+        The lines of every order are read with a single ``IN`` query, so the
+        number of queries does not depend on the number of orders. Orders
+        without lines in the hot table may be archived ones (their lines
+        are archived with them): one more query looks them up there.
+
+        :param orders: The orders to complete
+        :return: The orders with their product lines, in the same order
+        """
+        if not orders:
+            return []
+        lines_by_order = {order.id: [] for order in orders}
+        try:
+            for model in (ProductOrderModel, ArchivedProductOrderModel):
+                order_ids = [
+                    order_id for order_id, lines in lines_by_order.items() if not lines
+                ]
+                if not order_ids:
+                    break
+                lines = (
+                    model.select()
+                    .where(model.order_id.in_(order_ids))
+                    .order_by(model.id)
+                    .dicts()
+                )
+                for line in lines:
+                    lines_by_order[line["order_id"]].append(
+                        ProductOrder.model_construct(**line)
+                    )
+        except Exception as exc:
+            raise RuntimeError("Error retrieving the order products") from exc
+        return [
+            OrderWithProducts.model_construct(
+                **order.__dict__, products=lines_by_order[order.id]
+            )
+            for order in orders
+        ]
+
     @staticmethod
     def get_order_by_id(order_id: int):
         """
-        Retrieve a specific order by its ID.
+        Retrieve a specific order by its ID, served from the order cache
+        when possible.
 
         :param order_id: ID of the order to retrieve
         :raises ValueError: if the order_id is invalid
@@ -37,16 +223,11 @@ class OrderService:
         """
         if order_id <= 0:
             raise ValueError("Invalid order ID")
-        try:
-            order = OrderModel.get(OrderModel.id == order_id)
-            return Order(**order.__data__)
-        except DoesNotExist:
-            return None
-        except Exception as exc:
-            raise RuntimeError("Error retrieving the order") from exc
+        return order_cache.get_or_load(order_id, lambda: _load_order(order_id))
 
     @staticmethod
-    def create_order(user_id: int, date: str, total: float):
+    @connection_scope()
+    def create_order(user_id: int, date: date_type, total: float):
         """
         Create a new order in the database.
 
@@ -58,14 +239,124 @@ class OrderService:
         """
         if total < 0:
             raise ValueError("Total must be positive")
+        row = {"user_id": user_id, "date": date, "total": total}
         try:
-            new_order = OrderModel.create(user_id=user_id, date=date, total=total)
-            return Order(**new_order.__data__)
+            if GROUP_COMMIT_ENABLED:
+                new_id = order_committer.submit(row)
+            else:
+                with database.atomic():
+                    new_id = OrderModel.create(**row).id
+                    apply_summary_deltas(summary_deltas([(user_id, date, total)]))
+                    record_changes(ORDER, CREATED, [{"id": new_id, **row}])
         except IntegrityError as exc:
             raise ValueError("Error creating the order") from exc
+        order_cache.invalidate(new_id)
+        return Order(id=new_id, **row)
 
     @staticmethod
-    def update_order(order_id: int, user_id: int, date: str, total: float):
+    @connection_scope()
+    def create_order_with_products(
+        user_id: int, date: date_type, total: float, products: list[OrderLine]
+    ):
+        """
+        Create an order and all of its product lines in a single transaction.
+
+        :param user_id: ID of the user placing the order
+        :param date: The date of the order
+        :param total: The total amount of the order
+        :param products: The product lines of the order
+        :raises ValueError: if the total is negative or the insert fails
+        :return: The created order with its order-product relationships
+        """
+        if total < 0:
+            raise ValueError("Total must be positive")
+        try:
+            with database.atomic():
+                new_order = OrderModel.create(user_id=user_id, date=date, total=total)
+                lines = [
+                    {
+                        "order_id": new_order.id,
+                        "product_id": line.product_id,
+                        "quantity": line.quantity,
+                    }
+                    for line in products
+                ]
+                line_ids = insert_rows(ProductOrderModel, lines)
+                apply_summary_deltas(summary_deltas([(user_id, date, total)]))
+                record_changes(ORDER, CREATED, [new_order.__data__])
+                record_changes(
+                    ORDER_PRODUCT,
+                    CREATED,
+                    [{"id": line_id, **line} for line_id, line in zip(line_ids, lines)],
+                )
+        except IntegrityError as exc:
+            raise ValueError("Error creating the order with its products") from exc
+        order_cache.invalidate(new_order.id)
+        order_product_cache.invalidate(*line_ids)
+        return OrderWithProducts(
+            **new_order.__data__,
+            products=[
+                ProductOrder(id=line_id, **line)
+                for line_id, line in zip(line_ids, lines)
+            ],
+        )
+
+    @staticmethod
+    @connection_scope()
+    def create_orders_bulk(items: list, all_or_nothing: bool = False):
+        """
+        Validate and create many orders in a single transaction.
+
+        Every item is validated in one pass; the valid ones are written with
+        chunked multi-row INSERTs inside one transaction.
+
+        :param items: The raw order payloads
+        :param all_or_nothing: Write nothing if any item is invalid
+        :raises ValueError: if there are too many items or the insert fails
+        :return: A tuple with the generated IDs aligned with ``items`` (None
+            for invalid items, or for every item when nothing was written)
+            and the per-item validation errors
+        """
+        if len(items) > BULK_MAX_ITEMS:
+            raise ValueError(f"At most {BULK_MAX_ITEMS} orders can be created at once")
+        rows, positions, errors = [], [], []
+        for index, item in enumerate(items):
+            try:
+                rows.append(OrderCreate.model_validate(item).model_dump())
+                positions.append(index)
+            except ValidationError as exc:
+                errors.append(
+                    {
+                        "index": index,
+                        "errors": exc.errors(include_url=False, include_context=False),
+                    }
+                )
+        ids = [None] * len(items)
+        if not rows or (errors and all_or_nothing):
+            return ids, errors
+        try:
+            with database.atomic():
+                new_ids = insert_rows(OrderModel, rows)
+                apply_summary_deltas(
+                    summary_deltas(
+                        (row["user_id"], row["date"], row["total"]) for row in rows
+                    )
+                )
+                record_changes(
+                    ORDER,
+                    CREATED,
+                    [{"id": new_id, **row} for new_id, row in zip(new_ids, rows)],
+                )
+        except IntegrityError as exc:
+            raise ValueError("Error creating the orders") from exc
+        order_cache.invalidate(*new_ids)
+        for position, new_id in zip(positions, new_ids):
+            ids[position] = new_id
+        return ids, errors
+
+    @staticmethod
+    @connection_scope()
+    def update_order(order_id: int, user_id: int, date: date_type, total: float):
         """
         Update an existing order in the database.
 
@@ -81,19 +372,41 @@ class OrderService:
         if order_id <= 0:
             raise ValueError("Invalid order ID")
         try:
-            rows_updated = (
-                OrderModel.update(user_id=user_id, date=date, total=total)
-                .where(OrderModel.id == order_id)
-                .execute()
-            )
-            if rows_updated == 0:
-                return None
+            with database.atomic():
+                previous = _lock_order(order_id)
+                if previous is None:
+                    return None
+                OrderModel.update(user_id=user_id, date=date, total=total).where(
+                    OrderModel.id == order_id
+                ).execute()
+                # Move the order from its previous summary row to the new one.
+                deltas = summary_deltas([previous], sign=-1)
+                for key, (count, amount) in summary_deltas(
+                    [(user_id, date, total)]
+                ).items():
+                    removed_count, removed_amount = deltas.get(key, (0, 0.0))
+                    deltas[key] = (removed_count + count, removed_amount + amount)
+                apply_summary_deltas(deltas)
+                record_changes(
+                    ORDER,
+                    UPDATED,
+                    [
+                        {
+                            "id": order_id,
+                            "user_id": user_id,
+                            "date": date,
+                            "total": total,
+                        }
+                    ],
+                )
+            order_cache.invalidate(order_id)
             updated_order = OrderModel.get(OrderModel.id == order_id)
             return Order(**updated_order.__data__)
         except IntegrityError as exc:
             raise ValueError("Error updating the order") from exc
 
     @staticmethod
+    @connection_scope()
     def delete_order(order_id: int):
         """
         Delete an order from the database by its ID.
@@ -105,9 +418,27 @@ class OrderService:
         if order_id <= 0:
             raise ValueError("Invalid order ID")
         try:
-            rows_deleted = (
-                OrderModel.delete().where(OrderModel.id == order_id).execute()
-            )
+            with database.atomic():
+                previous = _lock_order(order_id)
+                # The lines go away with the order (ON DELETE CASCADE), so they
+                # are dropped from their cache as well. They are read once the
+                # order is locked: a line inserted meanwhile waits for the
+                # lock, so this is exactly the set the cascade removes.
+                line_ids = [
+                    line_id
+                    for (line_id,) in ProductOrderModel.select(ProductOrderModel.id)
+                    .where(ProductOrderModel.order_id == order_id)
+                    .tuples()
+                ]
+                rows_deleted = (
+                    OrderModel.delete().where(OrderModel.id == order_id).execute()
+                )
+                if previous is not None:
+                    apply_summary_deltas(summary_deltas([previous], sign=-1))
+                    record_changes(ORDER_PRODUCT, DELETED, deleted_rows(line_ids))
+                    record_changes(ORDER, DELETED, deleted_rows([order_id]))
+            order_cache.invalidate(order_id)
+            order_product_cache.invalidate(*line_ids)
             return rows_deleted > 0
         except Exception as exc:
             raise RuntimeError("Error deleting the order") from exc
@@ -0,0 +1,52 @@
+"""
+This module records the order and order-product changes in the outbox
+table, in the transaction of the change itself, for the change feed.
+"""
+
+# pylint: disable=E0401
+
+import json
+
+from config.database import OrderChangeModel
+from services.bulk_insert import insert_rows
+
+ORDER = "order"
+ORDER_PRODUCT = "order_product"
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+
+def record_changes(entity: str, action: str, rows: list[dict]):
+    """
+    Append one change event per row to the outbox.
+
+    Must run inside the transaction of the change it describes, so an event
+    is published if and only if the change is committed.
+
+    :param entity: ORDER or ORDER_PRODUCT
+    :param action: CREATED, UPDATED or DELETED
+    :param rows: The changed rows, with their ``id``; only the ``id`` is
+        used for deletions
+    """
+    if not rows:
+        return
+    insert_rows(
+        OrderChangeModel,
+        [
+            {
+                "entity": entity,
+                "entity_id": row["id"],
+                "action": action,
+                "data": None if action == DELETED else json.dumps(row, default=str),
+            }
+            for row in rows
+        ],
+    )
+
+
+def deleted_rows(ids) -> list[dict]:
+    """
+    Build the rows of a deletion event from the deleted IDs.
+    """
+    return [{"id": entity_id} for entity_id in ids]
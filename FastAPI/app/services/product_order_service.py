@@ -4,12 +4,62 @@ including retrieving, creating, updating, and deleting these relationships
 in the database.
 """
 
-
 # pylint: disable=E0401
 
 from peewee import IntegrityError, DoesNotExist
 from models.product_order import ProductOrder
-from config.database import ProductOrderModel  # type: ignore
+from config.database import (  # type: ignore
+    ArchivedProductOrderModel,
+    ProductOrderModel,
+    connection_scope,
+    database,
+)
+from helpers.fieldsets import project_rows, select_columns
+from helpers.pagination import (
+    DEFAULT_PAGE_SIZE,
+    clamp_limit,
+    decode_cursor,
+    encode_cursor,
+    keyset_rows,
+)
+from services.cache import order_product_cache
+from services.filters import order_product_conditions
+from services.group_commit import GROUP_COMMIT_ENABLED, order_product_committer
+from services.outbox import (
+    CREATED,
+    DELETED,
+    ORDER_PRODUCT,
+    UPDATED,
+    deleted_rows,
+    record_changes,
+)
+
+
+@connection_scope(idempotent=True)
+def _load_order_product(order_product_id: int):
+    """
+    Read an order-product relationship from the database, bypassing the
+    cache, falling back to the archive when it is not in the hot table.
+    """
+    try:
+        row = (
+            ProductOrderModel.select()
+            .where(ProductOrderModel.id == order_product_id)
+            .dicts()
+            .first()
+        )
+        if row is None:
+            row = (
+                ArchivedProductOrderModel.select()
+                .where(ArchivedProductOrderModel.id == order_product_id)
+                .dicts()
+                .get()
+            )
+        return ProductOrder.model_construct(**row)
+    except DoesNotExist:
+        return None
+    except Exception as exc:
+        raise RuntimeError("Error retrieving the order-product relationship") from exc
 
 
 class OrderProductService:
@@ -18,22 +68,97 @@ class OrderProductService:
     """
 
     @staticmethod
-    def get_order_products():
+    @connection_scope(read=True)
+    def get_order_products(
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        include_archived: bool = False,
+        fields: list[str] | None = None,
+        **filters,
+    ):
         """
-        Retrieve all order-product relationships from the database.
+        Retrieve a page of order-product relationships using keyset pagination.
 
-        :return: List of order-product relationships
+        :param limit: Maximum number of relationships to return (capped to the hard maximum)
+        :param cursor: Opaque cursor returned by the previous page, or None
+        :param include_archived: Also list the archived relationships, merged by ID
+        :param fields: Only read these columns and return them as plain dicts,
+            without building the models (None: full relationships)
+        :param filters: Optional order_id and product_id filters, applied as
+            SQL conditions
+        :raises ValueError: if the limit or the cursor is invalid
+        :return: A tuple with the list of order-product relationships and the
+            cursor of the next page (None when there are no more relationships)
         """
+        limit = clamp_limit(limit)
+        after_id = decode_cursor(cursor)
+        models = [ProductOrderModel]
+        if include_archived:
+            models.append(ArchivedProductOrderModel)
+        sources = [
+            (model, order_product_conditions(**filters, model=model))
+            for model in models
+        ]
         try:
-            order_products = list(ProductOrderModel.select())
-            return [ProductOrder(**order.__data__) for order in order_products]
+            rows = keyset_rows(sources, after_id, limit, fields)
+        except Exception as exc:
+            raise RuntimeError("Error retrieving order-product relationships") from exc
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["id"])
+        if fields is not None:
+            return project_rows(rows, fields), next_cursor
+        # Rows come from the database with the right types: skip validation.
+        return [ProductOrder.model_construct(**row) for row in rows], next_cursor
+
+    @staticmethod
+    @connection_scope(read=True)
+    def get_order_products_by_ids(
+        order_product_ids: list[int], fields: list[str] | None = None
+    ):
+        """
+        Retrieve several order-product relationships with a single ``IN``
+        query, and a second one on the archive for the IDs missing from the
+        hot table.
+
+        :param order_product_ids: IDs of the order-product relationships to retrieve
+        :param fields: Only read these fields, as dicts rather than relationships
+        :return: A mapping from ID to order-product relationship; missing IDs are absent
+        """
+        if not order_product_ids:
+            return {}
+        try:
+            rows = (
+                ProductOrderModel.select(*select_columns(ProductOrderModel, fields))
+                .where(ProductOrderModel.id.in_(list(order_product_ids)))
+                .dicts()
+            )
+            found = {row["id"]: row for row in rows}
+            missing = [line_id for line_id in order_product_ids if line_id not in found]
+            if missing:
+                archived = (
+                    ArchivedProductOrderModel.select(
+                        *select_columns(ArchivedProductOrderModel, fields)
+                    )
+                    .where(ArchivedProductOrderModel.id.in_(missing))
+                    .dicts()
+                )
+                found.update({row["id"]: row for row in archived})
+            if fields is not None:
+                return dict(zip(found, project_rows(list(found.values()), fields)))
+            return {
+                line_id: ProductOrder.model_construct(**row)
+                for line_id, row in found.items()
+            }
         except Exception as exc:
             raise RuntimeError("Error retrieving order-product relationships") from exc
 
     @staticmethod
     def get_order_product_by_id(order_product_id: int):
         """
-        Retrieve an order-product relationship by its ID.
+        Retrieve an order-product relationship by its ID, served from the
+        order-product cache when possible.
 
         :param order_product_id: ID of the order-product relationship to retrieve
         :raises ValueError: if the order_product_id is invalid
@@ -41,15 +166,12 @@ class OrderProductService:
         """
         if order_product_id <= 0:
             raise ValueError("Invalid order-product ID")
-        try:
-            order_product = ProductOrderModel.get(ProductOrderModel.id == order_product_id)
-            return ProductOrder(**order_product.__data__)
-        except DoesNotExist:
-            return None
-        except Exception as exc:
-            raise RuntimeError("Error retrieving the order-product relationship") from exc
+        return order_product_cache.get_or_load(
+            order_product_id, lambda: _load_order_product(order_product_id)
+        )
 
     @staticmethod
+    @connection_scope()
     def create_order_product(order_id: int, product_id: int, quantity: int):
         """
         Create a new order-product relationship in the database.
@@ -62,18 +184,24 @@ class OrderProductService:
         """
         if quantity <= 0:
             raise ValueError("Quantity must be greater than zero")
+        row = {"order_id": order_id, "product_id": product_id, "quantity": quantity}
         try:
-            new_order_product = ProductOrderModel.create(
-                order_id=order_id,
-                product_id=product_id,
-                quantity=quantity
-            )
-            return ProductOrder(**new_order_product.__data__)
+            if GROUP_COMMIT_ENABLED:
+                new_id = order_product_committer.submit(row)
+            else:
+                with database.atomic():
+                    new_id = ProductOrderModel.create(**row).id
+                    record_changes(ORDER_PRODUCT, CREATED, [{"id": new_id, **row}])
         except IntegrityError as exc:
             raise ValueError("Error creating the order-product relationship") from exc
+        order_product_cache.invalidate(new_id)
+        return ProductOrder(id=new_id, **row)
 
     @staticmethod
-    def update_order_product(order_product_id: int, order_id: int, product_id: int, quantity: int):
+    @connection_scope()
+    def update_order_product(
+        order_product_id: int, order_id: int, product_id: int, quantity: int
+    ):
         """
         Update an existing order-product relationship.
 
@@ -89,19 +217,39 @@ class OrderProductService:
         if order_product_id <= 0:
             raise ValueError("Invalid order-product ID")
         try:
-            rows_updated = ProductOrderModel.update(
-                order_id=order_id,
-                product_id=product_id,
-                quantity=quantity
-            ).where(ProductOrderModel.id == order_product_id).execute()
+            with database.atomic():
+                rows_updated = (
+                    ProductOrderModel.update(
+                        order_id=order_id, product_id=product_id, quantity=quantity
+                    )
+                    .where(ProductOrderModel.id == order_product_id)
+                    .execute()
+                )
+                if rows_updated:
+                    record_changes(
+                        ORDER_PRODUCT,
+                        UPDATED,
+                        [
+                            {
+                                "id": order_product_id,
+                                "order_id": order_id,
+                                "product_id": product_id,
+                                "quantity": quantity,
+                            }
+                        ],
+                    )
+            order_product_cache.invalidate(order_product_id)
             if rows_updated == 0:
                 return None
-            updated_order_product = ProductOrderModel.get(ProductOrderModel.id == order_product_id)
+            updated_order_product = ProductOrderModel.get(
+                ProductOrderModel.id == order_product_id
+            )
             return ProductOrder(**updated_order_product.__data__)
         except IntegrityError as exc:
             raise ValueError("Error updating the order-product relationship") from exc
 
     @staticmethod
+    @connection_scope()
     def delete_order_product(order_product_id: int):
         """
         Delete an order-product relationship from the database by its ID.
@@ -113,9 +261,17 @@ class OrderProductService:
         if order_product_id <= 0:
             raise ValueError("Invalid order-product ID")
         try:
-            rows_deleted = ProductOrderModel.delete().where(
-                ProductOrderModel.id == order_product_id
-            ).execute()
+            with database.atomic():
+                rows_deleted = (
+                    ProductOrderModel.delete()
+                    .where(ProductOrderModel.id == order_product_id)
+                    .execute()
+                )
+                if rows_deleted:
+                    record_changes(
+                        ORDER_PRODUCT, DELETED, deleted_rows([order_product_id])
+                    )
+            order_product_cache.invalidate(order_product_id)
             return rows_deleted > 0
         except Exception as exc:
             raise RuntimeError("Error deleting the order-product relationship") from exc
@@ -0,0 +1,191 @@
+"""
+This module provides the bulk delete of orders: the selected orders are
+deleted in bounded chunks of short transactions, their lines first, so a
+large cleanup never holds locks long enough to stall the online writes.
+"""
+
+# pylint: disable=E0401,too-few-public-methods
+
+import bisect
+
+from config.database import OrderModel, ProductOrderModel, connection_scope, database
+from config.settings import env_int
+from services.cache import order_cache, order_product_cache
+from services.filters import order_conditions
+from services.outbox import DELETED, ORDER, ORDER_PRODUCT, deleted_rows, record_changes
+from services.summary_service import apply_summary_deltas, summary_deltas
+
+PURGE_CHUNK_SIZE = env_int("PURGE_CHUNK_SIZE", 500)
+PURGE_MAX_CHUNK_SIZE = 5000
+PURGE_MAX_IDS = 100000
+
+
+def _next_order_ids(conditions, ids, after_id: int, chunk_size: int) -> list:
+    """
+    Return the IDs of the next ``chunk_size`` orders to delete, after
+    ``after_id``: taken from the sorted ID list when there is one (missing
+    IDs are skipped by the deletes), read from the database otherwise.
+    """
+    if ids is not None:
+        start = bisect.bisect_right(ids, after_id)
+        return ids[start : start + chunk_size]
+    query = OrderModel.select(OrderModel.id).where(
+        OrderModel.id > after_id, *conditions
+    )
+    return [
+        order_id
+        for (order_id,) in query.order_by(OrderModel.id).limit(chunk_size).tuples()
+    ]
+
+
+def _delete_lines(order_ids: list, conditions, chunk_size: int) -> int:
+    """
+    Delete the lines of the chunk orders that still match the filters, in
+    transactions of at most ``chunk_size`` lines.
+
+    :return: The number of lines deleted
+    """
+    still_selected = OrderModel.select(OrderModel.id).where(
+        OrderModel.id.in_(order_ids), *conditions
+    )
+    line_ids = [
+        line_id
+        for (line_id,) in ProductOrderModel.select(ProductOrderModel.id)
+        .where(ProductOrderModel.order_id.in_(still_selected))
+        .tuples()
+    ]
+    deleted = 0
+    for start in range(0, len(line_ids), chunk_size):
+        batch = line_ids[start : start + chunk_size]
+        with database.atomic():
+            deleted += (
+                ProductOrderModel.delete()
+                .where(ProductOrderModel.id.in_(batch))
+                .execute()
+            )
+            record_changes(ORDER_PRODUCT, DELETED, deleted_rows(batch))
+        order_product_cache.invalidate(*batch)
+    return deleted
+
+
+def _delete_orders(order_ids: list, conditions) -> tuple:
+    """
+    Delete the chunk orders that still match the filters, with their
+    summary rows, in one transaction.
+
+    :return: The numbers of orders deleted and of lines deleted with them
+    """
+    with database.atomic():
+        query = OrderModel.select(
+            OrderModel.id, OrderModel.user_id, OrderModel.date, OrderModel.total
+        ).where(OrderModel.id.in_(order_ids), *conditions)
+        if database.for_update:
+            query = query.for_update()
+        rows = list(query.tuples())
+        if not rows:
+            return 0, 0
+        deleted_ids = [row[0] for row in rows]
+        # Lines added since _delete_lines go away with their order (ON DELETE
+        # CASCADE). They are read once the orders are locked, so this is
+        # exactly the set the cascade removes.
+        line_ids = [
+            line_id
+            for (line_id,) in ProductOrderModel.select(ProductOrderModel.id)
+            .where(ProductOrderModel.order_id.in_(deleted_ids))
+            .tuples()
+        ]
+        deleted = OrderModel.delete().where(OrderModel.id.in_(deleted_ids)).execute()
+        apply_summary_deltas(summary_deltas([row[1:] for row in rows], sign=-1))
+        record_changes(ORDER_PRODUCT, DELETED, deleted_rows(line_ids))
+        record_changes(ORDER, DELETED, deleted_rows(deleted_ids))
+    order_cache.invalidate(*deleted_ids)
+    order_product_cache.invalidate(*line_ids)
+    return deleted, len(line_ids)
+
+
+@connection_scope("PurgeService.purge_orders")
+def _purge_chunk(conditions, ids, after_id: int, chunk_size: int):
+    """
+    Delete the next chunk of orders.
+
+    :return: The ``(last_id, orders_deleted, lines_deleted)`` of the chunk,
+        or None when no order is left
+    """
+    order_ids = _next_order_ids(conditions, ids, after_id, chunk_size)
+    if not order_ids:
+        return None
+    lines_deleted = _delete_lines(order_ids, conditions, chunk_size)
+    orders_deleted, lines_cascaded = _delete_orders(order_ids, conditions)
+    return order_ids[-1], orders_deleted, lines_deleted + lines_cascaded
+
+
+def _purge(conditions, ids, after_id: int, chunk_size: int):
+    """
+    Yield a progress report after every chunk, then a final one. A failing
+    chunk ends the purge with a report carrying the error; the chunks
+    before it stay deleted.
+    """
+    report = {"done": False, "chunks": 0, "orders_deleted": 0, "lines_deleted": 0}
+    while True:
+        try:
+            result = _purge_chunk(conditions, ids, after_id, chunk_size)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            yield {**report, "last_id": after_id, "error": str(exc)}
+            return
+        if result is None:
+            break
+        after_id, orders_deleted, lines_deleted = result
+        report["chunks"] += 1
+        report["orders_deleted"] += orders_deleted
+        report["lines_deleted"] += lines_deleted
+        yield {**report, "last_id": after_id}
+    yield {**report, "done": True, "last_id": after_id}
+
+
+class PurgeService:
+    """
+    Service class to delete large sets of orders in bounded chunks.
+    """
+
+    @staticmethod
+    def purge_orders(
+        ids: list[int] | None = None,
+        after_id: int = 0,
+        chunk_size: int = PURGE_CHUNK_SIZE,
+        **filters,
+    ):
+        """
+        Build a generator deleting every order selected by the ID list and
+        the filters, in ascending ID order.
+
+        Each chunk reads the next ``chunk_size`` order IDs, deletes their
+        lines in short transactions, then deletes the orders and their
+        summary rows in one more; the connection is given back between
+        chunks. Every statement re-checks the filters, so orders changed
+        meanwhile are left alone. A progress report is yielded after each
+        chunk: an interrupted purge is resumed by passing its last
+        ``last_id`` as ``after_id``, or simply by running it again.
+
+        :param ids: Only delete orders with these IDs
+        :param after_id: Only delete orders with a greater ID
+        :param chunk_size: Orders (and lines) per transaction
+        :param filters: Optional user_id, date_from, date_to, min_total and
+            max_total filters
+        :raises ValueError: if nothing selects the orders, a filter range
+            is invalid or there are too many IDs
+        :return: A generator of progress dicts
+        """
+        conditions = order_conditions(**filters)
+        if ids is not None:
+            if not ids:
+                raise ValueError("At least one ID is required")
+            if len(ids) > PURGE_MAX_IDS:
+                raise ValueError(f"At most {PURGE_MAX_IDS} IDs can be deleted at once")
+            ids = sorted(set(ids))
+        elif not conditions:
+            raise ValueError("An ID list or at least one filter is required")
+        if not 1 <= chunk_size <= PURGE_MAX_CHUNK_SIZE:
+            raise ValueError(f"chunk_size must be between 1 and {PURGE_MAX_CHUNK_SIZE}")
+        if after_id < 0:
+            raise ValueError("after_id must not be negative")
+        return _purge(conditions, ids, after_id, chunk_size)
@@ -0,0 +1,188 @@
+"""
+This module maintains the per-user, per-day order summary table and serves
+the order aggregates from it.
+
+Run it from the application directory with ``python -m services.summary_service``
+to rebuild the summary from the orders table.
+"""
+
+# pylint: disable=E0401
+
+from collections import defaultdict
+from datetime import date
+
+from peewee import SQL, MySQLDatabase, Select, fn
+
+from config.database import (
+    ArchivedOrderModel,
+    OrderModel,
+    OrderSummaryModel,
+    connection_scope,
+    database,
+)
+from models.order import OrderSummary
+
+SUMMARY_GROUPS = ("user", "day", "user_day")
+
+
+def apply_summary_deltas(deltas):
+    """
+    Add order count and total deltas to the summary rows.
+
+    Must run inside the transaction of the order write it accounts for, so
+    the summary never drifts from the orders table.
+
+    :param deltas: A mapping from ``(user_id, date)`` to ``(count, total)``
+        deltas; negative values remove orders from the summary
+    """
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    count_field, sum_field = OrderSummaryModel.order_count, OrderSummaryModel.total_sum
+    # MySQL resolves the conflict on the primary key by itself; the other
+    # backends need it spelled out.
+    conflict_target = None
+    if not isinstance(database, MySQLDatabase):
+        conflict_target = [OrderSummaryModel.user_id, OrderSummaryModel.date]
+    # Every writer upserts the rows in the same (key) order, so concurrent
+    # writers touching the same rows wait for each other instead of
+    # deadlocking.
+    for (user_id, day), (count, total) in sorted(deltas.items()):
+        OrderSummaryModel.insert(
+            user_id=user_id, date=day, order_count=count, total_sum=total
+        ).on_conflict(
+            conflict_target=conflict_target,
+            update={count_field: count_field + count, sum_field: sum_field + total},
+        ).execute()
+    touched_users = {user_id for user_id, _ in deltas}
+    OrderSummaryModel.delete().where(
+        OrderSummaryModel.user_id.in_(list(touched_users)),
+        OrderSummaryModel.order_count <= 0,
+    ).execute()
+
+
+def summary_deltas(rows, sign: int = 1):
+    """
+    Group orders into summary deltas.
+
+    :param rows: Iterable of ``(user_id, date, total)`` tuples
+    :param sign: 1 when the orders are added, -1 when they are removed
+    :return: A mapping from ``(user_id, date)`` to ``(count, total)`` deltas
+    """
+    deltas = defaultdict(lambda: [0, 0.0])
+    for user_id, day, total in rows:
+        delta = deltas[(user_id, day)]
+        delta[0] += sign
+        delta[1] += sign * total
+    return {key: tuple(delta) for key, delta in deltas.items()}
+
+
+class SummaryService:
+    """
+    A service class to read and rebuild the order summary.
+    """
+
+    @staticmethod
+    @connection_scope(read=True)
+    def get_summary(
+        group_by: str,
+        user_id: int | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ):
+        """
+        Aggregate the orders per user, per day or per user and day.
+
+        Reads the summary table only, so the cost grows with the number of
+        groups rather than with the number of orders.
+
+        :param group_by: One of "user", "day" or "user_day"
+        :param user_id: Only aggregate the orders of this user
+        :param date_from: Only aggregate orders placed on or after this date
+        :param date_to: Only aggregate orders placed on or before this date
+        :raises ValueError: if the grouping or the date range is invalid
+        :return: The list of groups with their order count, sum and average
+        """
+        if group_by not in SUMMARY_GROUPS:
+            raise ValueError("group_by must be one of: " + ", ".join(SUMMARY_GROUPS))
+        if date_from is not None and date_to is not None and date_from > date_to:
+            raise ValueError("date_from must be before date_to")
+        keys = {
+            "user": [OrderSummaryModel.user_id],
+            "day": [OrderSummaryModel.date],
+            "user_day": [OrderSummaryModel.user_id, OrderSummaryModel.date],
+        }[group_by]
+        conditions = []
+        if user_id is not None:
+            conditions.append(OrderSummaryModel.user_id == user_id)
+        if date_from is not None:
+            conditions.append(OrderSummaryModel.date >= date_from)
+        if date_to is not None:
+            conditions.append(OrderSummaryModel.date <= date_to)
+        query = OrderSummaryModel.select(
+            *keys,
+            fn.SUM(OrderSummaryModel.order_count).alias("count"),
+            fn.SUM(OrderSummaryModel.total_sum).alias("total"),
+        )
+        if conditions:
+            query = query.where(*conditions)
+        try:
+            rows = list(query.group_by(*keys).order_by(*keys).dicts())
+        except Exception as exc:
+            raise RuntimeError("Error retrieving the order summary") from exc
+        return [
+            OrderSummary.model_construct(
+                user_id=row.get("user_id"),
+                date=row.get("date"),
+                count=int(row["count"]),
+                total=float(row["total"]),
+                average=float(row["total"]) / int(row["count"]),
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    @connection_scope()
+    def rebuild():
+        """
+        Recompute the whole summary table from the orders table and, once
+        it exists, the order archive: archived orders still count.
+
+        :return: The number of summary rows written
+        """
+        orders = OrderModel.select(
+            OrderModel.user_id, OrderModel.date, OrderModel.total
+        )
+        if ArchivedOrderModel.table_exists():
+            orders = orders + ArchivedOrderModel.select(
+                ArchivedOrderModel.user_id,
+                ArchivedOrderModel.date,
+                ArchivedOrderModel.total,
+            )
+        every_order = orders.alias("every_order")
+        grouped = Select(
+            [every_order],
+            [
+                every_order.c.user_id,
+                every_order.c.date,
+                fn.COUNT(SQL("*")),
+                fn.SUM(every_order.c.total),
+            ],
+        ).group_by(every_order.c.user_id, every_order.c.date)
+        with database.atomic():
+            OrderSummaryModel.delete().execute()
+            OrderSummaryModel.insert_from(
+                grouped,
+                [
+                    OrderSummaryModel.user_id,
+                    OrderSummaryModel.date,
+                    OrderSummaryModel.order_count,
+                    OrderSummaryModel.total_sum,
+                ],
+            ).execute()
+        return OrderSummaryModel.select().count()
+
+
+if __name__ == "__main__":
+    summary_rows = SummaryService.rebuild()
+    print(f"Rebuilt order summary: {summary_rows} rows")
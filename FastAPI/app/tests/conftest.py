@@ -0,0 +1,55 @@
+"""
+This module configures the tests: they run against a throwaway SQLite
+database, migrated once per session, with the database faults cleared and
+the circuit breaker closed around every test.
+"""
+
+# pylint: disable=E0401,wrong-import-position,redefined-outer-name
+
+import os
+import tempfile
+
+# The database is chosen when config.database is imported, so before any
+# application module.
+os.environ["SQLITE_DATABASE"] = os.path.join(tempfile.mkdtemp(), "tests.db")
+
+import pytest
+from fastapi.testclient import TestClient
+
+import config.database
+from config.database import db_breaker
+from config.migrations import run_migrations
+from helpers.fault_injection import fault_injector
+from main import app
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_database():
+    """
+    Create the schema of the test database.
+    """
+    run_migrations()
+
+
+@pytest.fixture(autouse=True)
+def healthy_database(monkeypatch):
+    """
+    Start every test with a reachable database, a closed circuit, a short
+    circuit reset timeout and no retry backoff.
+    """
+    fault_injector.clear()
+    db_breaker.reset()
+    monkeypatch.setattr(db_breaker, "reset_timeout", 0.2)
+    monkeypatch.setattr(config.database, "DB_RETRY_BASE_DELAY", 0.0)
+    yield
+    fault_injector.clear()
+    db_breaker.reset()
+
+
+@pytest.fixture
+def client():
+    """
+    Test client of the application, authenticated with the API key. The
+    lifespan is not run, so no background job polls the database.
+    """
+    return TestClient(app, headers={"x-api-key": os.getenv("API_KEY")})
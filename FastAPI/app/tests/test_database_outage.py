@@ -0,0 +1,141 @@
+"""
+This module tests the behaviour of the service while the database fails,
+simulated with the fault injector: the circuit breaker, the retries of the
+idempotent operations and the answers of the routes.
+"""
+
+# pylint: disable=E0401
+
+import time
+from datetime import date
+
+import pytest
+from peewee import OperationalError
+
+from config.database import (
+    DB_RETRY_ATTEMPTS,
+    DatabaseUnavailableError,
+    OrderModel,
+    db_breaker,
+)
+from helpers.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitOpenError
+from helpers.fault_injection import fault_injector
+from services.order_service import OrderService
+
+
+def test_breaker_opens_half_opens_and_closes():
+    """
+    Consecutive connection failures open the circuit, which fails fast
+    until its reset timeout, then lets a probe through that closes it.
+    """
+    fault_injector.inject("connection")
+    with pytest.raises(DatabaseUnavailableError):
+        OrderService.get_all_orders(limit=1)
+    while db_breaker.state == CLOSED:
+        with pytest.raises((DatabaseUnavailableError, CircuitOpenError)):
+            OrderService.get_all_orders(limit=1)
+    assert db_breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        OrderService.get_all_orders(limit=1)
+
+    time.sleep(db_breaker.reset_timeout)
+    assert db_breaker.state == HALF_OPEN
+    fault_injector.clear()
+    OrderService.get_all_orders(limit=1)
+    assert db_breaker.state == CLOSED
+    assert db_breaker.stats()["consecutive_failures"] == 0
+
+
+def test_failed_probe_opens_the_circuit_again():
+    """
+    A probe failing while the circuit is half open opens it again.
+    """
+    fault_injector.inject("connection")
+    while db_breaker.state == CLOSED:
+        with pytest.raises((DatabaseUnavailableError, CircuitOpenError)):
+            OrderService.get_all_orders(limit=1)
+    time.sleep(db_breaker.reset_timeout)
+    with pytest.raises((DatabaseUnavailableError, CircuitOpenError)):
+        OrderService.get_all_orders(limit=1)
+    assert db_breaker.state == OPEN
+    assert db_breaker.stats()["times_opened"] == 2
+
+
+def test_idempotent_read_is_retried():
+    """
+    A read failing with a transient error is run again and succeeds.
+    """
+    fault_injector.inject("deadlock", count=DB_RETRY_ATTEMPTS - 1)
+    orders, _ = OrderService.get_all_orders(limit=1)
+    assert isinstance(orders, list)
+
+
+def test_read_gives_up_after_the_retry_attempts():
+    """
+    A read failing on every attempt raises the error of the last one.
+    """
+    fault_injector.inject("deadlock", count=DB_RETRY_ATTEMPTS)
+    with pytest.raises(RuntimeError):
+        OrderService.get_all_orders(limit=1)
+    OrderService.get_all_orders(limit=1)
+
+
+def test_write_is_not_retried():
+    """
+    A write failing with a transient error is not run again: the commit
+    may have happened before the error. Only its first statement fails, so
+    a retry would have succeeded.
+    """
+    before = OrderModel.select().count()
+    fault_injector.inject("deadlock", count=1)
+    with pytest.raises((RuntimeError, OperationalError)):
+        OrderService.create_order(1, date.today(), 10.0)
+    assert OrderModel.select().count() == before
+    OrderService.create_order(1, date.today(), 10.0)
+    assert OrderModel.select().count() == before + 1
+
+
+def test_routes_answer_503_with_retry_after(client):
+    """
+    The routes answer an unreachable database, then an open circuit, with
+    503 and a Retry-After header instead of a generic 500.
+    """
+    fault_injector.inject("connection")
+    response = client.get("/order/orders")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    while db_breaker.state == CLOSED:
+        client.get("/product_order_route/order_products")
+    response = client.get("/product_order_route/order_products")
+    assert response.status_code == 503
+    assert response.json() == {"detail": "The database is unavailable"}
+    assert int(response.headers["Retry-After"]) >= 1
+    assert client.get("/order/orders/999999").status_code == 503
+
+
+def test_missing_order_is_404(client):
+    """
+    A not-found answer raised inside a handler is not turned into a 500.
+    """
+    assert client.get("/order/orders/999999").status_code == 404
+
+
+def test_readiness(client):
+    """
+    The readiness endpoint answers 200 while the database answers, and 503
+    with the breaker state when it fails or the circuit is open.
+    """
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["database"]["ok"] is True
+
+    fault_injector.inject("connection")
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "unavailable"
+    while db_breaker.state == CLOSED:
+        client.get("/health/ready")
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["database"]["error"] == "circuit open"
+    assert response.json()["breaker"]["state"] == OPEN
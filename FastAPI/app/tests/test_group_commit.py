@@ -0,0 +1,72 @@
+"""
+This module tests the group commit of single-row inserts.
+"""
+
+# pylint: disable=E0401
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from peewee import IntegrityError
+
+from config.database import DatabaseUnavailableError
+from services.group_commit import GroupCommitter
+
+
+def _submit_all(committer: GroupCommitter, rows: list) -> list:
+    """
+    Submit the rows from concurrent threads, returning each result or error.
+    """
+
+    def submit(row):
+        try:
+            return committer.submit(row)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            return exc
+
+    with ThreadPoolExecutor(len(rows)) as pool:
+        return list(pool.map(submit, rows))
+
+
+def test_callers_get_their_own_copy_of_the_batch_error():
+    """
+    Every caller of a failed batch gets an error of the original type, of
+    its own, raised from the original.
+    """
+    error = IntegrityError("duplicate")
+
+    def write_batch(rows):
+        raise error
+
+    committer = GroupCommitter(write_batch, window=0.2, max_rows=2, timeout=5.0)
+    results = _submit_all(committer, [{"n": 1}, {"n": 2}])
+
+    assert all(isinstance(result, IntegrityError) for result in results)
+    assert results[0] is not results[1]
+    assert all(result is not error and result.__cause__ is error for result in results)
+    assert all(result.args == error.args for result in results)
+
+
+def test_callers_stop_waiting_for_a_stuck_leader():
+    """
+    The other callers of a batch whose leader never finishes give up after
+    the timeout instead of blocking forever.
+    """
+    release = threading.Event()
+
+    def write_batch(rows):
+        release.wait(5.0)
+        return list(range(len(rows)))
+
+    committer = GroupCommitter(write_batch, window=0.5, max_rows=10, timeout=0.1)
+    leader = threading.Thread(target=committer.submit, args=({"n": 0},))
+    leader.start()
+    try:
+        while committer._current is None:  # pylint: disable=protected-access
+            pass
+        with pytest.raises(DatabaseUnavailableError):
+            committer.submit({"n": 1})
+    finally:
+        release.set()
+        leader.join()
@@ -0,0 +1,60 @@
+"""
+This module tests the bulk delete of orders.
+"""
+
+# pylint: disable=E0401
+
+from datetime import date
+
+from config.database import OrderChangeModel, ProductOrderModel
+from services import purge_service
+from services.order_service import OrderService
+from services.outbox import DELETED, ORDER_PRODUCT, ORDER
+
+
+def _deleted_events(entity: str, entity_ids: list) -> set:
+    """
+    Return the IDs among ``entity_ids`` with a deletion event in the outbox.
+    """
+    return {
+        entity_id
+        for (entity_id,) in OrderChangeModel.select(OrderChangeModel.entity_id)
+        .where(
+            OrderChangeModel.entity == entity,
+            OrderChangeModel.action == DELETED,
+            OrderChangeModel.entity_id.in_(entity_ids),
+        )
+        .tuples()
+    }
+
+
+def test_purge_publishes_the_lines_added_during_the_chunk(monkeypatch):
+    """
+    A line added to an order after its lines were deleted goes away with
+    the order, and its deletion is published like the others.
+    """
+    order = OrderService.create_order(7, date.today(), 20.0)
+    first = ProductOrderModel.create(order_id=order.id, product_id=1, quantity=1)
+    late = []
+    delete_lines = purge_service._delete_lines  # pylint: disable=protected-access
+
+    def delete_lines_then_insert(order_ids, conditions, chunk_size):
+        deleted = delete_lines(order_ids, conditions, chunk_size)
+        late.append(
+            ProductOrderModel.create(order_id=order.id, product_id=2, quantity=1)
+        )
+        return deleted
+
+    monkeypatch.setattr(purge_service, "_delete_lines", delete_lines_then_insert)
+    reports = list(purge_service.PurgeService.purge_orders(ids=[order.id]))
+
+    assert reports[-1]["done"] and reports[-1]["orders_deleted"] == 1
+    assert reports[-1]["lines_deleted"] == 2
+    line_ids = [first.id, late[0].id]
+    assert (
+        not ProductOrderModel.select()
+        .where(ProductOrderModel.id.in_(line_ids))
+        .exists()
+    )
+    assert _deleted_events(ORDER_PRODUCT, line_ids) == set(line_ids)
+    assert _deleted_events(ORDER, [order.id]) == {order.id}